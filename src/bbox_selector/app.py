@@ -2,8 +2,11 @@
 BBox Selector - Main Application
 Modular architecture with separated concerns
 """
+import os
+import atexit
 import tkinter as tk
 from tkinter import ttk
+from concurrent.futures import ThreadPoolExecutor
 
 from .ui_components import UIComponents
 from .image_handler import ImageHandler
@@ -36,6 +39,9 @@ class BBoxSelector:
         
         # Enable drag and drop after canvas is created
         self.image_handler.enable_drag_drop()
+        
+        # Release background workers when the window is closed
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
     
     def _init_responsive_sizing(self):
         """Initialize responsive window sizing and fonts"""
@@ -57,14 +63,16 @@ class BBoxSelector:
     def _init_variables(self):
         """Initialize all application variables"""
         # Image management
-        self.images = []  # List of (image_path, PIL.Image)
+        self.images = []  # List of (image_path, PIL.Image or None until first displayed)
         self.current_image_index = 0
         self.image = None
         self.image_path = None
+        self.image_basename = ''
         self.display_image = None
         
         # Zoom settings
         self.zoom_level = 1.0
+        self.inv_zoom = 1.0  # 1 / zoom_level, refreshed on every image redraw
         self.min_zoom = 0.1
         self.max_zoom = 5.0
         
@@ -76,8 +84,10 @@ class BBoxSelector:
         self.image_annotations = {}
         
         # Current image annotations
-        self.bboxes = []
+        self.bboxes = {}  # bbox id -> bbox, in creation order
+        self.bbox_xywh = None  # Cached (N, 5) int32 rows of (id, x, y, w, h) for hit-tests; None when stale
         self.bbox_counter = 0
+        self.shapes_dirty = False  # True once the current image's shapes differ from image_annotations
         self.selected_bbox = None
         self.hovered_bbox = None
         
@@ -86,18 +96,26 @@ class BBoxSelector:
         self.drag_handle = None
         self.drag_start_x = 0
         self.drag_start_y = 0
+        self.drag_preview_mode = False  # Cheaper image resampling while a resize drag is active
+        self.handle_rects = {}  # Resize handle tag -> canvas rectangle of the selected bbox
         
         # Polygon mode
         self.custom_select_mode = tk.BooleanVar(value=False)
         self.polygon_points = []
         self.polygon_counter = 0
-        self.polygons = []
+        self.polygons = {}  # polygon id -> polygon, in creation order
         self.selected_polygon = None
         
         # Canvas offsets
         self.image_offset_x = 0
         self.image_offset_y = 0
         
+        # Shared pool for background image I/O (probing, export)
+        self.io_pool = ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 2) * 2),
+                                          thread_name_prefix='img-io')
+        atexit.register(self.io_pool.shutdown, wait=False)
+        self.encode_pool = None  # Process pool for PNG encoding, started by the first export
+        
         # Multi-class annotation system
         self.classes = [
             {'name': 'Class 1', 'color': '#00ff00'},
@@ -116,6 +134,8 @@ class BBoxSelector:
         from .export_formats import ExportFormatter
         self.export_formatter = ExportFormatter()
         self.export_format = tk.StringVar(value='JSON')  # Default format
+        self.export_compress_level = 1  # PNG zlib level for exported crops (6 = smaller, slower)
+        self.export_cache = {}  # sha1 of source image + shape geometry + PNG level -> last exported crop path
         
         # UI elements (will be set by UIComponents)
         self.canvas = None
@@ -123,6 +143,7 @@ class BBoxSelector:
         self.status_label = None
         self.side_panel = None
         self.image_listbox = None
+        self.image_list_var = None
         self.image_counter_label = None
         self.prev_btn = None
         self.next_btn = None
@@ -191,8 +212,7 @@ class BBoxSelector:
         
         def refresh_list():
             class_listbox.delete(0, tk.END)
-            for cls in self.classes:
-                class_listbox.insert(tk.END, f"{cls['name']} ({cls['color']})")
+            class_listbox.insert(tk.END, *(f"{cls['name']} ({cls['color']})" for cls in self.classes))
         
         refresh_list()
         
@@ -493,9 +513,9 @@ class BBoxSelector:
         """Reset zoom"""
         self.canvas_handler.zoom_reset()
     
-    def validate_bbox_size(self, event=None):
+    def validate_bbox_size(self, event=None, show_error=True):
         """Validate bbox size"""
-        self.shape_manager.validate_bbox_size(event)
+        self.shape_manager.validate_bbox_size(event, show_error)
     
     def apply_size_to_selected(self):
         """Apply size to selected bbox"""
@@ -521,6 +541,14 @@ class BBoxSelector:
         """Update status bar message"""
         if self.status_label:
             self.status_label.config(text=message)
+    
+    def on_close(self):
+        """Stop background workers and close the window"""
+        self.image_handler.stop_prefetch()
+        self.io_pool.shutdown(wait=False, cancel_futures=True)
+        if self.encode_pool is not None:
+            self.encode_pool.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
 
 
 def main():
@@ -3,6 +3,7 @@ Image Augmentation Module
 Provides various augmentation techniques for dataset enhancement
 """
 import numpy as np
+from numpy import asarray as _to_array  # zero-copy view of PIL pixel data
 from PIL import Image, ImageEnhance, ImageFilter
 import random
 
@@ -166,7 +167,7 @@ class ImageAugmentor:
     
     def _add_noise(self, image):
         """Add random noise to image"""
-        img_array = np.array(image)
+        img_array = _to_array(image)
         min_val, max_val = self.augmentation_options['noise_amount']
         noise_amount = random.randint(min_val, max_val)
         
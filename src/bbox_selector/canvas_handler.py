@@ -2,17 +2,72 @@
 Canvas Handler Module
 Manages canvas display, zoom, and mouse interactions
 """
+from collections import OrderedDict
 from PIL import ImageTk
 
+# Side length of the square resize handles, in canvas pixels
+HANDLE_SIZE = 10
+
+# Number of zoomed PhotoImages kept for reuse
+PHOTO_CACHE_SIZE = 2
+
 
 class CanvasHandler:
     """Handles canvas display and interactions"""
     
     def __init__(self, app):
         self.app = app
+        self.photo_cache = OrderedDict()  # (image id, zoomed size) -> (image, PhotoImage)
+        self._drawn_view = None
+        self._culled = False
+        self._refresh_pending = False
+        self._zoom_q = 65536
+        self._handle_ids = None  # (bbox id, [nw, ne, sw, se] item ids) of the drawn handles
+        self._canvas_size = None  # (width, height) cached from <Configure>
+        self._preview_shown = False
+        self._hover_drawn = None  # bbox drawn with the hover style by the last redraw
+        self._status_pending = False
+        
+    def _get_zoomed_photo(self, zoomed_width, zoomed_height):
+        """Return a PhotoImage of the current image at the given size, reusing cached ones"""
+        image = self.app.image
+        key = (id(image), zoomed_width, zoomed_height)
+        cached = self.photo_cache.get(key)
+        if cached is not None and cached[0] is image:
+            self.photo_cache.move_to_end(key)
+            self._preview_shown = False
+            return cached[1]
         
-    def display_image_on_canvas(self, preserve_view=False):
-        """Display image on canvas with current zoom level"""
+        # Resize image (nearest-neighbour while previewing a drag, bilinear otherwise)
+        self._preview_shown = self.app.drag_preview_mode
+        resample = 0 if self.app.drag_preview_mode else 1
+        photo = ImageTk.PhotoImage(image.resize((zoomed_width, zoomed_height), resample=resample))
+        
+        # Preview-quality frames are not cached
+        if not self._preview_shown:
+            self.photo_cache[key] = (image, photo)
+            while len(self.photo_cache) > PHOTO_CACHE_SIZE:
+                self.photo_cache.popitem(last=False)
+        return photo
+    
+    def end_drag_preview(self):
+        """Leave drag preview mode, redrawing at full quality if a preview was shown"""
+        self.app.drag_preview_mode = False
+        if self._preview_shown:
+            self.display_image_on_canvas(preserve_view=True)
+    
+    def on_canvas_resize(self, event):
+        """Cache the canvas size whenever the canvas is resized"""
+        self._canvas_size = (event.width, event.height)
+    
+    def _get_canvas_size(self):
+        """Return the cached canvas size, querying Tk until the first <Configure>"""
+        if self._canvas_size is None:
+            return self.app.canvas.winfo_width(), self.app.canvas.winfo_height()
+        return self._canvas_size
+        
+    def display_image_on_canvas(self, preserve_view=False, interactive=False):
+        """Display image on canvas with current zoom level (interactive redraws defer the status update)"""
         if not self.app.image:
             return
         
@@ -25,28 +80,27 @@ class CanvasHandler:
         zoomed_width = int(self.app.image.width * self.app.zoom_level)
         zoomed_height = int(self.app.image.height * self.app.zoom_level)
         
-        # Resize image
-        resized_image = self.app.image.resize((zoomed_width, zoomed_height), resample=1)
-        self.app.display_image = ImageTk.PhotoImage(resized_image)
+        self.app.display_image = self._get_zoomed_photo(zoomed_width, zoomed_height)
         
         # Clear canvas
         self.app.canvas.delete("all")
         
         # Calculate centering offsets
-        canvas_width = self.app.canvas.winfo_width()
-        canvas_height = self.app.canvas.winfo_height()
+        canvas_width, canvas_height = self._get_canvas_size()
         x_offset = max((canvas_width - zoomed_width) // 2, 0)
         y_offset = max((canvas_height - zoomed_height) // 2, 0)
         
         self.app.image_offset_x = x_offset
         self.app.image_offset_y = y_offset
         
+        # 16.16 fixed-point zoom factor used when mapping shapes to the canvas,
+        # and its reciprocal used when mapping mouse events back to the image
+        self._zoom_q = int(self.app.zoom_level * 65536)
+        self.app.inv_zoom = 1.0 / self.app.zoom_level
+        
         # Display image
         self.app.canvas.create_image(x_offset, y_offset, anchor='nw', image=self.app.display_image)
         
-        # Redraw shapes
-        self.redraw_bboxes()
-        
         # Update scroll region
         scroll_width = max(zoomed_width + 2 * x_offset, canvas_width)
         scroll_height = max(zoomed_height + 2 * y_offset, canvas_height)
@@ -61,49 +115,123 @@ class CanvasHandler:
             # Center the view
             self.app.canvas.xview_moveto((x_offset - 10) / scroll_width if scroll_width > canvas_width else 0)
             self.app.canvas.yview_moveto((y_offset - 10) / scroll_height if scroll_height > canvas_height else 0)
-
-        # Update status with image info
+        
+        # Redraw shapes (after the view is final so off-screen shapes can be culled)
+        self.redraw_bboxes()
+        
+        if interactive:
+            # Build the status once the burst of zoom events has been handled
+            if not self._status_pending:
+                self._status_pending = True
+                self.app.root.after_idle(self._update_image_status)
+            return
+        self._update_image_status()
+    
+    def _update_image_status(self):
+        """Show the current image, zoom and shape counts in the status bar"""
+        self._status_pending = False
+        if not self.app.image:
+            return
         if len(self.app.images) > 1:
-            self.app.update_status(f"Image {self.app.current_image_index + 1}/{len(self.app.images)}: {self.app.image_path.split('/')[-1] if self.app.image_path else ''} | "
+            self.app.update_status(f"Image {self.app.current_image_index + 1}/{len(self.app.images)}: {self.app.image_basename} | "
                               f"Size: {self.app.image.size[0]}x{self.app.image.size[1]} | Zoom: {int(self.app.zoom_level * 100)}% | "
                               f"BBoxes: {len(self.app.bboxes)} | Polygons: {len(self.app.polygons)}")
         else:
-            self.app.update_status(f"Loaded: {self.app.image_path.split('/')[-1] if self.app.image_path else ''} | Size: {self.app.image.size[0]}x{self.app.image.size[1]} | "
+            self.app.update_status(f"Loaded: {self.app.image_basename} | Size: {self.app.image.size[0]}x{self.app.image.size[1]} | "
                               f"Zoom: {int(self.app.zoom_level * 100)}% | BBoxes: {len(self.app.bboxes)} | Polygons: {len(self.app.polygons)}")
 
+    def _visible_image_rect(self):
+        """Return the visible canvas area as (x0, y0, x1, y1) in image coordinates"""
+        canvas = self.app.canvas
+        zoom = self.app.zoom_level
+        canvas_width, canvas_height = self._get_canvas_size()
+        x0 = (canvas.canvasx(0) - self.app.image_offset_x) / zoom
+        y0 = (canvas.canvasy(0) - self.app.image_offset_y) / zoom
+        x1 = (canvas.canvasx(canvas_width) - self.app.image_offset_x) / zoom
+        y1 = (canvas.canvasy(canvas_height) - self.app.image_offset_y) / zoom
+        return x0, y0, x1, y1
+    
+    def on_view_changed(self):
+        """Schedule a shape refresh after scrolling if the last redraw culled shapes"""
+        if self._culled and not self._refresh_pending:
+            self._refresh_pending = True
+            self.app.root.after_idle(self._refresh_culled_shapes)
+    
+    def redraw_overlays(self):
+        """Redraw shapes only, reusing the image item already on the canvas"""
+        if not self.app.image:
+            return
+        self.app.canvas.delete("shape")
+        self.redraw_bboxes()
+    
+    def update_hover(self):
+        """Restyle the previously and newly hovered bbox outlines in place"""
+        old, new = self._hover_drawn, self.app.hovered_bbox
+        self._hover_drawn = new
+        for bbox in (old, new):
+            if not bbox or not bbox.get('rect_id') or bbox is self.app.selected_bbox:
+                continue
+            class_color = bbox.get('class_color', '#ff0000')
+            outline_color = self._brighten_color(class_color) if bbox is new else class_color
+            self.app.canvas.itemconfigure(bbox['rect_id'], outline=outline_color)
+    
+    def _refresh_culled_shapes(self):
+        """Redraw shapes when the viewport moved since they were culled"""
+        self._refresh_pending = False
+        if self.app.image and self._visible_image_rect() != self._drawn_view:
+            self.app.canvas.delete("shape")
+            self.redraw_bboxes()
+    
     def redraw_bboxes(self):
         """Redraw all bboxes and polygons with current zoom level"""
+        vx0, vy0, vx1, vy1 = self._drawn_view = self._visible_image_rect()
+        culled = False
+        zoom_q = self._zoom_q
+        self._handle_ids = None
+        self.app.handle_rects = {}
+        self._hover_drawn = self.app.hovered_bbox
+        
         # Draw polygon points and lines if in polygon mode
         if self.app.custom_select_mode.get() and self.app.polygon_points:
             for i in range(len(self.app.polygon_points)):
-                x1 = self.app.image_offset_x + int(self.app.polygon_points[i][0] * self.app.zoom_level)
-                y1 = self.app.image_offset_y + int(self.app.polygon_points[i][1] * self.app.zoom_level)
+                x1 = self.app.image_offset_x + ((self.app.polygon_points[i][0] * zoom_q) >> 16)
+                y1 = self.app.image_offset_y + ((self.app.polygon_points[i][1] * zoom_q) >> 16)
                 
                 # Draw point
-                self.app.canvas.create_oval(x1-4, y1-4, x1+4, y1+4, fill="#00ff00", outline="white", width=2)
+                self.app.canvas.create_oval(x1-4, y1-4, x1+4, y1+4, fill="#00ff00", outline="white", width=2, tags="shape")
                 
                 # Draw line to next point
                 if i < len(self.app.polygon_points) - 1:
-                    x2 = self.app.image_offset_x + int(self.app.polygon_points[i+1][0] * self.app.zoom_level)
-                    y2 = self.app.image_offset_y + int(self.app.polygon_points[i+1][1] * self.app.zoom_level)
-                    self.app.canvas.create_line(x1, y1, x2, y2, fill="#00ff00", width=2)
+                    x2 = self.app.image_offset_x + ((self.app.polygon_points[i+1][0] * zoom_q) >> 16)
+                    y2 = self.app.image_offset_y + ((self.app.polygon_points[i+1][1] * zoom_q) >> 16)
+                    self.app.canvas.create_line(x1, y1, x2, y2, fill="#00ff00", width=2, tags="shape")
             
             # Draw closing line
             if len(self.app.polygon_points) > 2:
-                x1 = self.app.image_offset_x + int(self.app.polygon_points[-1][0] * self.app.zoom_level)
-                y1 = self.app.image_offset_y + int(self.app.polygon_points[-1][1] * self.app.zoom_level)
-                x2 = self.app.image_offset_x + int(self.app.polygon_points[0][0] * self.app.zoom_level)
-                y2 = self.app.image_offset_y + int(self.app.polygon_points[0][1] * self.app.zoom_level)
-                self.app.canvas.create_line(x1, y1, x2, y2, fill="#00ff00", width=2, dash=(5, 5))
+                x1 = self.app.image_offset_x + ((self.app.polygon_points[-1][0] * zoom_q) >> 16)
+                y1 = self.app.image_offset_y + ((self.app.polygon_points[-1][1] * zoom_q) >> 16)
+                x2 = self.app.image_offset_x + ((self.app.polygon_points[0][0] * zoom_q) >> 16)
+                y2 = self.app.image_offset_y + ((self.app.polygon_points[0][1] * zoom_q) >> 16)
+                self.app.canvas.create_line(x1, y1, x2, y2, fill="#00ff00", width=2, dash=(5, 5), tags="shape")
         
         # Draw completed polygons
-        for polygon in self.app.polygons:
+        for polygon in self.app.polygons.values():
             points = polygon['points']
             if len(points) >= 3:
+                # Skip polygons entirely outside the viewport
+                poly_bbox = polygon.get('_bbox')
+                if poly_bbox is None:
+                    xs = [p[0] for p in points]
+                    ys = [p[1] for p in points]
+                    poly_bbox = polygon['_bbox'] = (min(xs), min(ys), max(xs), max(ys))
+                if poly_bbox[2] < vx0 or poly_bbox[0] > vx1 or poly_bbox[3] < vy0 or poly_bbox[1] > vy1:
+                    culled = True
+                    continue
+                
                 canvas_points = []
                 for x, y in points:
-                    canvas_x = self.app.image_offset_x + int(x * self.app.zoom_level)
-                    canvas_y = self.app.image_offset_y + int(y * self.app.zoom_level)
+                    canvas_x = self.app.image_offset_x + ((x * zoom_q) >> 16)
+                    canvas_y = self.app.image_offset_y + ((y * zoom_q) >> 16)
                     canvas_points.extend([canvas_x, canvas_y])
                 
                 is_selected = self.app.selected_polygon and self.app.selected_polygon['id'] == polygon['id']
@@ -115,7 +243,7 @@ class CanvasHandler:
                 line_width = 3 if is_selected else 2
                 
                 # Draw polygon outline
-                self.app.canvas.create_polygon(canvas_points, outline=outline_color, fill="", width=line_width, tags=f"polygon_{polygon['id']}")
+                self.app.canvas.create_polygon(canvas_points, outline=outline_color, fill="", width=line_width, tags=(f"polygon_{polygon['id']}", "shape"))
                 
                 # Draw label with class name
                 if canvas_points:
@@ -123,51 +251,115 @@ class CanvasHandler:
                     label_text = f"P#{polygon['id']} [{class_name}]" + (" ✓" if is_selected else "")
                     self.app.canvas.create_text(canvas_points[0] + 5, canvas_points[1] + 5, 
                                           text=label_text, fill=text_color, 
-                                          font=('Segoe UI', self.app.base_font_size, 'bold'), anchor='nw', tags=f"polygon_{polygon['id']}")
+                                          font=('Segoe UI', self.app.base_font_size, 'bold'), anchor='nw', tags=(f"polygon_{polygon['id']}", "shape"))
         
         # Draw bboxes
-        for bbox in self.app.bboxes:
-            x1 = self.app.image_offset_x + int(bbox['x'] * self.app.zoom_level)
-            y1 = self.app.image_offset_y + int(bbox['y'] * self.app.zoom_level)
-            x2 = x1 + int(bbox['width'] * self.app.zoom_level)
-            y2 = y1 + int(bbox['height'] * self.app.zoom_level)
+        canvas = self.app.canvas
+        offset_x = self.app.image_offset_x
+        offset_y = self.app.image_offset_y
+        font = ('Segoe UI', self.app.base_font_size, 'bold')
+        sel_id = self.app.selected_bbox['id'] if self.app.selected_bbox else None
+        hov_id = self.app.hovered_bbox['id'] if self.app.hovered_bbox else None
+        
+        if sel_id is None and hov_id is None:
+            # Fast path: nothing selected or hovered, every bbox uses its class color
+            for bbox in self.app.bboxes.values():
+                if (bbox['x'] + bbox['width'] < vx0 or bbox['x'] > vx1 or
+                        bbox['y'] + bbox['height'] < vy0 or bbox['y'] > vy1):
+                    culled = True
+                    continue
+                
+                x1 = offset_x + ((bbox['x'] * zoom_q) >> 16)
+                y1 = offset_y + ((bbox['y'] * zoom_q) >> 16)
+                x2 = x1 + ((bbox['width'] * zoom_q) >> 16)
+                y2 = y1 + ((bbox['height'] * zoom_q) >> 16)
+                class_color = bbox.get('class_color', '#ff0000')
+                tags = (f"bbox_{bbox['id']}", "shape")
+                
+                bbox['rect_id'] = canvas.create_rectangle(x1, y1, x2, y2, outline=class_color, width=2,
+                                                          fill="", tags=tags)
+                bbox['text_id'] = canvas.create_text(x1 + 5, y1 + 5, text=f"#{bbox['id']} [{bbox.get('class', 'Class 1')}]",
+                                                     fill=class_color, font=font, anchor='nw', tags=tags)
             
-            is_selected = self.app.selected_bbox and self.app.selected_bbox['id'] == bbox['id']
-            is_hovered = self.app.hovered_bbox and self.app.hovered_bbox['id'] == bbox['id']
+            self._culled = culled
+            return
+        
+        for bbox in self.app.bboxes.values():
+            # Skip bboxes entirely outside the viewport
+            if (bbox['x'] + bbox['width'] < vx0 or bbox['x'] > vx1 or
+                    bbox['y'] + bbox['height'] < vy0 or bbox['y'] > vy1):
+                culled = True
+                continue
+            
+            x1 = offset_x + ((bbox['x'] * zoom_q) >> 16)
+            y1 = offset_y + ((bbox['y'] * zoom_q) >> 16)
+            x2 = x1 + ((bbox['width'] * zoom_q) >> 16)
+            y2 = y1 + ((bbox['height'] * zoom_q) >> 16)
+            
+            is_selected = bbox['id'] == sel_id
+            is_hovered = bbox['id'] == hov_id
             
             # Use class color or default
             class_color = bbox.get('class_color', '#ff0000')
             outline_color = "#ffcc00" if is_selected else (self._brighten_color(class_color) if is_hovered else class_color)
             text_color = "#ffcc00" if is_selected else class_color
-            line_width = 3 if is_selected else (2 if is_hovered else 2)
+            line_width = 3 if is_selected else 2
             
             # Draw rectangle
-            rect_id = self.app.canvas.create_rectangle(x1, y1, x2, y2, outline=outline_color, width=line_width, 
-                                                   fill="", tags=f"bbox_{bbox['id']}")
+            rect_id = canvas.create_rectangle(x1, y1, x2, y2, outline=outline_color, width=line_width, 
+                                              fill="", tags=(f"bbox_{bbox['id']}", "shape"))
             
             # Draw label with class name
             class_name = bbox.get('class', 'Class 1')
             label_text = f"#{bbox['id']} [{class_name}]"
             if is_selected:
                 label_text += " ✓"
-            text_id = self.app.canvas.create_text(x1 + 5, y1 + 5, text=label_text, fill=text_color, 
-                                             font=('Segoe UI', self.app.base_font_size, 'bold'), anchor='nw', tags=f"bbox_{bbox['id']}")
+            text_id = canvas.create_text(x1 + 5, y1 + 5, text=label_text, fill=text_color, 
+                                         font=font, anchor='nw', tags=(f"bbox_{bbox['id']}", "shape"))
             
             bbox['rect_id'] = rect_id
             bbox['text_id'] = text_id
             
             # Draw resize handles for selected bbox
             if is_selected:
-                handle_size = 10
-                # Corner handles
-                self.app.canvas.create_rectangle(x1-handle_size//2, y1-handle_size//2, x1+handle_size//2, y1+handle_size//2, 
-                                            fill="#ffcc00", outline="white", width=2, tags=f"handle_nw_{bbox['id']}")
-                self.app.canvas.create_rectangle(x2-handle_size//2, y1-handle_size//2, x2+handle_size//2, y1+handle_size//2, 
-                                            fill="#ffcc00", outline="white", width=2, tags=f"handle_ne_{bbox['id']}")
-                self.app.canvas.create_rectangle(x1-handle_size//2, y2-handle_size//2, x1+handle_size//2, y2+handle_size//2, 
-                                            fill="#ffcc00", outline="white", width=2, tags=f"handle_sw_{bbox['id']}")
-                self.app.canvas.create_rectangle(x2-handle_size//2, y2-handle_size//2, x2+handle_size//2, y2+handle_size//2, 
-                                            fill="#ffcc00", outline="white", width=2, tags=f"handle_se_{bbox['id']}")
+                handle_ids = []
+                for corner, coords in zip(('nw', 'ne', 'sw', 'se'), self._handle_coords(x1, y1, x2, y2)):
+                    tag = f"handle_{corner}_{bbox['id']}"
+                    handle_ids.append(canvas.create_rectangle(*coords, fill="#ffcc00", outline="white", width=2,
+                                                              tags=(tag, "shape")))
+                    self.app.handle_rects[tag] = coords
+                self._handle_ids = (bbox['id'], handle_ids)
+        
+        self._culled = culled
+    
+    def _handle_coords(self, x1, y1, x2, y2):
+        """Return canvas rectangles of the nw, ne, sw and se resize handles"""
+        half = HANDLE_SIZE // 2
+        return [(x - half, y - half, x + half, y + half)
+                for x, y in ((x1, y1), (x2, y1), (x1, y2), (x2, y2))]
+    
+    def move_bbox_items(self, bbox):
+        """Move the drawn items of the selected bbox in place; return False if a full redraw is needed"""
+        if not self._handle_ids or self._handle_ids[0] != bbox['id'] or not bbox.get('rect_id'):
+            return False
+        
+        zoom_q = self._zoom_q
+        x1 = self.app.image_offset_x + ((bbox['x'] * zoom_q) >> 16)
+        y1 = self.app.image_offset_y + ((bbox['y'] * zoom_q) >> 16)
+        x2 = x1 + ((bbox['width'] * zoom_q) >> 16)
+        y2 = y1 + ((bbox['height'] * zoom_q) >> 16)
+        
+        self.app.canvas.coords(bbox['rect_id'], x1, y1, x2, y2)
+        self.app.canvas.coords(bbox['text_id'], x1 + 5, y1 + 5)
+        self._move_handles(x1, y1, x2, y2)
+        return True
+    
+    def _move_handles(self, x1, y1, x2, y2):
+        """Move the cached resize handle items to the given bbox corners"""
+        for (tag, handle_id), coords in zip(zip(self.app.handle_rects, self._handle_ids[1]),
+                                            self._handle_coords(x1, y1, x2, y2)):
+            self.app.canvas.coords(handle_id, *coords)
+            self.app.handle_rects[tag] = coords
     
     def _brighten_color(self, hex_color):
         """Brighten a hex color for hover effect"""
@@ -187,19 +379,19 @@ class CanvasHandler:
         # Convert back to hex
         return f"#{r:02x}{g:02x}{b:02x}"
     
-    def zoom_in(self):
+    def zoom_in(self, interactive=False):
         """Zoom in by 20%"""
         if self.app.zoom_level < self.app.max_zoom:
             self.app.zoom_level = min(self.app.zoom_level * 1.2, self.app.max_zoom)
             self.app.zoom_label.config(text=f"{int(self.app.zoom_level * 100)}%")
-            self.display_image_on_canvas()
+            self.display_image_on_canvas(interactive=interactive)
     
-    def zoom_out(self):
+    def zoom_out(self, interactive=False):
         """Zoom out by 20%"""
         if self.app.zoom_level > self.app.min_zoom:
             self.app.zoom_level = max(self.app.zoom_level / 1.2, self.app.min_zoom)
             self.app.zoom_label.config(text=f"{int(self.app.zoom_level * 100)}%")
-            self.display_image_on_canvas()
+            self.display_image_on_canvas(interactive=interactive)
     
     def zoom_reset(self):
         """Reset zoom to 100%"""
@@ -214,9 +406,9 @@ class CanvasHandler:
     def on_ctrl_mouse_wheel(self, event):
         """Handle zoom with Ctrl+MouseWheel"""
         if event.delta > 0:
-            self.zoom_in()
+            self.zoom_in(interactive=True)
         else:
-            self.zoom_out()
+            self.zoom_out(interactive=True)
     
     def on_shift_mouse_wheel(self, event):
         """Handle horizontal scrolling"""
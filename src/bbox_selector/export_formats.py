@@ -7,6 +7,58 @@ import os
 from datetime import datetime
 import xml.etree.ElementTree as ET
 from xml.dom import minidom
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _poly_bbox(pts):
+        """Return (x_min, y_min, x_max, y_max) of an (N, 2) float64 point array"""
+        x_min = x_max = pts[0, 0]
+        y_min = y_max = pts[0, 1]
+        for i in range(1, pts.shape[0]):
+            x = pts[i, 0]
+            y = pts[i, 1]
+            if x < x_min:
+                x_min = x
+            elif x > x_max:
+                x_max = x
+            if y < y_min:
+                y_min = y
+            elif y > y_max:
+                y_max = y
+        return x_min, y_min, x_max, y_max
+else:
+    def _poly_bbox(pts):
+        """Return (x_min, y_min, x_max, y_max) of an (N, 2) float64 point array"""
+        x_min, y_min = pts.min(axis=0)
+        x_max, y_max = pts.max(axis=0)
+        return x_min, y_min, x_max, y_max
+
+
+# Pascal VOC <object> element, parsed in one call per annotation
+VOC_OBJECT_TEMPLATE = (
+    '<object><name>{name}</name><pose>Unspecified</pose><truncated>0</truncated>'
+    '<difficult>0</difficult><bndbox><xmin>{xmin}</xmin><ymin>{ymin}</ymin>'
+    '<xmax>{xmax}</xmax><ymax>{ymax}</ymax></bndbox></object>'
+)
+
+
+def _points_array(polygon):
+    """Return the polygon points as a contiguous float64 array, cached on the polygon"""
+    arr = polygon.get('_points_array')
+    if arr is None or len(arr) != len(polygon['points']):
+        arr = np.ascontiguousarray(polygon['points'], dtype=np.float64)
+        polygon['_points_array'] = arr
+    return arr
 
 
 class ExportFormatter:
@@ -101,10 +153,7 @@ class ExportFormatter:
                     segmentation.extend([x, y])
                 
                 # Calculate bbox from polygon
-                xs = [p[0] for p in points]
-                ys = [p[1] for p in points]
-                x_min, x_max = min(xs), max(xs)
-                y_min, y_max = min(ys), max(ys)
+                x_min, y_min, x_max, y_max = (int(v) for v in _poly_bbox(_points_array(polygon)))
                 width = x_max - x_min
                 height = y_max - y_min
                 
@@ -176,59 +225,17 @@ class ExportFormatter:
             
             # Add bboxes as objects
             for bbox in annotations.get('bboxes', []):
-                obj = ET.SubElement(annotation, 'object')
-                
-                name = ET.SubElement(obj, 'name')
-                name.text = bbox.get('class', 'Class 1')
-                
-                pose = ET.SubElement(obj, 'pose')
-                pose.text = 'Unspecified'
-                
-                truncated = ET.SubElement(obj, 'truncated')
-                truncated.text = '0'
-                
-                difficult = ET.SubElement(obj, 'difficult')
-                difficult.text = '0'
-                
-                bndbox = ET.SubElement(obj, 'bndbox')
-                xmin = ET.SubElement(bndbox, 'xmin')
-                xmin.text = str(bbox['x'])
-                ymin = ET.SubElement(bndbox, 'ymin')
-                ymin.text = str(bbox['y'])
-                xmax = ET.SubElement(bndbox, 'xmax')
-                xmax.text = str(bbox['x'] + bbox['width'])
-                ymax = ET.SubElement(bndbox, 'ymax')
-                ymax.text = str(bbox['y'] + bbox['height'])
+                annotation.append(ET.fromstring(VOC_OBJECT_TEMPLATE.format(
+                    name=escape(bbox.get('class', 'Class 1')),
+                    xmin=bbox['x'], ymin=bbox['y'],
+                    xmax=bbox['x'] + bbox['width'], ymax=bbox['y'] + bbox['height'])))
             
             # Add polygons as objects (using bounding box)
             for polygon in annotations.get('polygons', []):
-                points = polygon['points']
-                xs = [p[0] for p in points]
-                ys = [p[1] for p in points]
-                
-                obj = ET.SubElement(annotation, 'object')
-                
-                name = ET.SubElement(obj, 'name')
-                name.text = polygon.get('class', 'Class 1')
-                
-                pose = ET.SubElement(obj, 'pose')
-                pose.text = 'Unspecified'
-                
-                truncated = ET.SubElement(obj, 'truncated')
-                truncated.text = '0'
-                
-                difficult = ET.SubElement(obj, 'difficult')
-                difficult.text = '0'
-                
-                bndbox = ET.SubElement(obj, 'bndbox')
-                xmin = ET.SubElement(bndbox, 'xmin')
-                xmin.text = str(int(min(xs)))
-                ymin = ET.SubElement(bndbox, 'ymin')
-                ymin.text = str(int(min(ys)))
-                xmax = ET.SubElement(bndbox, 'xmax')
-                xmax.text = str(int(max(xs)))
-                ymax = ET.SubElement(bndbox, 'ymax')
-                ymax.text = str(int(max(ys)))
+                x_min, y_min, x_max, y_max = _poly_bbox(_points_array(polygon))
+                annotation.append(ET.fromstring(VOC_OBJECT_TEMPLATE.format(
+                    name=escape(polygon.get('class', 'Class 1')),
+                    xmin=int(x_min), ymin=int(y_min), xmax=int(x_max), ymax=int(y_max))))
             
             # Pretty print XML
             xml_str = minidom.parseString(ET.tostring(annotation)).toprettyxml(indent="  ")
@@ -259,8 +266,7 @@ class ExportFormatter:
         # Save classes.txt
         classes_file = os.path.join(output_folder, "classes.txt")
         with open(classes_file, 'w') as f:
-            for class_name in class_names:
-                f.write(f"{class_name}\n")
+            f.write(''.join(f"{class_name}\n" for class_name in class_names))
         
         exported_files = []
         
@@ -273,39 +279,39 @@ class ExportFormatter:
             label_filename = os.path.splitext(image_filename)[0] + '.txt'
             label_path = os.path.join(labels_folder, label_filename)
             
-            with open(label_path, 'w') as f:
-                # Process bboxes
-                for bbox in annotations.get('bboxes', []):
-                    class_name = bbox.get('class', 'Class 1')
-                    class_id = class_to_id.get(class_name, 0)
-                    
-                    # Convert to YOLO format (normalized center coordinates)
-                    x_center = (bbox['x'] + bbox['width'] / 2) / img_width
-                    y_center = (bbox['y'] + bbox['height'] / 2) / img_height
-                    width = bbox['width'] / img_width
-                    height = bbox['height'] / img_height
-                    
-                    f.write(f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n")
+            # Collect all label lines, then write them in one call
+            lines = []
+            
+            # Process bboxes
+            for bbox in annotations.get('bboxes', []):
+                class_name = bbox.get('class', 'Class 1')
+                class_id = class_to_id.get(class_name, 0)
+                
+                # Convert to YOLO format (normalized center coordinates)
+                x_center = (bbox['x'] + bbox['width'] / 2) / img_width
+                y_center = (bbox['y'] + bbox['height'] / 2) / img_height
+                width = bbox['width'] / img_width
+                height = bbox['height'] / img_height
+                
+                lines.append(f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n")
+            
+            # Process polygons (convert to bounding box)
+            for polygon in annotations.get('polygons', []):
+                class_name = polygon.get('class', 'Class 1')
+                class_id = class_to_id.get(class_name, 0)
+                
+                x_min, y_min, x_max, y_max = _poly_bbox(_points_array(polygon))
                 
-                # Process polygons (convert to bounding box)
-                for polygon in annotations.get('polygons', []):
-                    class_name = polygon.get('class', 'Class 1')
-                    class_id = class_to_id.get(class_name, 0)
-                    
-                    points = polygon['points']
-                    xs = [p[0] for p in points]
-                    ys = [p[1] for p in points]
-                    
-                    x_min, x_max = min(xs), max(xs)
-                    y_min, y_max = min(ys), max(ys)
-                    
-                    # Convert to YOLO format
-                    x_center = ((x_min + x_max) / 2) / img_width
-                    y_center = ((y_min + y_max) / 2) / img_height
-                    width = (x_max - x_min) / img_width
-                    height = (y_max - y_min) / img_height
-                    
-                    f.write(f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n")
+                # Convert to YOLO format
+                x_center = ((x_min + x_max) / 2) / img_width
+                y_center = ((y_min + y_max) / 2) / img_height
+                width = (x_max - x_min) / img_width
+                height = (y_max - y_min) / img_height
+                
+                lines.append(f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n")
+            
+            with open(label_path, 'w', buffering=1 << 20) as f:
+                f.write(''.join(lines))
             
             exported_files.append(label_path)
         
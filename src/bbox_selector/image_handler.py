@@ -3,6 +3,8 @@ Image Handler Module
 Manages image loading, navigation, and display operations
 """
 import os
+import queue
+import threading
 from tkinter import filedialog, messagebox
 from PIL import Image, ImageTk
 
@@ -12,18 +14,79 @@ try:
 except ImportError:
     DND_AVAILABLE = False
 
+# Supported image file extensions (lowercase)
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.gif')
+
 
 class ImageHandler:
     """Handles image loading and navigation"""
     
     def __init__(self, app):
         self.app = app
+        self._prefetch_lock = threading.Lock()
+        self._prefetching = set()
+        # Low-priority prefetch requests, drained by one dedicated worker
+        self._prefetch_queue = queue.Queue(maxsize=4)
+        threading.Thread(target=self._prefetch_worker, name='img-prefetch', daemon=True).start()
+        self._listed_images = None  # images list currently shown in the listbox
+        self._probe_generation = 0  # bumped per folder/drop load so stale probes are ignored
         self._setup_drag_drop()
         
     def is_image_file(self, filepath):
         """Check if file is a supported image format"""
-        ext = os.path.splitext(filepath)[1].lower()
-        return ext in ['.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.gif']
+        return filepath.lower().endswith(IMAGE_EXTENSIONS)
+    
+    def _scan_folder(self, folder):
+        """Return sorted paths of image files directly inside a folder"""
+        with os.scandir(folder) as entries:
+            return sorted(entry.path for entry in entries
+                          if self.is_image_file(entry.name) and entry.is_file())
+    
+    def _image_dims(self, img_or_path):
+        """Return (width, height) of an open image, or of a file by reading only its header"""
+        if isinstance(img_or_path, str):
+            with Image.open(img_or_path) as im:
+                return im.size
+        return img_or_path.size
+    
+    def _probe_image(self, path):
+        """Validate an image by parsing its header only; return (path, error or None)"""
+        try:
+            with Image.open(path):
+                pass
+        except Exception as e:
+            return path, e
+        return path, None
+    
+    def _probe_images(self, paths, on_done):
+        """Validate candidate image paths on the I/O pool, then call on_done(valid_paths) on the UI thread"""
+        self._probe_generation += 1
+        generation = self._probe_generation
+        futures = [self.app.io_pool.submit(self._probe_image, path) for path in paths]
+        self._poll_probes(generation, futures, on_done)
+    
+    def _poll_probes(self, generation, futures, on_done):
+        """Report probe progress every 50 ms and finish once every probe is done"""
+        if generation != self._probe_generation:
+            # A newer folder or drop replaced this one
+            for future in futures:
+                future.cancel()
+            return
+        
+        done = sum(future.done() for future in futures)
+        if done < len(futures):
+            self.app.update_status(f"Checking images... {done}/{len(futures)}")
+            self.app.root.after(50, self._poll_probes, generation, futures, on_done)
+            return
+        
+        valid_paths = []
+        for future in futures:
+            path, error = future.result()
+            if error is None:
+                valid_paths.append(path)
+            else:
+                messagebox.showerror("Error", f"Failed to load {path}: {error}")
+        on_done(valid_paths)
     
     def load_image(self):
         """Load a single image file"""
@@ -36,17 +99,21 @@ class ImageHandler:
             try:
                 self.app.image = Image.open(filepath)
                 self.app.image_path = filepath
+                self.app.image_basename = os.path.basename(filepath)
                 self.app.images = [(filepath, self.app.image)]
                 self.app.current_image_index = 0
-                self.app.bboxes = []
-                self.app.polygons = []
+                self.app.bboxes = {}
+                self.app.bbox_xywh = None
+                self.app.polygons = {}
                 self.app.bbox_counter = 0
                 self.app.polygon_counter = 0
+                self.app.shapes_dirty = True
                 self.app.zoom_level = 1.0
                 self.app.zoom_label.config(text="100%")
                 self.app.display_image_on_canvas()
                 self.app.update_image_list()
-                self.app.update_status(f"Loaded: {os.path.basename(filepath)} | Size: {self.app.image.size[0]}x{self.app.image.size[1]}")
+                width, height = self._image_dims(self.app.image)
+                self.app.update_status(f"Loaded: {self.app.image_basename} | Size: {width}x{height}")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load image: {e}")
     
@@ -54,63 +121,137 @@ class ImageHandler:
         """Load all images from a folder"""
         folder = filedialog.askdirectory(title="Select Folder")
         if folder:
-            self.app.images = []
-            for file in os.listdir(folder):
-                path = os.path.join(folder, file)
-                if os.path.isfile(path) and self.is_image_file(path):
-                    try:
-                        img = Image.open(path)
-                        self.app.images.append((path, img))
-                    except Exception as e:
-                        messagebox.showerror("Error", f"Failed to load {path}: {e}")
-            if not self.app.images:
-                messagebox.showwarning("Warning", "No valid images found in folder.")
-                self.app.update_status("No images found")
-                return
-            else:
-                self.app.update_status(f"Loaded {len(self.app.images)} image(s) from folder")
-                self.app.update_image_list()
-                self.app.current_image_index = 0
-                self.load_current_image()
+            self._probe_images(self._scan_folder(folder), self._on_folder_probed)
+    
+    def _on_folder_probed(self, valid_paths):
+        """Show the images of a folder once they have been validated"""
+        if not valid_paths:
+            messagebox.showwarning("Warning", "No valid images found in folder.")
+            self.app.update_status("No images found")
+            return
+        else:
+            self.app.images = [(path, None) for path in valid_paths]
+            self.app.update_status(f"Loaded {len(self.app.images)} image(s) from folder")
+            self.app.update_image_list()
+            self.app.current_image_index = 0
+            self.load_current_image()
     
     def load_current_image(self):
         """Load the currently selected image from the images list"""
         if not self.app.images or self.app.current_image_index >= len(self.app.images):
             return
-        
+        if self._switch_image_model():
+            self._render_current_image()
+    
+    def _switch_image_model(self):
+        """Make the current index the active image and restore its shapes; return False on error"""
         # Save current annotations before switching
         self.app.shape_manager.save_current_annotations()
         
         path, img = self.app.images[self.app.current_image_index]
+        if img is None:
+            # Images are opened lazily on first display
+            try:
+                img = Image.open(path)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to load {path}: {e}")
+                return False
+            with self._prefetch_lock:
+                self.app.images[self.app.current_image_index] = (path, img)
         self.app.image = img
         self.app.image_path = path
+        self.app.image_basename = os.path.basename(path)
         
         # Load saved annotations for this image, or initialize empty
         if path in self.app.image_annotations:
             saved = self.app.image_annotations[path]
-            self.app.bboxes = saved['bboxes'].copy()
-            self.app.polygons = saved['polygons'].copy()
+            self.app.bboxes = saved['bboxes']
+            self.app.polygons = saved['polygons']
             self.app.bbox_counter = saved['bbox_counter']
             self.app.polygon_counter = saved['polygon_counter']
         else:
-            self.app.bboxes = []
-            self.app.polygons = []
+            self.app.bboxes = {}
+            self.app.polygons = {}
             self.app.bbox_counter = 0
             self.app.polygon_counter = 0
+        self.app.bbox_xywh = None
+        # The restored shapes match image_annotations until the next edit
+        self.app.shapes_dirty = False
         
         self.app.selected_bbox = None
         self.app.selected_polygon = None
+        return True
+    
+    def _render_current_image(self):
+        """Display the active image at 100% zoom and warm up its neighbours"""
         self.app.zoom_level = 1.0
         self.app.zoom_label.config(text="100%")
         self.app.display_image_on_canvas()
-        self.app.update_status(f"Image {self.app.current_image_index + 1}/{len(self.app.images)}: {os.path.basename(path)} | Size: {self.app.image.size[0]}x{self.app.image.size[1]}")
+        width, height = self._image_dims(self.app.image)
+        self.app.update_status(f"Image {self.app.current_image_index + 1}/{len(self.app.images)}: {self.app.image_basename} | Size: {width}x{height}")
+        self._schedule_prefetch()
+    
+    def _schedule_prefetch(self):
+        """Decode the previous and next images in the background"""
+        images = self.app.images
+        count = len(images)
+        if count < 2:
+            return
+        
+        for idx in {(self.app.current_image_index + 1) % count, (self.app.current_image_index - 1) % count}:
+            path, img = images[idx]
+            with self._prefetch_lock:
+                if img is not None or path in self._prefetching:
+                    continue
+                self._prefetching.add(path)
+            try:
+                self._prefetch_queue.put_nowait((images, idx, path))
+            except queue.Full:
+                # Prefetch is best-effort; drop the request when the worker is behind
+                with self._prefetch_lock:
+                    self._prefetching.discard(path)
+    
+    def _prefetch_worker(self):
+        """Process prefetch requests until stopped"""
+        while True:
+            request = self._prefetch_queue.get()
+            if request is None:
+                return
+            self._prefetch(*request)
+    
+    def stop_prefetch(self):
+        """Ask the prefetch worker to exit"""
+        try:
+            self._prefetch_queue.put_nowait(None)
+        except queue.Full:
+            # The worker is a daemon thread and ends with the interpreter anyway
+            pass
+    
+    def _prefetch(self, images, idx, path):
+        """Load one image off the UI thread and store it if its slot is still empty"""
+        try:
+            img = Image.open(path)
+            img.load()
+        except Exception:
+            # Errors are reported when the image is actually displayed
+            img = None
+        
+        with self._prefetch_lock:
+            self._prefetching.discard(path)
+            if img is not None and images[idx][0] == path and images[idx][1] is None:
+                images[idx] = (path, img)
     
     def update_image_list(self):
         """Update the image list in side panel"""
-        self.app.image_listbox.delete(0, 'end')
-        for i, (path, img) in enumerate(self.app.images):
-            filename = os.path.basename(path)
-            self.app.image_listbox.insert('end', f"{i+1}. {filename}")
+        listbox = self.app.image_listbox
+        if self.app.images is not self._listed_images or listbox.size() != len(self.app.images):
+            # A new image list was loaded: replace the rows in one list assignment
+            self.app.image_list_var.set(tuple(f"{i+1}. {os.path.basename(path)}"
+                                              for i, (path, img) in enumerate(self.app.images)))
+            self._listed_images = self.app.images
+        else:
+            # Same list: only the selection needs to move
+            listbox.selection_clear(0, 'end')
         
         if self.app.images:
             self.app.image_listbox.selection_set(self.app.current_image_index)
@@ -138,7 +279,9 @@ class ImageHandler:
         self.app.image_listbox.see(self.app.current_image_index)
         self.app.image_counter_label.config(
             text=f"{self.app.current_image_index + 1} / {len(self.app.images)}")
-        self.load_current_image()
+        # Only the listbox selection moved; the rows themselves are left alone
+        if self._switch_image_model():
+            self._render_current_image()
     
     def next_image(self):
         """Show next image"""
@@ -150,7 +293,9 @@ class ImageHandler:
         self.app.image_listbox.see(self.app.current_image_index)
         self.app.image_counter_label.config(
             text=f"{self.app.current_image_index + 1} / {len(self.app.images)}")
-        self.load_current_image()
+        # Only the listbox selection moved; the rows themselves are left alone
+        if self._switch_image_model():
+            self._render_current_image()
     
     def _setup_drag_drop(self):
         """Setup drag and drop functionality"""
@@ -180,7 +325,8 @@ class ImageHandler:
         """Reset visual feedback when leaving canvas"""
         self.app.canvas.config(bg="#1e1e1e")
         if self.app.image:
-            self.app.update_status(f"Image: {os.path.basename(self.app.image_path)} | Size: {self.app.image.size[0]}x{self.app.image.size[1]}")
+            width, height = self._image_dims(self.app.image)
+            self.app.update_status(f"Image: {self.app.image_basename} | Size: {width}x{height}")
         else:
             self.app.update_status("Ready | Load an image to start")
     
@@ -194,33 +340,26 @@ class ImageHandler:
         if not files:
             return
         
-        # Process dropped items
-        self.app.images = []
-        
+        # Collect candidate image paths from dropped items
+        candidates = []
         for item in files:
             if os.path.isfile(item):
                 # Single file dropped
                 if self.is_image_file(item):
-                    try:
-                        img = Image.open(item)
-                        self.app.images.append((item, img))
-                    except Exception as e:
-                        messagebox.showerror("Error", f"Failed to load {item}: {e}")
+                    candidates.append(item)
             elif os.path.isdir(item):
                 # Folder dropped
-                for file in os.listdir(item):
-                    path = os.path.join(item, file)
-                    if os.path.isfile(path) and self.is_image_file(path):
-                        try:
-                            img = Image.open(path)
-                            self.app.images.append((path, img))
-                        except Exception as e:
-                            messagebox.showerror("Error", f"Failed to load {path}: {e}")
+                candidates.extend(self._scan_folder(item))
         
-        if not self.app.images:
+        self._probe_images(candidates, self._on_drop_probed)
+    
+    def _on_drop_probed(self, valid_paths):
+        """Show dropped images once they have been validated"""
+        if not valid_paths:
             messagebox.showwarning("Warning", "No valid images found in dropped items.")
             self.app.update_status("No images found")
         else:
+            self.app.images = [(path, None) for path in valid_paths]
             self.app.update_status(f"Loaded {len(self.app.images)} image(s) via drag & drop")
             self.app.update_image_list()
             self.app.current_image_index = 0
@@ -2,6 +2,15 @@
 Mouse Handler Module
 Manages mouse events for bbox and polygon interactions
 """
+import numpy as np
+
+# Multipliers applied to the drag delta (dx, dy, dx, dy) for x, y, width and height per resize handle
+HANDLE_DELTAS = {
+    'nw': (1, 1, -1, -1),
+    'ne': (0, 1, 1, -1),
+    'sw': (1, 0, -1, 1),
+    'se': (0, 0, 1, 1),
+}
 
 
 class MouseHandler:
@@ -9,6 +18,10 @@ class MouseHandler:
     
     def __init__(self, app):
         self.app = app
+        self._hover_redraw_after = None
+        self._drag_redraw_after = None
+        self._drag_deltas = None
+        self._drag_limits = None
         
     def bind_events(self):
         """Bind all mouse events to canvas"""
@@ -18,6 +31,7 @@ class MouseHandler:
         self.app.canvas.bind("<B1-Motion>", self.on_drag)
         self.app.canvas.bind("<ButtonRelease-1>", self.on_release)
         self.app.canvas.bind("<Double-Button-1>", self.on_double_click)
+        self.app.canvas.bind("<Configure>", self.app.canvas_handler.on_canvas_resize)
         self.app.canvas.focus_set()
         
         # Bind mouse wheel for scrolling and zoom
@@ -29,16 +43,21 @@ class MouseHandler:
         self.app.canvas.bind("<Button-2>", self.app.canvas_handler.on_pan_start)
         self.app.canvas.bind("<B2-Motion>", self.app.canvas_handler.on_pan_motion)
         
+    def _event_to_image(self, event):
+        """Return (canvas_x, canvas_y, image_x, image_y) for a mouse event"""
+        canvas_x = self.app.canvas.canvasx(event.x)
+        canvas_y = self.app.canvas.canvasy(event.y)
+        image_x = int((canvas_x - self.app.image_offset_x) * self.app.inv_zoom)
+        image_y = int((canvas_y - self.app.image_offset_y) * self.app.inv_zoom)
+        return canvas_x, canvas_y, image_x, image_y
+    
     def on_canvas_click(self, event):
         """Handle left click on canvas"""
         if not self.app.image:
             return
         
         # Get click position in image coordinates
-        canvas_x = self.app.canvas.canvasx(event.x)
-        canvas_y = self.app.canvas.canvasy(event.y)
-        image_x = int((canvas_x - self.app.image_offset_x) / self.app.zoom_level)
-        image_y = int((canvas_y - self.app.image_offset_y) / self.app.zoom_level)
+        canvas_x, canvas_y, image_x, image_y = self._event_to_image(event)
         
         # Check if click is within image bounds
         if image_x < 0 or image_y < 0 or image_x >= self.app.image.width or image_y >= self.app.image.height:
@@ -47,7 +66,7 @@ class MouseHandler:
         # Polygon mode
         if self.app.custom_select_mode.get():
             self.app.polygon_points.append((image_x, image_y))
-            self.app.canvas_handler.display_image_on_canvas(preserve_view=True)
+            self.app.canvas_handler.redraw_overlays()
             self.app.update_status(f"Point {len(self.app.polygon_points)} added | Right-click to complete polygon")
             return
         
@@ -56,16 +75,19 @@ class MouseHandler:
         clicked_polygon = self._get_polygon_at_position(canvas_x, canvas_y)
         
         if clicked_bbox:
-            self.app.selected_bbox = clicked_bbox
-            self.app.selected_polygon = None
-            self.app.canvas_handler.display_image_on_canvas(preserve_view=True)
+            # Redraw only if the selection actually changed
+            if clicked_bbox is not self.app.selected_bbox or self.app.selected_polygon is not None:
+                self.app.selected_bbox = clicked_bbox
+                self.app.selected_polygon = None
+                self.app.canvas_handler.redraw_overlays()
             self.app.update_status(f"Selected bbox #{clicked_bbox['id']} | Size: {clicked_bbox['width']}x{clicked_bbox['height']}")
             return
         
         if clicked_polygon:
-            self.app.selected_polygon = clicked_polygon
-            self.app.selected_bbox = None
-            self.app.canvas_handler.display_image_on_canvas(preserve_view=True)
+            if clicked_polygon is not self.app.selected_polygon or self.app.selected_bbox is not None:
+                self.app.selected_polygon = clicked_polygon
+                self.app.selected_bbox = None
+                self.app.canvas_handler.redraw_overlays()
             self.app.update_status(f"Selected polygon #{clicked_polygon['id']}")
             return
         
@@ -95,9 +117,11 @@ class MouseHandler:
         if bbox['y'] + bbox['height'] > self.app.image.height:
             bbox['y'] = self.app.image.height - bbox['height']
         
-        self.app.bboxes.append(bbox)
+        self.app.bboxes[bbox['id']] = bbox
+        self.app.bbox_xywh = None
+        self.app.shapes_dirty = True
         self.app.selected_bbox = bbox
-        self.app.canvas_handler.display_image_on_canvas(preserve_view=True)
+        self.app.canvas_handler.redraw_overlays()
         self.app.update_status(f"BBox #{bbox['id']} created at ({bbox['x']}, {bbox['y']}) | Total: {len(self.app.bboxes)} bboxes")
     
     def on_right_click(self, event):
@@ -110,97 +134,117 @@ class MouseHandler:
         if not self.app.image or self.app.dragging:
             return
         
-        canvas_x = self.app.canvas.canvasx(event.x)
-        canvas_y = self.app.canvas.canvasy(event.y)
-        image_x = int((canvas_x - self.app.image_offset_x) / self.app.zoom_level)
-        image_y = int((canvas_y - self.app.image_offset_y) / self.app.zoom_level)
+        canvas_x, canvas_y, image_x, image_y = self._event_to_image(event)
         
         # Check for bbox hover
         hovered = self._get_bbox_at_position(image_x, image_y)
-        if hovered != self.app.hovered_bbox:
+        if hovered is not self.app.hovered_bbox:
             self.app.hovered_bbox = hovered
-            self.app.canvas_handler.display_image_on_canvas(preserve_view=True)
+            # Coalesce hover changes into one redraw
+            if self._hover_redraw_after:
+                self.app.canvas.after_cancel(self._hover_redraw_after)
+            self._hover_redraw_after = self.app.canvas.after(30, self._flush_hover_redraw)
+    
+    def _flush_hover_redraw(self):
+        """Restyle bbox outlines for the latest hover state"""
+        self._hover_redraw_after = None
+        self.app.canvas_handler.update_hover()
     
     def on_drag(self, event):
         """Handle dragging for bbox resize"""
         if not self.app.selected_bbox or not self.app.image:
             return
         
-        canvas_x = self.app.canvas.canvasx(event.x)
-        canvas_y = self.app.canvas.canvasy(event.y)
-        image_x = int((canvas_x - self.app.image_offset_x) / self.app.zoom_level)
-        image_y = int((canvas_y - self.app.image_offset_y) / self.app.zoom_level)
+        canvas_x, canvas_y, image_x, image_y = self._event_to_image(event)
         
         if not self.app.dragging:
             # Check if starting drag on handle
             self.app.drag_handle = self._get_handle_at_position(canvas_x, canvas_y)
             if self.app.drag_handle:
                 self.app.dragging = True
+                self.app.drag_preview_mode = True
                 self.app.drag_start_x = image_x
                 self.app.drag_start_y = image_y
+                # Resolve the handle and image bounds once per drag
+                self._drag_deltas = HANDLE_DELTAS[self.app.drag_handle.split('_')[1]]
+                self._drag_limits = self.app.image.size
         
         if self.app.dragging and self.app.drag_handle:
             bbox = self.app.selected_bbox
             dx = image_x - self.app.drag_start_x
             dy = image_y - self.app.drag_start_y
+            kx, ky, kw, kh = self._drag_deltas
+            img_width, img_height = self._drag_limits
             
-            # Resize based on handle
-            if 'nw' in self.app.drag_handle:
-                bbox['x'] += dx
-                bbox['y'] += dy
-                bbox['width'] -= dx
-                bbox['height'] -= dy
-            elif 'ne' in self.app.drag_handle:
-                bbox['y'] += dy
-                bbox['width'] += dx
-                bbox['height'] -= dy
-            elif 'sw' in self.app.drag_handle:
-                bbox['x'] += dx
-                bbox['width'] -= dx
-                bbox['height'] += dy
-            elif 'se' in self.app.drag_handle:
-                bbox['width'] += dx
-                bbox['height'] += dy
-            
-            # Ensure minimum size
-            bbox['width'] = max(10, bbox['width'])
-            bbox['height'] = max(10, bbox['height'])
-            
-            # Keep within image bounds
-            bbox['x'] = max(0, min(bbox['x'], self.app.image.width - bbox['width']))
-            bbox['y'] = max(0, min(bbox['y'], self.app.image.height - bbox['height']))
+            # Resize based on handle, keeping a minimum size and staying within image bounds
+            width = max(10, bbox['width'] + kw * dx)
+            height = max(10, bbox['height'] + kh * dy)
+            bbox['x'] = max(0, min(bbox['x'] + kx * dx, img_width - width))
+            bbox['y'] = max(0, min(bbox['y'] + ky * dy, img_height - height))
+            bbox['width'] = width
+            bbox['height'] = height
             
             self.app.drag_start_x = image_x
             self.app.drag_start_y = image_y
-            self.app.canvas_handler.display_image_on_canvas(preserve_view=True)
+            self.app.bbox_xywh = None
+            self.app.shapes_dirty = True
+            
+            # Coalesce motion events within one frame into a single canvas update
+            if self._drag_redraw_after is None:
+                self._drag_redraw_after = self.app.canvas.after(16, self._flush_drag_redraw)
+    
+    def _flush_drag_redraw(self):
+        """Update the canvas for the latest size of the bbox being resized"""
+        self._drag_redraw_after = None
+        bbox = self.app.selected_bbox
+        if not bbox:
+            return
+        
+        # Move the existing items; fall back to redrawing the shapes if they are not on the canvas
+        if not self.app.canvas_handler.move_bbox_items(bbox):
+            self.app.canvas_handler.redraw_overlays()
     
     def on_release(self, event):
         """Handle mouse button release"""
+        if self._drag_redraw_after:
+            self.app.canvas.after_cancel(self._drag_redraw_after)
+            self._flush_drag_redraw()
+        if self.app.drag_preview_mode:
+            self.app.canvas_handler.end_drag_preview()
         self.app.dragging = False
         self.app.drag_handle = None
     
     def on_double_click(self, event):
         """Handle double click - deselect"""
-        self.app.selected_bbox = None
-        self.app.selected_polygon = None
-        self.app.canvas_handler.display_image_on_canvas(preserve_view=True)
+        if self.app.selected_bbox is not None or self.app.selected_polygon is not None:
+            self.app.selected_bbox = None
+            self.app.selected_polygon = None
+            self.app.canvas_handler.redraw_overlays()
         self.app.update_status("Deselected all shapes")
     
     def _get_bbox_at_position(self, x, y):
-        """Get bbox at given position"""
-        for bbox in reversed(self.app.bboxes):
-            if (bbox['x'] <= x <= bbox['x'] + bbox['width'] and
-                bbox['y'] <= y <= bbox['y'] + bbox['height']):
-                return bbox
-        return None
+        """Get topmost bbox at given position"""
+        arr = self.app.bbox_xywh
+        if arr is None:
+            # Rebuild the geometry array after bboxes were added, resized or removed
+            arr = np.array([(b['id'], b['x'], b['y'], b['width'], b['height']) for b in self.app.bboxes.values()],
+                           dtype=np.int32).reshape(-1, 5)
+            self.app.bbox_xywh = arr
+        
+        mask = (arr[:, 1] <= x) & (x <= arr[:, 1] + arr[:, 3]) & (arr[:, 2] <= y) & (y <= arr[:, 2] + arr[:, 4])
+        idxs = np.flatnonzero(mask)
+        return self.app.bboxes[int(arr[idxs[-1], 0])] if idxs.size else None
     
     def _get_polygon_at_position(self, canvas_x, canvas_y):
         """Get polygon at given canvas position"""
-        for polygon in reversed(self.app.polygons):
-            items = self.app.canvas.find_overlapping(canvas_x-2, canvas_y-2, canvas_x+2, canvas_y+2)
-            for item in items:
-                tags = self.app.canvas.gettags(item)
-                if f"polygon_{polygon['id']}" in tags:
+        # Query the canvas once and collect the tags of everything under the cursor
+        hit_tags = set()
+        for item in self.app.canvas.find_overlapping(canvas_x-2, canvas_y-2, canvas_x+2, canvas_y+2):
+            hit_tags.update(self.app.canvas.gettags(item))
+        
+        if hit_tags:
+            for polygon in reversed(self.app.polygons.values()):
+                if f"polygon_{polygon['id']}" in hit_tags:
                     return polygon
         return None
     
@@ -209,10 +253,8 @@ class MouseHandler:
         if not self.app.selected_bbox:
             return None
         
-        items = self.app.canvas.find_overlapping(canvas_x-5, canvas_y-5, canvas_x+5, canvas_y+5)
-        for item in items:
-            tags = self.app.canvas.gettags(item)
-            for tag in tags:
-                if tag.startswith('handle_'):
-                    return tag
+        # Point-in-rect test against the cached handle rectangles, with a 5px tolerance
+        for tag, (x0, y0, x1, y1) in self.app.handle_rects.items():
+            if x0 - 5 <= canvas_x <= x1 + 5 and y0 - 5 <= canvas_y <= y1 + 5:
+                return tag
         return None
@@ -4,8 +4,93 @@ Handles bbox and polygon creation, editing, and export operations
 """
 import os
 import json
+import hashlib
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageDraw
+import cv2
+import numpy as np
+from numpy import asarray as _to_array  # zero-copy view of PIL pixel data
+from PIL import Image
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import pyvips
+    PYVIPS_AVAILABLE = True
+except ImportError:
+    PYVIPS_AVAILABLE = False
+
+# Formats libvips can decode region-by-region, so small crops avoid a full decode
+VIPS_CROP_EXTENSIONS = ('.jpg', '.jpeg', '.tif', '.tiff')
+
+# Number of shapes serialized per write when streaming annotation JSON
+JSON_WRITE_BATCH = 100
+
+# PIL modes whose pixel arrays can be sliced and re-encoded as PNG directly
+ARRAY_CROP_MODES = ('RGB', 'RGBA', 'L')
+
+# Images exported at once by save_all_shapes; each holds its full-resolution decode
+EXPORT_IMAGES_IN_FLIGHT = 2
+
+# Interval between progress checks while save_all_shapes runs
+EXPORT_POLL_MS = 50
+
+# Failed files listed by report_export_errors; the rest are only counted
+MAX_REPORTED_ERRORS = 50
+
+
+def _dumps_indented(obj):
+    """Serialize obj as 2-space indented JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode('utf-8')
+
+
+def _crop_array(img):
+    """Return the pixels of an image as an array to slice bbox crops from, or None for other modes"""
+    # Other modes (P, LA, I;16, ...) are cropped with PIL so the crops keep their mode
+    if img.mode not in ARRAY_CROP_MODES:
+        return None
+    return _to_array(img)
+
+
+def _crop_pixels(img, arr, x, y, w, h):
+    """Return a bbox crop as a slice of the image array when possible, otherwise as a PIL crop"""
+    if arr is not None and x >= 0 and y >= 0 and x + w <= img.width and y + h <= img.height:
+        return arr[y:y + h, x:x + w]
+    # PIL pads crops that extend past the image edge
+    return img.crop((x, y, x + w, y + h))
+
+
+def _crop_image(img, arr, x, y, w, h):
+    """Return a bbox crop as a PIL image"""
+    crop = _crop_pixels(img, arr, x, y, w, h)
+    return crop if isinstance(crop, Image.Image) else Image.fromarray(crop)
+
+
+def report_export_errors(errors):
+    """Show the (filename, error) pairs collected by export_bboxes or save_all_shapes in one dialog"""
+    if not errors:
+        return
+    message = "\n".join(f"{name}: {error}" for name, error in errors[:MAX_REPORTED_ERRORS])
+    if len(errors) > MAX_REPORTED_ERRORS:
+        message += f"\n(+ {len(errors) - MAX_REPORTED_ERRORS} more)"
+    messagebox.showerror("Export Errors", f"Failed to export {len(errors)} file(s):\n\n{message}")
+
+
+def _encode_png(crop, filepath, compress_level):
+    """Write a pixel array or PIL image as PNG (runs in an encoder process)"""
+    if isinstance(crop, np.ndarray):
+        crop = Image.fromarray(crop)
+    crop.save(filepath, format='PNG', compress_level=compress_level)
 
 
 class ShapeManager:
@@ -13,18 +98,25 @@ class ShapeManager:
     
     def __init__(self, app):
         self.app = app
+        self._export_running = False
         
     def save_current_annotations(self):
         """Save current image annotations before switching"""
+        if not self.app.shapes_dirty and self.app.image_path in self.app.image_annotations:
+            # Nothing was edited since the annotations were last stored
+            return
         if self.app.image_path:
+            # The shape dicts are stored by reference: each image owns its own dicts,
+            # which are only ever replaced, never shared between images
             self.app.image_annotations[self.app.image_path] = {
-                'bboxes': self.app.bboxes.copy(),
-                'polygons': self.app.polygons.copy(),
+                'bboxes': self.app.bboxes,
+                'polygons': self.app.polygons,
                 'bbox_counter': self.app.bbox_counter,
                 'polygon_counter': self.app.polygon_counter
             }
+            self.app.shapes_dirty = False
     
-    def validate_bbox_size(self, event=None):
+    def validate_bbox_size(self, event=None, show_error=True):
         """Validate bbox size inputs"""
         try:
             width = int(self.app.bbox_width_var.get())
@@ -34,7 +126,8 @@ class ShapeManager:
             self.app.bbox_width = width
             self.app.bbox_height = height
         except ValueError:
-            messagebox.showerror("Error", "BBox dimensions must be positive integers.")
+            if show_error:
+                messagebox.showerror("Error", "BBox dimensions must be positive integers.")
     
     def apply_size_to_selected(self):
         """Apply current size to selected bbox"""
@@ -45,18 +138,23 @@ class ShapeManager:
         self.validate_bbox_size()
         self.app.selected_bbox['width'] = self.app.bbox_width
         self.app.selected_bbox['height'] = self.app.bbox_height
+        self.app.bbox_xywh = None
+        self.app.shapes_dirty = True
         self.app.canvas_handler.display_image_on_canvas(preserve_view=True)
         self.app.update_status(f"Applied size {self.app.bbox_width}x{self.app.bbox_height} to bbox #{self.app.selected_bbox['id']}")
     
     def delete_selected_shape(self):
         """Delete the currently selected bbox or polygon"""
         if self.app.selected_bbox:
-            self.app.bboxes = [b for b in self.app.bboxes if b['id'] != self.app.selected_bbox['id']]
+            del self.app.bboxes[self.app.selected_bbox['id']]
+            self.app.bbox_xywh = None
+            self.app.shapes_dirty = True
             self.app.selected_bbox = None
             self.app.canvas_handler.display_image_on_canvas(preserve_view=True)
             self.app.update_status(f"Deleted bbox | Remaining: {len(self.app.bboxes)} bboxes, {len(self.app.polygons)} polygons")
         elif self.app.selected_polygon:
-            self.app.polygons = [p for p in self.app.polygons if p['id'] != self.app.selected_polygon['id']]
+            del self.app.polygons[self.app.selected_polygon['id']]
+            self.app.shapes_dirty = True
             self.app.selected_polygon = None
             self.app.canvas_handler.display_image_on_canvas(preserve_view=True)
             self.app.update_status(f"Deleted polygon | Remaining: {len(self.app.bboxes)} bboxes, {len(self.app.polygons)} polygons")
@@ -71,14 +169,18 @@ class ShapeManager:
         
         result = messagebox.askyesno("Confirm", f"Clear all {len(self.app.bboxes)} bboxes and {len(self.app.polygons)} polygons?")
         if result:
-            self.app.bboxes = []
+            self.app.bboxes = {}
+            self.app.bbox_xywh = None
             self.app.bbox_counter = 0
             self.app.selected_bbox = None
-            self.app.polygons = []
+            self.app.polygons = {}
             self.app.polygon_counter = 0
             self.app.selected_polygon = None
-            self.app.canvas_handler.display_image_on_canvas(preserve_view=True)
-            self.app.update_status(f"All shapes cleared | Image {self.app.current_image_index + 1}/{len(self.app.images)}: {os.path.basename(self.app.image_path) if self.app.image_path else 'No image'}")
+            self.app.hovered_bbox = None
+            self.app.shapes_dirty = True
+            # The image itself is unchanged, so only the shape overlays are redrawn
+            self.app.canvas_handler.redraw_overlays()
+            self.app.update_status(f"All shapes cleared | Image {self.app.current_image_index + 1}/{len(self.app.images)}: {self.app.image_basename if self.app.image_path else 'No image'}")
     
     def export_bboxes(self):
         """Export all bbox regions as separate images"""
@@ -94,25 +196,32 @@ class ShapeManager:
         if not folder:
             return
         
-        image_name = os.path.splitext(os.path.basename(self.app.image_path))[0]
+        image_name = os.path.splitext(self.app.image_basename)[0]
+        prefix = os.path.join(folder, image_name) + '_bbox_'
         exported = 0
+        errors = []
+        arr = _crop_array(self.app.image)
         
-        for bbox in self.app.bboxes:
+        for bbox in self.app.bboxes.values():
             x, y, w, h = bbox['x'], bbox['y'], bbox['width'], bbox['height']
-            cropped = self.app.image.crop((x, y, x + w, y + h))
-            filename = f"{image_name}_bbox_{bbox['id']}.png"
-            filepath = os.path.join(folder, filename)
+            cropped = _crop_image(self.app.image, arr, x, y, w, h)
+            filepath = f"{prefix}{bbox['id']}.png"
             try:
-                cropped.save(filepath)
+                cropped.save(filepath, format='PNG', compress_level=self.app.export_compress_level)
                 exported += 1
             except Exception as e:
-                messagebox.showerror("Error", f"Failed to save {filename}: {e}")
+                errors.append((os.path.basename(filepath), e))
+        report_export_errors(errors)
         
         messagebox.showinfo("Export Complete", f"Exported {exported} bboxes to:\n{folder}")
         self.app.update_status(f"Exported {exported} bboxes successfully")
     
     def save_all_shapes(self):
         """Save all shapes (bboxes and polygons) from all images as images and JSON with augmentation"""
+        if self._export_running:
+            messagebox.showwarning("Warning", "A save is already running.")
+            return
+        
         # Save current image annotations first
         self.save_current_annotations()
         
@@ -126,63 +235,222 @@ class ShapeManager:
             messagebox.showwarning("Warning", "No shapes to save across all images.")
             return
         
-        # Ask if user wants to apply augmentation
+        # Ask if user wants to apply augmentation; with only the original image enabled
+        # the augmentor is never called and every bbox takes the plain crop path
         augment_count = self.app.augmentor.get_augmentation_count()
-        if augment_count > 1:
-            result = messagebox.askyesno("Apply Augmentation?", 
-                                        f"Apply augmentation during export?\n\n"
-                                        f"Each bbox will generate {augment_count}x images.\n"
-                                        f"(Configure in 🎨 Augment settings)")
-            apply_augmentation = result
-        else:
-            apply_augmentation = False
+        apply_augmentation = augment_count > 1 and messagebox.askyesno(
+            "Apply Augmentation?",
+            f"Apply augmentation during export?\n\n"
+            f"Each bbox will generate {augment_count}x images.\n"
+            f"(Configure in 🎨 Augment settings)")
         
         folder = filedialog.askdirectory(title="Select Save Folder")
         if not folder:
             return
         
-        # Get export format
-        export_format = self.app.export_format.get()
+        # PNG encoding of crops runs in worker processes, outside the GIL
+        if self.app.encode_pool is None:
+            # Spawned rather than forked: this process runs Tk and worker threads
+            self.app.encode_pool = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                                       mp_context=multiprocessing.get_context('spawn'))
+        
+        # Shapes are copied here, on the UI thread, so editing can go on while the export runs
+        todo = deque(
+            (image_path,
+             [dict(bbox) for bbox in annotations['bboxes'].values()],
+             [dict(polygon) for polygon in annotations['polygons'].values()])
+            for image_path, annotations in self.app.image_annotations.items()
+            if annotations['bboxes'] or annotations['polygons']
+        )
+        export = {
+            'folder': folder,
+            'format': self.app.export_format.get(),
+            'augment': apply_augmentation,
+            'image_count': total_images_with_annotations,
+            'todo': todo,
+            'futures': [],  # (image path, future) in submission order
+            'encode_jobs': None,  # gathered once every image has been processed
+        }
+        self._export_running = True
+        self._poll_save_all(export)
+    
+    def _poll_save_all(self, export):
+        """Feed images to the I/O pool and report progress from the main loop until every file is written"""
+        futures = export['futures']
+        # Each running export holds a full-resolution decode, so only a few images run at once
+        running = sum(1 for _, future in futures if not future.done())
+        while running < EXPORT_IMAGES_IN_FLIGHT and export['todo']:
+            image_path, bboxes, polygons = export['todo'].popleft()
+            futures.append((image_path, self.app.io_pool.submit(
+                self._export_one_image, image_path, bboxes, polygons,
+                export['folder'], export['augment'], export['format'])))
+            running += 1
+        
+        if running or export['todo']:
+            self.app.update_status(f"Saving shapes... image {len(futures) - running}/{export['image_count']}")
+            self.app.root.after(EXPORT_POLL_MS, self._poll_save_all, export)
+            return
         
+        if export['encode_jobs'] is None:
+            export['encode_jobs'] = [job for _, future in futures if future.exception() is None
+                                     for job in future.result()[4]]
+        encode_jobs = export['encode_jobs']
+        done = sum(1 for _, _, _, future in encode_jobs if future.done())
+        if done < len(encode_jobs):
+            self.app.update_status(f"Saving shapes... encoding crops {done}/{len(encode_jobs)}")
+            self.app.root.after(EXPORT_POLL_MS, self._poll_save_all, export)
+            return
+        
+        self._export_running = False
+        self._finish_save_all(export)
+    
+    def _finish_save_all(self, export):
+        """Collect the export results on the main thread, write the format files and summarize"""
+        folder = export['folder']
+        export_format = export['format']
         total_bboxes = 0
         total_polygons = 0
         
         # Prepare data for format exporters
         images_data = {}
         
-        # Process each image with annotations
-        for image_path, annotations in self.app.image_annotations.items():
-            bboxes = annotations['bboxes']
-            polygons = annotations['polygons']
-            
-            if not bboxes and not polygons:
+        # Collect results in submission order so exporters see a stable image order; errors
+        # are shown and the export cache is updated here, on the UI thread
+        errors = []
+        for image_path, future in export['futures']:
+            try:
+                bbox_count, polygon_count, image_data, written, _, image_errors = future.result()
+            except Exception as e:
+                errors.append((os.path.basename(image_path), e))
                 continue
-            
-            # Load the image
+            errors.extend(image_errors)
+            self.app.export_cache.update(written)
+            total_bboxes += bbox_count
+            total_polygons += polygon_count
+            if image_data is not None:
+                images_data[image_path] = image_data
+        
+        # Only crops the encoder processes actually wrote are counted and cached
+        for kind, key, filepath, future in export['encode_jobs']:
             try:
-                img = Image.open(image_path)
+                future.result()
             except Exception as e:
-                messagebox.showerror("Error", f"Failed to load {image_path}: {e}")
+                errors.append((os.path.basename(filepath), e))
                 continue
+            self.app.export_cache[key] = filepath
+            if kind == 'bbox':
+                total_bboxes += 1
+            else:
+                total_polygons += 1
+        if any(isinstance(error, BrokenProcessPool) for _, error in errors):
+            # An encoder process died (e.g. out of memory on a large crop); the next export starts a new pool
+            self.app.encode_pool.shutdown(wait=False, cancel_futures=True)
+            self.app.encode_pool = None
+        report_export_errors(errors)
+        
+        # Export in selected format
+        format_output = None
+        if export_format == 'COCO':
+            format_output = self.app.export_formatter.export_coco(images_data, folder)
+            format_msg = f"COCO format: {format_output}"
+        elif export_format == 'VOC':
+            format_output = self.app.export_formatter.export_voc(images_data, folder)
+            format_msg = f"VOC format: {format_output}"
+        elif export_format == 'YOLO':
+            # Get unique class names in class order so YOLO class ids stay stable between exports
+            class_names = list(dict.fromkeys(cls['name'] for cls in self.app.classes))
+            format_output = self.app.export_formatter.export_yolo(images_data, folder, class_names)
+            format_msg = f"YOLO format: {format_output}"
+        else:
+            format_msg = "JSON format (individual files)"
+        
+        messagebox.showinfo("Save Complete", 
+                          f"Saved annotations from {export['image_count']} image(s):\n"
+                          f"- {total_bboxes} bboxes\n"
+                          f"- {total_polygons} polygons\n\n"
+                          f"Format: {export_format}\n"
+                          f"{format_msg}\n\n"
+                          f"Location: {folder}")
+        self.app.update_status(f"Saved {total_bboxes} bboxes and {total_polygons} polygons in {export_format} format")
+    
+    def _stream_write_json(self, path, header, bbox_iter, polygon_iter):
+        """Write an annotation file, serializing the shape lists in batches"""
+        with open(path, 'wb') as f:
+            # Header fields without the closing brace
+            f.write(_dumps_indented(header)[:-2])
+            for key, items in (("bboxes", bbox_iter), ("polygons", polygon_iter)):
+                f.write(b',\n  "' + key.encode() + b'": [')
+                items = iter(items)
+                wrote = False
+                while True:
+                    batch = list(islice(items, JSON_WRITE_BATCH))
+                    if not batch:
+                        break
+                    # Drop the batch's own brackets and nest it one level deeper
+                    chunk = _dumps_indented(batch)[2:-2].replace(b'\n', b'\n  ')
+                    f.write((b',\n  ' if wrote else b'\n  ') + chunk)
+                    wrote = True
+                f.write(b'\n  ]' if wrote else b']')
+            f.write(b'\n}')
+    
+    def _export_cache_key(self, image_path, image_mtime, kind, shape_id, geometry):
+        """Return the export cache key of a shape crop written at the current PNG level"""
+        key = f"{image_path}|{image_mtime}|{kind}|{shape_id}|{geometry}|{self.app.export_compress_level}"
+        return hashlib.sha1(key.encode()).hexdigest()
+    
+    def _export_one_image(self, image_path, bboxes, polygons, folder, apply_augmentation, export_format):
+        """Export the shapes of one image; return (bbox count, polygon count, image data, written, encode jobs, errors)"""
+        errors = []  # (file name, error) pairs, shown once every image is done
+        # (cache key, filepath) of crops written here; the export cache is only updated on the UI thread
+        written = []
+        
+        # Load the image
+        try:
+            img = Image.open(image_path)
+            image_mtime = os.path.getmtime(image_path)
+        except Exception as e:
+            return 0, 0, None, [], [], [(os.path.basename(image_path), e)]
+        
+        total_bboxes = 0
+        total_polygons = 0
+        
+        image_name = os.path.splitext(os.path.basename(image_path))[0]
+        # Output files share this prefix; joined once instead of per shape
+        base_path = os.path.join(folder, image_name)
+        
+        # Prepare JSON data for this image
+        json_header = {
+            "image": os.path.basename(image_path),
+            "image_width": img.width,
+            "image_height": img.height
+        }
+        # Augmented bbox entries are collected while their files are written
+        aug_json_bboxes = []
+        
+        # Plain bbox crops can be cut straight from the file with libvips
+        vips_img = None
+        if PYVIPS_AVAILABLE and not apply_augmentation and image_path.lower().endswith(VIPS_CROP_EXTENSIONS):
+            try:
+                vips_img = pyvips.Image.new_from_file(image_path, access='random')
+            except pyvips.Error:
+                vips_img = None
+        
+        arr = None  # pixel array, decoded on the first crop that needs it
+        encode_jobs = []  # (kind, cache key, filepath, future) of crops sent to the encoder processes
+        
+        # Export bboxes
+        for bbox in bboxes:
+            x, y, w, h = bbox['x'], bbox['y'], bbox['width'], bbox['height']
+            # Shapes always carry their class when created, so no defaults are needed
+            class_name, class_color = bbox['class'], bbox['class_color']
             
-            image_name = os.path.splitext(os.path.basename(image_path))[0]
-            
-            # Prepare JSON data for this image
-            json_data = {
-                "image": os.path.basename(image_path),
-                "image_width": img.width,
-                "image_height": img.height,
-                "bboxes": [],
-                "polygons": []
-            }
-            
-            # Export bboxes
-            for bbox in bboxes:
-                x, y, w, h = bbox['x'], bbox['y'], bbox['width'], bbox['height']
-                cropped = img.crop((x, y, x + w, y + h))
-                
-                # Apply augmentation if enabled
-                if apply_augmentation:
+            # Apply augmentation if enabled
+            if apply_augmentation:
+                filepath = f"{base_path}_bbox_{bbox['id']}.png"
+                try:
+                    if arr is None:
+                        arr = _crop_array(img)
+                    cropped = _crop_image(img, arr, x, y, w, h)
                     # Create a simple bbox for the cropped image (covers entire cropped area)
                     cropped_bbox = {
                         'id': bbox['id'],
@@ -190,64 +458,70 @@ class ShapeManager:
                         'y': 0,
                         'width': w,
                         'height': h,
-                        'class': bbox.get('class', 'Class 1'),
-                        'class_color': bbox.get('class_color', '#00ff00')
+                        'class': class_name,
+                        'class_color': class_color
                     }
                     
                     augmented_images = self.app.augmentor.apply_augmentations(cropped, cropped_bbox)
                     for aug_img, aug_name, aug_bbox in augmented_images:
-                        filename = f"{image_name}_bbox_{bbox['id']}_{aug_name}.png"
-                        filepath = os.path.join(folder, filename)
-                        aug_img.save(filepath)
+                        filepath = f"{base_path}_bbox_{bbox['id']}_{aug_name}.png"
+                        aug_img.save(filepath, format='PNG', compress_level=self.app.export_compress_level)
                         
                         # Add augmented bbox to JSON with updated coordinates
                         if aug_bbox:
-                            json_data["bboxes"].append({
+                            aug_json_bboxes.append({
                                 "id": f"{bbox['id']}_{aug_name}",
                                 "x": aug_bbox['x'],
                                 "y": aug_bbox['y'],
                                 "width": aug_bbox['width'],
                                 "height": aug_bbox['height'],
-                                "class": aug_bbox.get('class', 'Class 1'),
-                                "class_color": aug_bbox.get('class_color', '#00ff00'),
+                                "class": class_name,
+                                "class_color": class_color,
                                 "augmentation": aug_name,
                                 "original_id": bbox['id']
                             })
                         
                         total_bboxes += 1
-                else:
-                    # Original bbox without augmentation
-                    json_data["bboxes"].append({
-                        "id": bbox['id'],
-                        "x": bbox['x'],
-                        "y": bbox['y'],
-                        "width": bbox['width'],
-                        "height": bbox['height'],
-                        "class": bbox.get('class', 'Class 1'),
-                        "class_color": bbox.get('class_color', '#00ff00')
-                    })
-                    
-                    filename = f"{image_name}_bbox_{bbox['id']}.png"
-                    filepath = os.path.join(folder, filename)
-                    cropped.save(filepath)
+                except Exception as e:
+                    errors.append((os.path.basename(filepath), e))
+            else:
+                # Original bbox without augmentation
+                filepath = f"{base_path}_bbox_{bbox['id']}.png"
+                key = self._export_cache_key(image_path, image_mtime, 'bbox', bbox['id'], (x, y, w, h))
+                if self.app.export_cache.get(key) == filepath and os.path.exists(filepath):
                     total_bboxes += 1
+                    continue
+                try:
+                    if vips_img is not None and x >= 0 and y >= 0 and x + w <= img.width and y + h <= img.height:
+                        vips_img.crop(x, y, w, h).write_to_file(filepath, compression=self.app.export_compress_level)
+                        written.append((key, filepath))
+                        total_bboxes += 1
+                    else:
+                        if arr is None:
+                            arr = _crop_array(img)
+                        # Copied so the queued job does not keep the full pixel array alive
+                        encode_jobs.append(('bbox', key, filepath, self.app.encode_pool.submit(
+                            _encode_png, _crop_pixels(img, arr, x, y, w, h).copy(), filepath,
+                            self.app.export_compress_level)))
+                except Exception as e:
+                    errors.append((os.path.basename(filepath), e))
+        
+        # Export polygons
+        for polygon in polygons:
+            points = polygon['points']
             
-            # Export polygons
-            for polygon in polygons:
-                points = polygon['points']
-                
-                json_data["polygons"].append({
-                    "id": polygon['id'],
-                    "points": points,
-                    "class": polygon.get('class', 'Class 1'),
-                    "class_color": polygon.get('class_color', '#00ff00')
-                })
-                
+            # Skip polygons whose image was already written by an earlier export
+            filepath = f"{base_path}_polygon_{polygon['id']}.png"
+            key = self._export_cache_key(image_path, image_mtime, 'polygon', polygon['id'], points)
+            if self.app.export_cache.get(key) == filepath and os.path.exists(filepath):
+                total_polygons += 1
+                continue
+            
+            try:
                 # Find bounding box of polygon
-                xs = [p[0] for p in points]
-                ys = [p[1] for p in points]
-                min_x, max_x = min(xs), max(xs)
-                min_y, max_y = min(ys), max(ys)
+                pts = np.asarray(points, dtype=np.int32)
+                min_x, min_y = (int(v) for v in pts.min(0))
+                max_x, max_y = (int(v) for v in pts.max(0))
                 
                 # Add padding
                 padding = 5
@@ -260,62 +534,54 @@ class ShapeManager:
                 height = max_y - min_y
                 
                 # Create mask
-                mask = Image.new('L', (width, height), 0)
-                mask_draw = ImageDraw.Draw(mask)
-                adjusted_points = [(x - min_x, y - min_y) for x, y in points]
-                mask_draw.polygon(adjusted_points, fill=255)
+                mask = np.zeros((height, width), dtype=np.uint8)
+                cv2.fillPoly(mask, [pts - np.int32((min_x, min_y))], 255)
                 
-                # Crop and apply mask
+                # Crop and use the mask as the alpha channel
                 cropped = img.crop((min_x, min_y, max_x, max_y))
-                output = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-                output.paste(cropped, (0, 0))
-                output.putalpha(mask)
+                rgba = np.dstack((_to_array(cropped.convert('RGB')), mask))
                 
                 # Save polygon image
-                filename = f"{image_name}_polygon_{polygon['id']}.png"
-                filepath = os.path.join(folder, filename)
-                output.save(filepath)
-                total_polygons += 1
-            
-            # Store image data for format exporters
-            images_data[image_path] = {
-                'image_width': img.width,
-                'image_height': img.height,
-                'bboxes': bboxes,
-                'polygons': polygons
-            }
-            
-            # Save individual JSON file for this image (for JSON format)
-            if export_format == 'JSON':
-                json_filename = f"{image_name}_annotations.json"
-                json_filepath = os.path.join(folder, json_filename)
-                with open(json_filepath, 'w') as f:
-                    json.dump(json_data, f, indent=2)
+                encode_jobs.append(('polygon', key, filepath, self.app.encode_pool.submit(
+                    _encode_png, rgba, filepath, self.app.export_compress_level)))
+            except Exception as e:
+                errors.append((os.path.basename(filepath), e))
         
-        # Export in selected format
-        format_output = None
-        if export_format == 'COCO':
-            format_output = self.app.export_formatter.export_coco(images_data, folder)
-            format_msg = f"COCO format: {format_output}"
-        elif export_format == 'VOC':
-            format_output = self.app.export_formatter.export_voc(images_data, folder)
-            format_msg = f"VOC format: {format_output}"
-        elif export_format == 'YOLO':
-            # Get unique class names
-            class_names = list(set([cls['name'] for cls in self.app.classes]))
-            format_output = self.app.export_formatter.export_yolo(images_data, folder, class_names)
-            format_msg = f"YOLO format: {format_output}"
-        else:
-            format_msg = "JSON format (individual files)"
+        # Save individual JSON file for this image (for JSON format)
+        if export_format == 'JSON':
+            json_filepath = f"{base_path}_annotations.json"
+            if apply_augmentation:
+                json_bboxes = aug_json_bboxes
+            else:
+                json_bboxes = ({
+                    "id": bbox['id'],
+                    "x": bbox['x'],
+                    "y": bbox['y'],
+                    "width": bbox['width'],
+                    "height": bbox['height'],
+                    "class": bbox['class'],
+                    "class_color": bbox['class_color']
+                } for bbox in bboxes)
+            json_polygons = ({
+                "id": polygon['id'],
+                "points": polygon['points'],
+                "class": polygon['class'],
+                "class_color": polygon['class_color']
+            } for polygon in polygons)
+            try:
+                self._stream_write_json(json_filepath, json_header, json_bboxes, json_polygons)
+            except Exception as e:
+                errors.append((os.path.basename(json_filepath), e))
         
-        messagebox.showinfo("Save Complete", 
-                          f"Saved annotations from {total_images_with_annotations} image(s):\n"
-                          f"- {total_bboxes} bboxes\n"
-                          f"- {total_polygons} polygons\n\n"
-                          f"Format: {export_format}\n"
-                          f"{format_msg}\n\n"
-                          f"Location: {folder}")
-        self.app.update_status(f"Saved {total_bboxes} bboxes and {total_polygons} polygons in {export_format} format")
+        # Image data for the format exporters
+        image_data = {
+            'image_width': img.width,
+            'image_height': img.height,
+            'bboxes': bboxes,
+            'polygons': polygons
+        }
+        # Encoder jobs are polled from the main loop, so this thread is free for the next image
+        return total_bboxes, total_polygons, image_data, written, encode_jobs, errors
     
     def toggle_custom_select(self):
         """Toggle polygon selection mode"""
@@ -339,13 +605,17 @@ class ShapeManager:
         # Get current class
         current_class = self.app.classes[self.app.current_class_index]
         
+        xs = [p[0] for p in self.app.polygon_points]
+        ys = [p[1] for p in self.app.polygon_points]
         polygon = {
             'id': self.app.polygon_counter,
             'points': self.app.polygon_points.copy(),
             'class': current_class['name'],
-            'class_color': current_class['color']
+            'class_color': current_class['color'],
+            '_bbox': (min(xs), min(ys), max(xs), max(ys))
         }
-        self.app.polygons.append(polygon)
+        self.app.polygons[polygon['id']] = polygon
+        self.app.shapes_dirty = True
         
         # Clear current points
         self.app.polygon_points = []
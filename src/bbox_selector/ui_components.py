@@ -4,17 +4,49 @@ Handles all GUI setup and styling for the BBox Selector
 """
 import tkinter as tk
 from tkinter import ttk
+from tkinter import font as tkfont
+from types import MappingProxyType
+
+# Idle time after the last keystroke in a bbox size field before it is validated
+BBOX_VALIDATE_DELAY_MS = 200
 
 
 class UIComponents:
     """Manages UI components and styling"""
     
+    # ttk styles are process-wide, so they are configured only once
+    _styles_initialized = False
+    
+    # Options shared by every tk.Button; colors and font are filled in by _button_style
+    _BUTTON_BASE = MappingProxyType({
+        'fg': 'white',
+        'relief': tk.FLAT,
+        'padx': 16,
+        'pady': 9,
+        'cursor': 'hand2',
+        'activeforeground': 'white',
+        'borderwidth': 0,
+        'highlightthickness': 0
+    })
+    
     def __init__(self, root, app):
         self.root = root
         self.app = app
+        self._bbox_validate_after = None
+        self._fonts = {}  # (family, size, weight) -> tkfont.Font
+        
+    def _font(self, size, weight='normal', family='Segoe UI'):
+        """Return a shared Font object so each font is resolved by Tk only once"""
+        key = (family, size, weight)
+        font = self._fonts.get(key)
+        if font is None:
+            font = tkfont.Font(root=self.root, family=family, size=size, weight=weight)
+            self._fonts[key] = font
+        return font
         
     def setup_gui(self):
         """Setup the main GUI layout"""
+        self._setup_styles()
         self._setup_control_panel()
         self._setup_status_bar()
         self._setup_main_content()
@@ -24,26 +56,20 @@ class UIComponents:
         control_frame = tk.Frame(self.root, bg="#2d2d2d", relief=tk.FLAT, bd=0)
         control_frame.pack(side=tk.TOP, fill=tk.X, padx=0, pady=0)
         
-        # Top row
-        top_row = tk.Frame(control_frame, bg="#2d2d2d")
-        top_row.pack(side=tk.TOP, fill=tk.X, padx=0, pady=(10, 5))
-        
-        # Bottom row
-        bottom_row = tk.Frame(control_frame, bg="#2d2d2d")
-        bottom_row.pack(side=tk.TOP, fill=tk.X, padx=0, pady=(5, 10))
+        # Sections sit in one grid: file ops, zoom, spacer, actions; bbox controls below
+        control_frame.grid_columnconfigure(2, weight=1)
         
         # Create button sections
-        self._create_file_operations(top_row)
-        self._create_zoom_controls(top_row)
-        self._create_action_buttons(top_row)
-        self._create_bbox_controls(bottom_row)
+        self._create_file_operations(control_frame).grid(row=0, column=0, padx=10, pady=(10, 5), sticky='w')
+        self._create_zoom_controls(control_frame).grid(row=0, column=1, padx=10, pady=(10, 5), sticky='w')
+        self._create_action_buttons(control_frame).grid(row=0, column=3, padx=10, pady=(10, 5), sticky='e')
+        self._create_bbox_controls(control_frame).grid(row=1, column=0, columnspan=4, padx=10, pady=(5, 10), sticky='w')
         
     def _create_file_operations(self, parent):
         """Create file operation buttons"""
         left_section = tk.Frame(parent, bg="#2d2d2d")
-        left_section.pack(side=tk.LEFT, padx=10, pady=0)
         
-        btn_style = self._get_button_style()
+        btn_style = self._button_style()
         
         upload_btn = tk.Button(left_section, text="📁 Load Image", 
                               command=self.app.load_image, **btn_style)
@@ -61,7 +87,7 @@ class UIComponents:
                                      selectcolor="#0078d4",
                                      activebackground="#2d2d2d",
                                      activeforeground="white",
-                                     font=('Segoe UI', self.app.base_font_size),
+                                     font=self._font(self.app.base_font_size),
                                      cursor='hand2',
                                      relief=tk.FLAT,
                                      borderwidth=0)
@@ -69,32 +95,30 @@ class UIComponents:
         
         # Export format selector
         tk.Label(left_section, text="Export:", bg="#2d2d2d", fg="white", 
-                font=('Segoe UI', self.app.base_font_size)).pack(side=tk.LEFT, padx=(15, 3))
+                font=self._font(self.app.base_font_size)).pack(side=tk.LEFT, padx=(15, 3))
         
         format_dropdown = ttk.Combobox(left_section, textvariable=self.app.export_format,
                                       values=['JSON', 'COCO', 'VOC', 'YOLO'],
                                       state='readonly', width=8,
-                                      font=('Segoe UI', self.app.base_font_size))
+                                      font=self._font(self.app.base_font_size))
         format_dropdown.pack(side=tk.LEFT, padx=2)
+        return left_section
         
     def _create_zoom_controls(self, parent):
         """Create zoom control buttons"""
         zoom_section = tk.Frame(parent, bg="#2d2d2d")
-        zoom_section.pack(side=tk.LEFT, padx=10, pady=0)
         
         tk.Label(zoom_section, text="Zoom:", bg="#2d2d2d", fg="white", 
-                font=('Segoe UI', self.app.base_font_size)).pack(side=tk.LEFT, padx=3)
+                font=self._font(self.app.base_font_size)).pack(side=tk.LEFT, padx=3)
         
-        zoom_btn_style = self._get_button_style()
-        zoom_btn_style['padx'] = 10
-        zoom_btn_style['pady'] = 6
+        zoom_btn_style = self._button_style(padx=10, pady=6)
         
         zoom_out_btn = tk.Button(zoom_section, text="➖", 
                                 command=self.app.zoom_out, **zoom_btn_style)
         zoom_out_btn.pack(side=tk.LEFT, padx=2)
         
         self.app.zoom_label = tk.Label(zoom_section, text="100%", bg="#2d2d2d", fg="white", 
-                                       font=('Segoe UI', self.app.base_font_size, 'bold'), width=6)
+                                       font=self._font(self.app.base_font_size, 'bold'), width=6)
         self.app.zoom_label.pack(side=tk.LEFT, padx=3)
         
         zoom_in_btn = tk.Button(zoom_section, text="➕", 
@@ -104,77 +128,65 @@ class UIComponents:
         zoom_reset_btn = tk.Button(zoom_section, text="⟲", 
                                    command=self.app.zoom_reset, **zoom_btn_style)
         zoom_reset_btn.pack(side=tk.LEFT, padx=2)
+        return zoom_section
         
     def _create_action_buttons(self, parent):
         """Create action buttons (Delete, Clear, Save)"""
         right_section = tk.Frame(parent, bg="#2d2d2d")
-        right_section.pack(side=tk.RIGHT, padx=10, pady=0)
-        
-        btn_style = self._get_button_style()
         
         # Delete button
-        delete_style = btn_style.copy()
-        delete_style['bg'] = '#d13438'
-        delete_style['activebackground'] = '#a72629'
+        delete_style = self._button_style('#d13438', '#a72629')
         
         delete_selected_btn = tk.Button(right_section, text="🗑️ Delete", 
                                        command=self.app.delete_selected_shape, **delete_style)
         delete_selected_btn.pack(side=tk.LEFT, padx=3)
         
         # Clear button
-        clear_style = btn_style.copy()
-        clear_style['bg'] = '#e74856'
-        clear_style['activebackground'] = '#c42b1c'
+        clear_style = self._button_style('#e74856', '#c42b1c')
         
         clear_btn = tk.Button(right_section, text="🧹 Clear All", 
                              command=self.app.clear_all_shapes, **clear_style)
         clear_btn.pack(side=tk.LEFT, padx=3)
         
         # Augmentation button
-        aug_style = btn_style.copy()
-        aug_style['bg'] = '#8764b8'
-        aug_style['activebackground'] = '#744da9'
+        aug_style = self._button_style('#8764b8', '#744da9')
         
         aug_btn = tk.Button(right_section, text="🎨 Augment", 
                            command=self.app.open_augmentation_settings, **aug_style)
         aug_btn.pack(side=tk.LEFT, padx=3)
         
         # Save button
-        export_style = btn_style.copy()
-        export_style['bg'] = '#107c10'
-        export_style['activebackground'] = '#0e6b0e'
+        export_style = self._button_style('#107c10', '#0e6b0e')
         
         export_btn = tk.Button(right_section, text="💾 Save All", 
                               command=self.app.save_all_shapes, **export_style)
         export_btn.pack(side=tk.LEFT, padx=3)
+        return right_section
         
     def _create_bbox_controls(self, parent):
         """Create bbox size control inputs and class selector"""
         middle_section = tk.Frame(parent, bg="#2d2d2d")
-        middle_section.pack(side=tk.LEFT, padx=10, pady=0)
         
         # Class selector
         tk.Label(middle_section, text="Class:", bg="#2d2d2d", fg="white", 
-                font=('Segoe UI', self.app.base_font_size, 'bold')).pack(side=tk.LEFT, padx=(0, 5))
+                font=self._font(self.app.base_font_size, 'bold')).pack(side=tk.LEFT, padx=(0, 5))
         
         self.app.class_var = tk.StringVar(value=self.app.classes[0]['name'])
         class_dropdown = ttk.Combobox(middle_section, textvariable=self.app.class_var, 
                                      values=[c['name'] for c in self.app.classes],
                                      state='readonly', width=12,
-                                     font=('Segoe UI', self.app.base_font_size))
+                                     font=self._font(self.app.base_font_size))
         class_dropdown.pack(side=tk.LEFT, padx=2)
         class_dropdown.bind('<<ComboboxSelected>>', self._on_class_selected)
         
         # Class color indicator
         self.app.class_color_label = tk.Label(middle_section, text="●", bg="#2d2d2d", 
                                              fg=self.app.classes[0]['color'],
-                                             font=('Segoe UI', 16, 'bold'))
+                                             font=self._font(16, 'bold'))
         self.app.class_color_label.pack(side=tk.LEFT, padx=2)
         
         # Manage classes button
-        manage_btn_style = self._get_button_style()
-        manage_btn_style['bg'] = '#505050'
-        manage_btn_style['activebackground'] = '#606060'
+        manage_btn_style = self._button_style('#505050', '#606060')
         manage_classes_btn = tk.Button(middle_section, text="⚙️", 
                                       command=self.app.manage_classes, **manage_btn_style)
         manage_classes_btn.pack(side=tk.LEFT, padx=(2, 15))
@@ -183,42 +195,54 @@ class UIComponents:
         tk.Frame(middle_section, width=2, bg="#505050").pack(side=tk.LEFT, fill=tk.Y, padx=10)
         
         tk.Label(middle_section, text="BBox Size:", bg="#2d2d2d", fg="white", 
-                font=('Segoe UI', self.app.base_font_size)).pack(side=tk.LEFT, padx=(0, 3))
+                font=self._font(self.app.base_font_size)).pack(side=tk.LEFT, padx=(0, 3))
         
         # Width input
         tk.Label(middle_section, text="Width:", bg="#2d2d2d", fg="#b8b8b8", 
-                font=('Segoe UI', self.app.base_font_size)).pack(side=tk.LEFT, padx=(8, 2))
+                font=self._font(self.app.base_font_size)).pack(side=tk.LEFT, padx=(8, 2))
         self.app.bbox_width_var = tk.StringVar(value=str(self.app.bbox_width))
         width_entry = tk.Entry(middle_section, textvariable=self.app.bbox_width_var, width=8, 
-                              font=('Segoe UI', self.app.base_font_size), relief=tk.FLAT, 
+                              font=self._font(self.app.base_font_size), relief=tk.FLAT, 
                               bg="#404040", fg="white", insertbackground="#0078d4", 
                               borderwidth=1, highlightthickness=1,
                               highlightbackground="#505050", highlightcolor="#0078d4")
         width_entry.pack(side=tk.LEFT, padx=2)
         width_entry.bind("<FocusOut>", self.app.validate_bbox_size)
         width_entry.bind("<Return>", self.app.validate_bbox_size)
+        width_entry.bind("<KeyRelease>", self._schedule_bbox_validate)
         
         # Height input
         tk.Label(middle_section, text="Height:", bg="#2d2d2d", fg="#b8b8b8", 
-                font=('Segoe UI', self.app.base_font_size)).pack(side=tk.LEFT, padx=(10, 2))
+                font=self._font(self.app.base_font_size)).pack(side=tk.LEFT, padx=(10, 2))
         self.app.bbox_height_var = tk.StringVar(value=str(self.app.bbox_height))
         height_entry = tk.Entry(middle_section, textvariable=self.app.bbox_height_var, width=8, 
-                               font=('Segoe UI', self.app.base_font_size), relief=tk.FLAT, 
+                               font=self._font(self.app.base_font_size), relief=tk.FLAT, 
                                bg="#404040", fg="white", insertbackground="#0078d4", 
                                borderwidth=1, highlightthickness=1,
                                highlightbackground="#505050", highlightcolor="#0078d4")
         height_entry.pack(side=tk.LEFT, padx=2)
         height_entry.bind("<FocusOut>", self.app.validate_bbox_size)
         height_entry.bind("<Return>", self.app.validate_bbox_size)
+        height_entry.bind("<KeyRelease>", self._schedule_bbox_validate)
         
         # Apply button
-        apply_style = self._get_button_style()
-        apply_style['bg'] = '#8764b8'
-        apply_style['activebackground'] = '#744da9'
+        apply_style = self._button_style('#8764b8', '#744da9')
         apply_size_btn = tk.Button(middle_section, text="✓ Apply Size", 
                                    command=self.app.apply_size_to_selected, **apply_style)
         apply_size_btn.pack(side=tk.LEFT, padx=10)
-    
+        return middle_section
+
+    def _schedule_bbox_validate(self, event=None):
+        """Validate both bbox size fields once typing pauses"""
+        if self._bbox_validate_after is not None:
+            self.root.after_cancel(self._bbox_validate_after)
+        self._bbox_validate_after = self.root.after(BBOX_VALIDATE_DELAY_MS, self._run_bbox_validate)
+
+    def _run_bbox_validate(self):
+        """Apply the typed bbox size; errors are reported on Return/focus-out instead"""
+        self._bbox_validate_after = None
+        self.app.validate_bbox_size(None, show_error=False)
+
     def _on_class_selected(self, event=None):
         """Handle class selection change"""
         selected_class_name = self.app.class_var.get()
@@ -235,7 +259,7 @@ class UIComponents:
         
         self.app.status_label = tk.Label(status_frame, text="Ready | Load an image to start", 
                                          bg="#252525", fg="#aaaaaa", 
-                                         font=('Segoe UI', self.app.status_font_size),
+                                         font=self._font(self.app.status_font_size),
                                          anchor='w', padx=12, pady=6)
         self.app.status_label.pack(fill=tk.X)
         
@@ -243,6 +267,10 @@ class UIComponents:
         """Setup main content area with side panel and canvas"""
         content_frame = tk.Frame(self.root, bg="#1e1e1e")
         content_frame.pack(side=tk.BOTTOM, fill=tk.BOTH, expand=True)
+        # Side panel column keeps its minimum width; the canvas column takes the rest
+        content_frame.grid_columnconfigure(0, minsize=200)
+        content_frame.grid_columnconfigure(1, weight=1)
+        content_frame.grid_rowconfigure(0, weight=1)
         
         self._setup_side_panel(content_frame)
         self._setup_canvas(content_frame)
@@ -250,12 +278,11 @@ class UIComponents:
     def _setup_side_panel(self, parent):
         """Setup side panel for image navigation"""
         self.app.side_panel = tk.Frame(parent, bg="#2d2d2d", width=200)
-        self.app.side_panel.pack(side=tk.LEFT, fill=tk.Y)
-        self.app.side_panel.pack_propagate(False)
+        self.app.side_panel.grid(row=0, column=0, sticky='nsew')
         
         # Header
         nav_header = tk.Label(self.app.side_panel, text="📂 Images", bg="#2d2d2d", fg="#ffffff", 
-                             font=('Segoe UI', self.app.heading_font_size, 'bold'), pady=15)
+                             font=self._font(self.app.heading_font_size, 'bold'), pady=15)
         nav_header.pack(side=tk.TOP, fill=tk.X)
         
         # Navigation buttons
@@ -265,7 +292,7 @@ class UIComponents:
         nav_btn_style = {
             'bg': '#0078d4',
             'fg': 'white',
-            'font': ('Segoe UI', self.app.button_font_size),
+            'font': self._font(self.app.button_font_size),
             'relief': tk.FLAT,
             'padx': 10,
             'pady': 7,
@@ -286,7 +313,7 @@ class UIComponents:
         # Image counter
         self.app.image_counter_label = tk.Label(self.app.side_panel, text="0 / 0", 
                                                 bg="#2d2d2d", fg="#b8b8b8", 
-                                                font=('Segoe UI', self.app.base_font_size, 'bold'))
+                                                font=self._font(self.app.base_font_size, 'bold'))
         self.app.image_counter_label.pack(side=tk.TOP, pady=8)
         
         # Image list
@@ -296,8 +323,11 @@ class UIComponents:
         list_scroll = tk.Scrollbar(list_frame, orient=tk.VERTICAL, width=12)
         list_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         
-        self.app.image_listbox = tk.Listbox(list_frame, bg="#404040", fg="white", 
-                                            font=('Segoe UI', self.app.base_font_size), 
+        # Rows live in a Tcl list variable; the listbox only draws the visible ones
+        self.app.image_list_var = tk.Variable(value=())
+        self.app.image_listbox = tk.Listbox(list_frame, listvariable=self.app.image_list_var,
+                                            bg="#404040", fg="white", 
+                                            font=self._font(self.app.base_font_size), 
                                             relief=tk.FLAT, selectbackground="#0078d4", 
                                             selectforeground="white", yscrollcommand=list_scroll.set, 
                                             activestyle='none', borderwidth=0, highlightthickness=0)
@@ -308,7 +338,7 @@ class UIComponents:
     def _setup_canvas(self, parent):
         """Setup canvas for image display"""
         canvas_frame = tk.Frame(parent, bg="#1e1e1e")
-        canvas_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+        canvas_frame.grid(row=0, column=1, sticky='nsew')
         
         self.app.canvas = tk.Canvas(canvas_frame, bg="#0a0a0a", highlightthickness=0, cursor="crosshair")
         self.app.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -316,8 +346,10 @@ class UIComponents:
         # Setup scrollbars
         self._setup_scrollbars(canvas_frame)
         
-    def _setup_scrollbars(self, parent):
-        """Setup canvas scrollbars"""
+    def _setup_styles(self):
+        """Configure the ttk theme and scrollbar styles"""
+        if UIComponents._styles_initialized:
+            return
         style = ttk.Style()
         style.theme_use('clam')
         style.configure("Vertical.TScrollbar", 
@@ -334,7 +366,10 @@ class UIComponents:
                        arrowcolor="#b8b8b8",
                        darkcolor="#404040",
                        lightcolor="#606060")
+        UIComponents._styles_initialized = True
         
+    def _setup_scrollbars(self, parent):
+        """Setup canvas scrollbars"""
         v_scroll = ttk.Scrollbar(parent, orient=tk.VERTICAL, 
                                 command=self.app.canvas.yview, style="Vertical.TScrollbar")
         v_scroll.pack(side=tk.RIGHT, fill=tk.Y)
@@ -343,20 +378,15 @@ class UIComponents:
                                 command=self.app.canvas.xview, style="Horizontal.TScrollbar")
         h_scroll.pack(side=tk.BOTTOM, fill=tk.X)
         
-        self.app.canvas.configure(xscrollcommand=h_scroll.set, yscrollcommand=v_scroll.set)
-        
-    def _get_button_style(self):
-        """Get default button style"""
-        return {
-            'bg': '#0078d4',
-            'fg': 'white',
-            'font': ('Segoe UI', self.app.button_font_size, 'normal'),
-            'relief': tk.FLAT,
-            'padx': 16,
-            'pady': 9,
-            'cursor': 'hand2',
-            'activebackground': '#106ebe',
-            'activeforeground': 'white',
-            'borderwidth': 0,
-            'highlightthickness': 0
-        }
+        self.app.canvas.configure(xscrollcommand=lambda *args: self._on_canvas_scroll(h_scroll, args),
+                                  yscrollcommand=lambda *args: self._on_canvas_scroll(v_scroll, args))
+    
+    def _on_canvas_scroll(self, scrollbar, args):
+        """Update scrollbar and let the canvas handler redraw culled shapes"""
+        scrollbar.set(*args)
+        self.app.canvas_handler.on_view_changed()
+        
+    def _button_style(self, bg='#0078d4', activebg='#106ebe', **overrides):
+        """Build a button style from the shared base with the given colors"""
+        return {**self._BUTTON_BASE, 'bg': bg, 'activebackground': activebg,
+                'font': self._font(self.app.button_font_size), **overrides}
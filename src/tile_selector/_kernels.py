@@ -0,0 +1,99 @@
+"""
+Compiled kernels for Tile Selector
+Tight loops used on interactive paths, compiled with numba when it is installed
+"""
+import os
+from importlib.util import find_spec
+import numpy as np
+
+# numba is only imported by warm_up, after the first paint; until then the pure-Python kernels run
+NUMBA_AVAILABLE = find_spec('numba') is not None
+prange = range
+
+# Masks with more pixels than this get their confusion matrix from the streaming kernel,
+# which avoids the bincount path's full-size index arrays
+CONFUSION_KERNEL_MIN_PIXELS = 4_000_000
+
+
+def _line_tiles(r0, c0, r1, c1, cols):
+    """Return the row-major indices of the grid cells on the line from (r0, c0) to (r1, c1)"""
+    dr = abs(r1 - r0)
+    dc = abs(c1 - c0)
+    step_r = 1 if r1 > r0 else -1
+    step_c = 1 if c1 > c0 else -1
+    count = max(dr, dc) + 1
+    out = np.empty(count, dtype=np.int64)
+    err = dc - dr
+    r = r0
+    c = c0
+    for k in range(count):
+        out[k] = r * cols + c
+        e2 = 2 * err
+        if e2 > -dr:
+            err -= dr
+            c += step_c
+        if e2 < dc:
+            err += dc
+            r += step_r
+    return out
+
+
+def _confusion_counts(gt, pred, lut, n, chunks):
+    """Count (ground truth, predicted) class pairs over two uint8 masks, one histogram per row chunk"""
+    rows, cols = gt.shape
+    step = (rows + chunks - 1) // chunks
+    hist = np.zeros((chunks, n * n), dtype=np.int64)
+    for k in prange(chunks):
+        for r in range(k * step, min((k + 1) * step, rows)):
+            for c in range(cols):
+                gi = lut[gt[r, c]]
+                pi = lut[pred[r, c]]
+                if gi >= 0 and pi >= 0:
+                    hist[k, gi * n + pi] += 1
+    return hist.sum(axis=0)
+
+
+_line_tiles_kernel = _line_tiles
+_confusion_kernel = _confusion_counts
+_jitted = False
+
+
+def _jit():
+    """Import numba and swap in the compiled kernels, once"""
+    global NUMBA_AVAILABLE, prange, _line_tiles_kernel, _confusion_kernel, _jitted
+    if _jitted or not NUMBA_AVAILABLE:
+        return
+    try:
+        import numba
+    except Exception:
+        # A broken install or ABI mismatch leaves only the pure-Python kernels
+        NUMBA_AVAILABLE = False
+        return
+    # Bound before compiling: numba resolves the kernels' globals at compile time
+    prange = numba.prange
+    _line_tiles_kernel = numba.njit(cache=True)(_line_tiles)
+    _confusion_kernel = numba.njit(parallel=True, cache=True)(_confusion_counts)
+    _jitted = True
+
+
+def line_tiles(r0, c0, r1, c1, cols):
+    """Return the row-major indices of the grid cells on the line from (r0, c0) to (r1, c1)"""
+    return _line_tiles_kernel(r0, c0, r1, c1, cols)
+
+
+def confusion_matrix(gt, pred, lut, n):
+    """Return the n x n confusion matrix of two uint8 masks, or None if numba could not compile it"""
+    _jit()
+    if not _jitted:
+        # The uncompiled loop is far too slow for the masks this kernel is meant for
+        return None
+    # lut maps pixel values to class indices (-1 ignores)
+    # Several chunks per core keep the threads balanced; each chunk has its own histogram
+    chunks = max(1, min(gt.shape[0], (os.cpu_count() or 1) * 4))
+    return _confusion_kernel(np.ascontiguousarray(gt), np.ascontiguousarray(pred), lut, n, chunks).reshape(n, n)
+
+
+def warm_up():
+    """Import numba and compile (or load from the numba cache) the kernels before the first drag"""
+    _jit()
+    line_tiles(0, 0, 1, 1, 2)
@@ -2,20 +2,77 @@
 Tile Selector - Main Application
 Modular architecture with separated concerns
 """
+import os
+import hashlib
+import queue
+import threading
+import time
 import tkinter as tk
-import cv2
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import filedialog, messagebox
 import numpy as np
+from PIL import Image, ImageDraw, ImageTk
 
 from .ui_components import UIComponents
-from .image_handler import ImageHandler
-from .tile_manager import TileManager
+from .image_handler import IMAGE_CACHE_SIZE, ImageHandler, open_image
+from .tile_manager import TileManager, report_export_errors
 from .canvas_handler import CanvasHandler
-from .lulc_classifier import LULCClassifier
+from .lulc_classifier import LULCClassifier, get_cv2
+from . import _kernels
+
+# zlib level for category tile PNGs; level 1 encodes several times faster than the default
+LULC_PNG_COMPRESSION = 1
+
+# Category export threads; more than a few just contend for the disk
+LULC_EXPORT_WORKERS = 4
+
+# How often the main loop checks on a running category export
+LULC_EXPORT_POLL_MS = 50
+
+# How often the main loop drains progress messages from the classifier thread
+CLASSIFY_POLL_MS = 100
+
+# Classifier results for previously classified images, reused across sessions
+CLASSIFICATION_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'tile-bbox', 'lulc')
+
+# Recent classifier results also kept in memory, so switching tile sizes back and forth is instant
+CLASSIFY_CACHE_SIZE = 8
+
+# Coalescing windows for pointer events: hover is sampled at ~60 Hz, wheel scrolling at ~30 Hz
+HOVER_COALESCE_MS = 16
+SCROLL_COALESCE_MS = 33
 
 
 class ImageTileSelector:
     """Main application class for Tile Selector"""
-    
+
+    # Every attribute the app or its handlers assign; slots make the per-event reads cheaper
+    __slots__ = (
+        # Window and fonts
+        "root", "base_font_size", "button_font_size", "status_font_size",
+        # Images and tiles
+        "images", "current_image_index", "tiles", "tile_cols", "tile_rows", "tile_size",
+        "selected_tiles", "current_padded_image", "display_image_tk", "image_tile_selections",
+        # LULC classification
+        "tile_classifications", "lulc_classifier", "_classify_running", "_classify_cache", "legend_frame", "category_counts",
+        "selected_tiles_for_category", "category_values", "category_value_vars",
+        "hand_tool_active", "hover_tile_index", "overlay_visible",
+        "preprocess_enabled", "preprocessed_image", "_preprocess_cache",
+        # Zoom, drag and selection state
+        "zoom_level", "min_zoom", "max_zoom", "canvas_center_x", "canvas_center_y",
+        "is_classification", "drag_start_x", "drag_start_y", "secondary_button_dragging",
+        "is_selecting", "selection_mode",
+        "_last_motion_xy", "_motion_scheduled", "_pending_zoom_steps", "_zoom_scheduled",
+        "_last_hover_xy", "_hover_scheduled", "_pending_scroll_units", "_scroll_scheduled",
+        # Widgets (set by UIComponents)
+        "canvas", "zoom_label", "status_label", "side_panel", "image_listbox", "image_list_var",
+        "image_counter_label", "prev_btn", "next_btn", "tile_size_var",
+        "hand_tool_btn", "overlay_toggle_btn",
+        # Handlers
+        "ui", "image_handler", "tile_manager", "canvas_handler",
+    )
+
     def __init__(self, root):
         self.root = root
         self.root.title("SkyServe Image Tile Selector and Exporter - Beta Edition")
@@ -44,20 +101,24 @@ class ImageTileSelector:
         # Setup GUI
         self.ui.setup_gui()
         
-        # Bind events
-        self._bind_events()
+        # Bind events once the window has painted; nothing can reach the canvas before then
+        self.root.after_idle(self._bind_events)
         
         # Enable drag and drop after canvas is created
         self.image_handler.enable_drag_drop()
+        
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
     
     def _init_variables(self):
         """Initialize all application variables"""
         # Image management
-        self.images = []  # List of (image_path, PIL.Image)
+        self.images = []  # List of image paths; pixels are decoded on demand via open_image
         self.current_image_index = 0
         
         # Tile management
-        self.tiles = []  # List of tile info
+        self.tiles = []  # List of tile info, row-major
+        self.tile_cols = 0  # Grid shape of self.tiles, for O(1) position -> index lookups
+        self.tile_rows = 0
         self.tile_size = 100
         self.selected_tiles = set()
         self.current_padded_image = None
@@ -67,8 +128,10 @@ class ImageTileSelector:
         self.image_tile_selections = {}  # {image_path: set of selected tile indices}
         
         # LULC Classification
-        self.tile_classifications = []  # List of category names for each tile
+        self.tile_classifications = np.empty(0, dtype=np.int8)  # int8 class id per tile (LULCClassifier.CLASS_NAMES), empty until classified
         self.lulc_classifier = None
+        self._classify_running = False  # A classifier thread is working on self.tiles
+        self._classify_cache = OrderedDict()  # {disk cache path: class ids}, oldest first
         self.legend_frame = None
         self.category_counts = {}
         self.selected_tiles_for_category = set()  # Tiles selected for batch category assignment
@@ -87,6 +150,7 @@ class ImageTileSelector:
         # Preprocessing toggle
         self.preprocess_enabled = None  # Will be set by UI (BooleanVar)
         self.preprocessed_image = None  # Store preprocessed version
+        self._preprocess_cache = OrderedDict()  # {image_path: corrected RGB PIL image}, oldest first
         
         # Zoom settings
         self.zoom_level = 1.0
@@ -107,12 +171,23 @@ class ImageTileSelector:
         self.is_selecting = False
         self.selection_mode = None  # 'add' or 'remove'
         
+        # Motion and zoom events coalesced until the event queue is idle
+        self._last_motion_xy = None
+        self._motion_scheduled = False
+        self._pending_zoom_steps = 0
+        self._zoom_scheduled = False
+        self._last_hover_xy = None
+        self._hover_scheduled = False
+        self._pending_scroll_units = 0
+        self._scroll_scheduled = False
+        
         # UI elements (will be set by UIComponents)
         self.canvas = None
         self.zoom_label = None
         self.status_label = None
         self.side_panel = None
         self.image_listbox = None
+        self.image_list_var = None
         self.image_counter_label = None
         self.prev_btn = None
         self.next_btn = None
@@ -124,21 +199,93 @@ class ImageTileSelector:
         self.image_handler = ImageHandler(self)
         self.tile_manager = TileManager(self)
         self.canvas_handler = CanvasHandler(self)
+        # Pay the kernel compile cost after the first paint instead of on the first drag
+        self.root.after_idle(_kernels.warm_up)
     
     def _bind_events(self):
         """Bind canvas events"""
         self.canvas.bind("<Button-1>", self.canvas_handler.on_canvas_click)
-        self.canvas.bind("<B1-Motion>", self.canvas_handler.on_canvas_drag)
-        self.canvas.bind("<ButtonRelease-1>", self.canvas_handler.on_canvas_release)
+        self.canvas.bind("<ButtonRelease-1>", self._on_selection_release)
         self.canvas.bind("<Button-3>", self.canvas_handler.on_right_click)  # Right-click for category menu
         self.canvas.bind("<Control-Button-1>", self.canvas_handler.on_right_click)  # Control+click for mac trackpads
-        self.canvas.bind("<Motion>", self.canvas_handler.on_mouse_motion)  # Track mouse for hand tool
-        self.canvas.bind("<MouseWheel>", self.canvas_handler.on_mouse_wheel)
-        self.canvas.bind("<Control-MouseWheel>", self.canvas_handler.on_ctrl_mouse_wheel)
         self.canvas.bind("<Shift-MouseWheel>", self.canvas_handler.on_shift_mouse_wheel)
         self.canvas.bind("<Button-2>", self.canvas_handler.on_drag_start)
         self.canvas.bind("<B2-Motion>", self.canvas_handler.on_drag_motion)
         self.canvas.bind("<ButtonRelease-2>", self.canvas_handler.on_secondary_release)
+        self.canvas.bind("<Configure>", self.canvas_handler.on_view_changed)  # Window resized
+        
+        # High-frequency events are bound at the Tcl level so only the needed fields cross
+        # into Python as strings, without building a tkinter Event for every callback
+        self._bind_raw("<B1-Motion>", self._on_selection_motion, "%x %y")
+        self._bind_raw("<Motion>", self._on_hover_motion, "%x %y")  # Track mouse for hand tool
+        self._bind_raw("<MouseWheel>", self._on_scroll_wheel, "%D")
+        self._bind_raw("<Control-MouseWheel>", self._on_zoom_wheel, "%D")
+    
+    def _bind_raw(self, sequence, callback, fields):
+        """Bind a canvas event to a callback that receives only the given % fields"""
+        command = self.canvas.register(callback)
+        self.canvas.tk.call('bind', str(self.canvas), sequence, f"{command} {fields}")
+    
+    def _on_selection_motion(self, x, y):
+        """Keep the latest drag-select position and handle it once the event queue is idle"""
+        self._last_motion_xy = (int(x), int(y))
+        if not self._motion_scheduled:
+            self._motion_scheduled = True
+            self.root.after_idle(self._flush_motion)
+    
+    def _flush_motion(self):
+        """Apply the latest drag-select motion event"""
+        if not self._motion_scheduled:
+            return
+        self._motion_scheduled = False
+        self.canvas_handler.on_canvas_drag(*self._last_motion_xy)
+    
+    def _on_selection_release(self, event):
+        """Apply any pending drag-select motion before ending the selection"""
+        self._flush_motion()
+        self.canvas_handler.on_canvas_release(event)
+    
+    def _on_hover_motion(self, x, y):
+        """Keep the latest pointer position and update the hand-tool hover at most every HOVER_COALESCE_MS"""
+        self._last_hover_xy = (int(x), int(y))
+        if not self._hover_scheduled:
+            self._hover_scheduled = True
+            self.root.after(HOVER_COALESCE_MS, self._flush_hover)
+    
+    def _flush_hover(self):
+        """Apply the latest hover position"""
+        self._hover_scheduled = False
+        self.canvas_handler.on_mouse_motion(*self._last_hover_xy)
+    
+    def _on_scroll_wheel(self, delta):
+        """Accumulate wheel scroll units and apply them together every SCROLL_COALESCE_MS"""
+        self._pending_scroll_units += -1 if int(delta) > 0 else 1
+        if not self._scroll_scheduled:
+            self._scroll_scheduled = True
+            self.root.after(SCROLL_COALESCE_MS, self._flush_scroll)
+    
+    def _flush_scroll(self):
+        """Apply the accumulated scroll units"""
+        units = self._pending_scroll_units
+        self._pending_scroll_units = 0
+        self._scroll_scheduled = False
+        if units:
+            self.canvas_handler.scroll_units(units)
+    
+    def _on_zoom_wheel(self, delta):
+        """Accumulate Ctrl + wheel zoom steps and apply them in one redraw"""
+        self._pending_zoom_steps += 1 if int(delta) > 0 else -1
+        if not self._zoom_scheduled:
+            self._zoom_scheduled = True
+            self.root.after_idle(self._flush_zoom)
+    
+    def _flush_zoom(self):
+        """Apply the accumulated zoom steps"""
+        steps = self._pending_zoom_steps
+        self._pending_zoom_steps = 0
+        self._zoom_scheduled = False
+        if steps and self.current_padded_image:
+            self.canvas_handler.zoom_steps(steps)
     
     # Delegate methods to handlers
     def upload_images(self):
@@ -176,7 +323,7 @@ class ImageTileSelector:
     def export_tiles_wrapper(self):
         """Export tiles based on mode"""
         # Check if LULC classification is active
-        if hasattr(self, 'tile_classifications') and self.tile_classifications:
+        if hasattr(self, 'tile_classifications') and len(self.tile_classifications):
             # Show export options menu
             menu = tk.Menu(self.root, tearoff=0, bg="#2d2d2d", fg="white",
                           activebackground="#0e639c", activeforeground="white")
@@ -196,9 +343,9 @@ class ImageTileSelector:
         else:
             self.tile_manager.export_tiles()
     
-    def display_grid(self):
+    def display_grid(self, force=False):
         """Display grid on canvas"""
-        self.canvas_handler.display_grid()
+        self.canvas_handler.display_grid(force)
     
     def zoom_in(self):
         """Zoom in"""
@@ -217,6 +364,11 @@ class ImageTileSelector:
         if self.status_label:
             self.status_label.config(text=message)
     
+    def on_close(self):
+        """Stop background workers and close the window"""
+        self.image_handler.stop_prefetch()
+        self.root.destroy()
+    
     def toggle_hand_tool(self):
         """Toggle hand tool mode for transparent overlay on hover"""
         self.hand_tool_active = not self.hand_tool_active
@@ -225,8 +377,7 @@ class ImageTileSelector:
             self.update_status("Hand Tool Active - Hover over tiles to see through overlay")
         else:
             self.canvas.config(cursor="")
-            self.hover_tile_index = None
-            self.display_grid()
+            self.canvas_handler.set_hover(None)
             self.update_status("Hand Tool Deactivated")
     
     def toggle_overlay(self):
@@ -248,7 +399,7 @@ class ImageTileSelector:
         if self.preprocess_enabled.get():
             # Preprocessing enabled - apply it
             self.update_status("Applying preprocessing...")
-            self.root.update()
+            self.root.update_idletasks()
             self._apply_preprocessing()
             self.update_status("Preprocessing enabled - Displaying processed image")
         else:
@@ -262,9 +413,10 @@ class ImageTileSelector:
     def classify_tiles_lulc(self):
         """Classify tiles using LULC classifier"""
         if not self.tiles:
-            import tkinter.messagebox as messagebox
             messagebox.showwarning("Warning", "No tiles to classify. Please load an image and apply tile size first.")
             return
+        if self._classify_running:
+            return
         
         # Initialize classifier if not already done
         if not self.lulc_classifier:
@@ -276,124 +428,268 @@ class ImageTileSelector:
         
         # Show progress
         self.update_status("Classifying tiles...")
-        self.root.update()
         
         # Save preprocessed image if color correction is enabled
         if self.lulc_classifier.apply_color_correction and self.images:
             self._save_preprocessed_image()
         
-        # Classify tiles
+        # Reuse the stored result when this image was already classified with the same tiles
+        cache_path = self._classification_cache_path()
+        cached = self._load_cached_classification(cache_path)
+        if cached is not None:
+            self._finish_classification(cached)
+            return
+        
+        # Classify on a worker thread; it reports back through the queue, drained from the main loop
+        self._classify_running = True
+        messages = queue.Queue()
+        tiles = self.tiles
+        threading.Thread(target=self._classify_worker, args=(tiles, messages), daemon=True).start()
+        self.root.after(CLASSIFY_POLL_MS, self._drain_classify_queue, tiles, messages, cache_path)
+    
+    def _classification_cache_path(self):
+        """Return the disk cache file for classifying the current image's contents with the current tiles"""
+        image_path = self.images[self.current_image_index]
+        stat = os.stat(image_path)
+        preprocessed = bool(self.preprocess_enabled and self.preprocess_enabled.get()
+                            and self.preprocessed_image is not None)
+        classifier = self.lulc_classifier
+        config = f"{classifier.apply_color_correction}|{classifier.filter_clouds}|{classifier.cloud_threshold}"
+        key = (f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}|{self.tile_size}|{int(preprocessed)}"
+               f"|{config}")
+        return os.path.join(CLASSIFICATION_CACHE_DIR, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.npz')
+    
+    def _load_cached_classification(self, cache_path):
+        """Return stored classifications for the current tiles, or None on a miss"""
+        # Category edits change tile_classifications in place, so callers always get a copy
+        cached = self._classify_cache.get(cache_path)
+        if cached is not None and len(cached) == len(self.tiles):
+            self._classify_cache.move_to_end(cache_path)
+            return cached.copy()
+        try:
+            with np.load(cache_path) as data:
+                classifications = data['classifications']
+        except (OSError, KeyError, ValueError):
+            return None
+        if classifications.dtype != np.int8 or len(classifications) != len(self.tiles):
+            return None
+        self._remember_classification(cache_path, classifications)
+        return classifications.copy()
+    
+    def _remember_classification(self, cache_path, classifications):
+        """Keep a private copy of classifications in the in-memory cache"""
+        self._classify_cache[cache_path] = classifications.copy()
+        self._classify_cache.move_to_end(cache_path)
+        if len(self._classify_cache) > CLASSIFY_CACHE_SIZE:
+            self._classify_cache.popitem(last=False)
+    
+    def _store_classification(self, cache_path, classifications):
+        """Write classifications to the in-memory and disk caches"""
+        self._remember_classification(cache_path, classifications)
+        try:
+            os.makedirs(CLASSIFICATION_CACHE_DIR, exist_ok=True)
+            # np.savez adds .npz to names without it, so the temporary name keeps the extension
+            tmp_path = f"{cache_path[:-4]}.{threading.get_ident()}.tmp.npz"
+            np.savez_compressed(tmp_path, classifications=classifications)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # The cache is best-effort; classifying again gives the same result
+            pass
+    
+    def _classify_worker(self, tiles, messages):
+        """Run the classifier off the main thread, posting progress and the result to messages"""
+        # Only about one progress message per poll interval is posted; the UI shows just the latest
+        last_post = 0.0
+        
         def progress_callback(current, total):
-            self.update_status(f"Classifying tiles... {current}/{total}")
-            self.root.update()
+            nonlocal last_post
+            now = time.monotonic()
+            if now - last_post < CLASSIFY_POLL_MS / 1000 and current < total:
+                return
+            last_post = now
+            messages.put(('progress', current, total))
         
-        self.tile_classifications = self.lulc_classifier.classify_tiles(self.tiles, progress_callback)
+        try:
+            messages.put(('done', self.lulc_classifier.classify_tiles(tiles, progress_callback)))
+        except Exception as e:
+            messages.put(('error', e))
+    
+    def _drain_classify_queue(self, tiles, messages, cache_path):
+        """Apply classifier messages on the main thread; re-arms itself until the worker finishes"""
+        progress = None
+        while True:
+            try:
+                message = messages.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == 'progress':
+                progress = message
+                continue
+            
+            self._classify_running = False
+            if message[0] == 'error':
+                messagebox.showerror("Error", f"Classification failed: {message[1]}")
+                self.update_status("Classification failed")
+            elif tiles is self.tiles:
+                self._store_classification(cache_path, message[1])
+                self._finish_classification(message[1])
+            else:
+                # The grid was rebuilt while classifying, so these results no longer line up
+                self.update_status("Classification discarded: tiles changed")
+            return
         
-        # Update category counts
-        from collections import Counter
-        counts = Counter(self.tile_classifications)
+        # Only the latest progress message is worth drawing
+        if progress is not None:
+            self.update_status(f"Classifying tiles... {progress[1]}/{progress[2]}")
+        self.root.after(CLASSIFY_POLL_MS, self._drain_classify_queue, tiles, messages, cache_path)
+    
+    def _finish_classification(self, classifications):
+        """Store classifier results and refresh the legend and grid"""
+        self.tile_classifications = classifications
         
-        for category in LULCClassifier.CATEGORIES:
-            count = counts.get(category, 0)
-            if category in self.category_counts:
-                self.category_counts[category].config(text=f"{category}: {count}")
+        counts = self.update_category_counts()
         
         # Show legend
         if self.legend_frame and not self.legend_frame.winfo_ismapped():
             self.legend_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=5)
         
         # Refresh display
-        self.display_grid()
+        self.display_grid(force=True)
         
         self.update_status(f"Classification complete! {len(self.tiles)} tiles classified into {len(counts)} categories")
     
+    def update_category_counts(self):
+        """Refresh the legend's per-category counts; returns {category: count} for the categories present"""
+        # Class ids are small integers, so one bincount tallies every class
+        totals = np.bincount(np.asarray(self.tile_classifications, dtype=np.int64),
+                             minlength=len(LULCClassifier.CLASS_NAMES))
+        counts = {LULCClassifier.CLASS_NAMES[i]: int(n) for i, n in enumerate(totals) if n}
+        for category in LULCClassifier.CATEGORIES:
+            if category in self.category_counts:
+                self.category_counts[category].config(text=f"{category}: {counts.get(category, 0)}")
+        return counts
+    
     def export_lulc_tiles(self):
         """Export tiles to category directories"""
-        if not self.tile_classifications:
-            import tkinter.messagebox as messagebox
+        if not len(self.tile_classifications):
             messagebox.showwarning("Warning", "Please classify tiles first using 'Classify LULC' button.")
             return
         
-        from tkinter import filedialog, messagebox
-        import os
         
         # Select base output folder
         base_folder = filedialog.askdirectory(title="Select Base Output Folder for LULC Categories")
         if not base_folder:
             return
         
-        # Create category directories
+        # Create missing category directories; one listing of the base folder finds those that
+        # already exist. Their paths double as filename prefixes below
+        with os.scandir(base_folder) as entries:
+            existing = {entry.name for entry in entries if entry.is_dir()}
+        category_paths = []
         for category in LULCClassifier.CATEGORIES:
             category_path = os.path.join(base_folder, category)
-            os.makedirs(category_path, exist_ok=True)
+            if category not in existing:
+                os.makedirs(category_path, exist_ok=True)
+            category_paths.append(category_path + os.sep)
+        
+        # Encode and write on a small pool; cv2's PNG writes release the GIL
+        classifications = np.asarray(self.tile_classifications)
+        cloud_count = int(np.count_nonzero(classifications == LULCClassifier.CLOUD_ID))
+        # Every tile comes from the current image, so only the grid position varies per name
+        name_template = self.tiles[0]['image_name'] + "_tile_r{:03d}_c{:03d}.png"
+        jobs = []  # (class id, filename, future)
+        pool = ThreadPoolExecutor(max_workers=min(LULC_EXPORT_WORKERS, os.cpu_count() or 1))
+        
+        # Visit each category's tiles together; Cloud has no folder, so it is skipped
+        for class_id, category in enumerate(LULCClassifier.CATEGORIES):
+            category_path = category_paths[class_id]
+            for i in np.flatnonzero(classifications == class_id).tolist():
+                # Save tile to category folder
+                tile_info = self.tiles[i]
+                filename = name_template.format(tile_info['row'], tile_info['col'])
+                filepath = category_path + filename
+                jobs.append((class_id, filename, pool.submit(self._save_lulc_tile, tile_info['tile_img'], filepath)))
         
-        # Export tiles
-        exported_counts = {cat: 0 for cat in LULCClassifier.CATEGORIES}
-        cloud_count = 0
+        pool.shutdown(wait=False)
+        self._poll_lulc_export(jobs, cloud_count, base_folder)
+    
+    def _save_lulc_tile(self, tile_img, filepath):
+        """Write one category tile as a low-compression PNG (runs on a pool thread)"""
+        cv2 = get_cv2()
+        if not cv2.imwrite(filepath, cv2.cvtColor(np.asarray(tile_img), cv2.COLOR_RGB2BGR),
+                           [cv2.IMWRITE_PNG_COMPRESSION, LULC_PNG_COMPRESSION]):
+            raise IOError("PNG encoder failed")
+    
+    def _poll_lulc_export(self, jobs, cloud_count, base_folder):
+        """Report export progress from the main loop until every tile is written, then summarize"""
+        done = sum(1 for _, _, future in jobs if future.done())
+        if done < len(jobs):
+            self.update_status(f"Exporting tiles... {done}/{len(jobs)}")
+            self.root.after(LULC_EXPORT_POLL_MS, self._poll_lulc_export, jobs, cloud_count, base_folder)
+            return
         
-        for i, (tile_info, category) in enumerate(zip(self.tiles, self.tile_classifications)):
-            if category == 'Cloud':
-                cloud_count += 1
-                continue
-            
-            if category in LULCClassifier.CATEGORIES:
-                # Save tile to category folder
-                category_path = os.path.join(base_folder, category)
-                filename = f"{tile_info['image_name']}_tile_r{tile_info['row']:03d}_c{tile_info['col']:03d}.png"
-                filepath = os.path.join(category_path, filename)
-                
-                try:
-                    tile_info['tile_img'].save(filepath)
-                    exported_counts[category] += 1
-                except Exception as e:
-                    messagebox.showerror("Error", f"Failed to save {filename}: {e}")
+        # Results are collected here on the main thread, so the counts need no lock
+        saved_ids = []
+        errors = []
+        for class_id, filename, future in jobs:
+            try:
+                future.result()
+                saved_ids.append(class_id)
+            except Exception as e:
+                errors.append((filename, str(e)))
+        report_export_errors(errors)
+        exported_counts = np.bincount(np.asarray(saved_ids, dtype=np.int64),
+                                      minlength=len(LULCClassifier.CATEGORIES))
+        total_exported = int(exported_counts.sum())
         
         # Show summary
         summary = "LULC Export Summary:\n\n"
-        for category in LULCClassifier.CATEGORIES:
-            count = exported_counts[category]
+        for class_id, category in enumerate(LULCClassifier.CATEGORIES):
+            count = exported_counts[class_id]
             if count > 0:
                 summary += f"{category}: {count} tiles\n"
         
         if cloud_count > 0:
             summary += f"\nCloud filtered: {cloud_count} tiles"
         
-        summary += f"\n\nTotal exported: {sum(exported_counts.values())} tiles"
+        summary += f"\n\nTotal exported: {total_exported} tiles"
         summary += f"\nOutput folder: {base_folder}"
         
         messagebox.showinfo("Export Complete", summary)
-        self.update_status(f"Exported {sum(exported_counts.values())} tiles to category folders")
+        self.update_status(f"Exported {total_exported} tiles to category folders")
     
     def update_category_value(self, category, value_var):
-        """Update category integer value from UI entry"""
+        """Update category integer value from UI entry; return False if it is not a valid mask value"""
         try:
             val = int(value_var.get())
-            self.category_values[category] = val
         except ValueError:
-            pass
+            return True
+        if not 0 <= val <= 255:
+            # Mask pixels are 8-bit, so out-of-range values are rejected and the entry restored
+            messagebox.showerror("Error", f"Mask value for {category} must be between 0 and 255.")
+            value_var.set(str(self.category_values[category]))
+            return False
+        self.category_values[category] = val
+        return True
     
     def save_mask_only(self):
         """Export a single-channel mask image where each pixel has the integer value of its tile's category"""
-        if not self.tile_classifications:
-            import tkinter.messagebox as messagebox
+        if not len(self.tile_classifications):
             messagebox.showwarning("Warning", "Please classify tiles first using 'Classify LULC' button.")
             return
         
         if not self.current_padded_image:
-            import tkinter.messagebox as messagebox
             messagebox.showwarning("Warning", "No image loaded.")
             return
         
-        from tkinter import filedialog, messagebox
-        from PIL import Image
-        import os
-        
-        # Sync category values from UI entries
-        for category, var in self.category_value_vars.items():
-            self.update_category_value(category, var)
+        # Sync category values from UI entries; every entry is checked before giving up
+        synced = [self.update_category_value(category, var)
+                  for category, var in self.category_value_vars.items()]
+        if not all(synced):
+            return
         
         # Get current image name for default filename
-        current_image_path = self.images[self.current_image_index][0]
+        current_image_path = self.images[self.current_image_index]
         image_name = os.path.splitext(os.path.basename(current_image_path))[0]
         
         # Ask user where to save
@@ -407,7 +703,7 @@ class ImageTileSelector:
             return
         
         self.update_status("Exporting mask...")
-        self.root.update()
+        self.root.update_idletasks()
         
         width = self.current_padded_image.width
         height = self.current_padded_image.height
@@ -416,25 +712,16 @@ class ImageTileSelector:
         # Default value for unclassified / cloud pixels
         default_value = 255
         
-        # Create single-channel mask with numpy for speed
-        mask_array = np.full((height, width), default_value, dtype=np.uint8)
+        # Map every class id to its mask value in one lookup, giving one value per grid cell
+        value_lut = np.array([self.category_values.get(category, default_value)
+                              for category in LULCClassifier.CATEGORIES] + [default_value], dtype=np.uint8)
+        classified = min(len(self.tile_classifications), self.tile_rows * self.tile_cols)
+        grid = np.full(self.tile_rows * self.tile_cols, default_value, dtype=np.uint8)
+        grid[:classified] = value_lut[np.asarray(self.tile_classifications[:classified])]
+        grid = grid.reshape(self.tile_rows, self.tile_cols)
         
-        for i, tile_info in enumerate(self.tiles):
-            if i >= len(self.tile_classifications):
-                break
-            
-            category = self.tile_classifications[i]
-            if not category or category == 'Cloud':
-                continue
-            
-            val = self.category_values.get(category, default_value)
-            
-            x1 = tile_info['x']
-            y1 = tile_info['y']
-            x2 = min(x1 + tile_size, width)
-            y2 = min(y1 + tile_size, height)
-            
-            mask_array[y1:y2, x1:x2] = val
+        # Expand each cell to a tile_size square; the padded image is a whole number of tiles
+        mask_array = grid.repeat(tile_size, axis=0).repeat(tile_size, axis=1)[:height, :width]
         
         # Save as grayscale image
         mask_image = Image.fromarray(mask_array, mode='L')
@@ -456,9 +743,6 @@ class ImageTileSelector:
     
     def compute_accuracy_matrix(self):
         """Compare a predicted mask with a ground truth mask and show confusion matrix"""
-        from tkinter import filedialog, messagebox
-        from PIL import Image
-        
         # Ask user to select predicted mask
         pred_path = filedialog.askopenfilename(
             title="Select Predicted Mask (TIF/PNG)",
@@ -476,11 +760,11 @@ class ImageTileSelector:
             return
         
         self.update_status("Loading masks...")
-        self.root.update()
+        self.root.update_idletasks()
         
         try:
-            pred_img = np.array(Image.open(pred_path).convert('L'))
-            gt_img = np.array(Image.open(gt_path).convert('L'))
+            pred_img = np.asarray(Image.open(pred_path).convert('L'))
+            gt_img = np.asarray(Image.open(gt_path).convert('L'))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load masks: {e}")
             return
@@ -595,7 +879,6 @@ class ImageTileSelector:
                     known_values.append(val)
             
             if len(known_values) < 2:
-                from tkinter import messagebox
                 messagebox.showwarning("Warning",
                     "Please assign class names to at least 2 values to compute the matrix.",
                     parent=dialog)
@@ -614,20 +897,26 @@ class ImageTileSelector:
     
     def _compute_and_show_matrix(self, pred_img, gt_img, known_values, value_to_cat):
         """Compute confusion matrix and show results after user defines mapping"""
-        from collections import OrderedDict
-        
         self.update_status("Computing accuracy matrix...")
-        self.root.update()
+        self.root.update_idletasks()
         
         n = len(known_values)
         
-        # Build confusion matrix
-        confusion = np.zeros((n, n), dtype=np.int64)
-        
-        for i, gt_val in enumerate(known_values):
-            gt_mask = (gt_img == gt_val)
-            for j, pred_val in enumerate(known_values):
-                confusion[i][j] = np.sum(pred_img[gt_mask] == pred_val)
+        # Build confusion matrix in one pass: map pixel values to class indices (-1 for values
+        # outside the mapping), then count each (ground truth, predicted) pair with bincount
+        lut = np.full(256, -1, dtype=np.int64)
+        lut[np.asarray(known_values, dtype=np.int64)] = np.arange(n)
+        confusion = None
+        if _kernels.NUMBA_AVAILABLE and gt_img.size > _kernels.CONFUSION_KERNEL_MIN_PIXELS:
+            # Huge masks are streamed by the compiled kernel instead of building index arrays;
+            # it returns None when numba fails to load, leaving the bincount path below
+            confusion = _kernels.confusion_matrix(gt_img, pred_img, lut, n)
+        if confusion is None:
+            gt_index = lut[gt_img.ravel()]
+            pred_index = lut[pred_img.ravel()]
+            valid = (gt_index >= 0) & (pred_index >= 0)
+            pairs = gt_index[valid] * n + pred_index[valid]
+            confusion = np.bincount(pairs, minlength=n * n).reshape(n, n)
         
         # Compute metrics
         total_pixels = np.sum(confusion)
@@ -655,8 +944,6 @@ class ImageTileSelector:
     
     def _colorize_mask(self, mask_array, known_values, value_to_cat, preview_max=400):
         """Convert a grayscale mask to a colorized RGB image for preview"""
-        from PIL import Image
-        
         h, w = mask_array.shape
         
         # Generate distinct colors for each class
@@ -696,8 +983,6 @@ class ImageTileSelector:
     
     def _show_accuracy_window(self, confusion, known_values, value_to_cat, per_class, overall_accuracy, pred_img=None, gt_img=None):
         """Display accuracy matrix results in a new window with mask previews"""
-        from PIL import ImageTk
-        
         win = tk.Toplevel(self.root)
         win.title("LULC Accuracy Matrix")
         win.geometry("900x700")
@@ -899,22 +1184,17 @@ class ImageTileSelector:
     
     def save_mask_image(self):
         """Save the current image with LULC classification mask overlay"""
-        if not self.tile_classifications:
-            import tkinter.messagebox as messagebox
+        if not len(self.tile_classifications):
             messagebox.showwarning("Warning", "Please classify tiles first using 'Classify LULC' button.")
             return
         
         if not self.current_padded_image:
-            import tkinter.messagebox as messagebox
             messagebox.showwarning("Warning", "No image loaded.")
             return
         
-        from tkinter import filedialog, messagebox
-        from PIL import Image, ImageDraw
-        import os
         
         # Get current image name for default filename
-        current_image_path = self.images[self.current_image_index][0]
+        current_image_path = self.images[self.current_image_index]
         image_name = os.path.splitext(os.path.basename(current_image_path))[0]
         
         # Ask user where to save
@@ -928,7 +1208,7 @@ class ImageTileSelector:
             return
         
         self.update_status("Saving mask image...")
-        self.root.update()
+        self.root.update_idletasks()
         
         # Create a copy of the padded image to draw on
         base_image = self.current_padded_image.copy().convert("RGBA")
@@ -943,9 +1223,10 @@ class ImageTileSelector:
             if i >= len(self.tile_classifications):
                 break
             
-            category = self.tile_classifications[i]
-            if not category or category == 'Cloud':
+            class_id = self.tile_classifications[i]
+            if class_id == LULCClassifier.CLOUD_ID:
                 continue
+            category = LULCClassifier.CLASS_NAMES[class_id]
             
             color_hex = LULCClassifier.CATEGORY_COLORS.get(category, '#FFFFFF')
             # Convert hex to RGBA with semi-transparency
@@ -978,10 +1259,12 @@ class ImageTileSelector:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save mask image: {e}")
     
-    def _apply_preprocessing(self):
-        """Apply preprocessing to current image"""
-        if not self.images or self.current_image_index >= len(self.images):
-            return
+    def _preprocessed(self, image_path):
+        """Return the band-corrected RGB image for image_path, reusing recent results"""
+        cached = self._preprocess_cache.get(image_path)
+        if cached is not None:
+            self._preprocess_cache.move_to_end(image_path)
+            return cached
         
         # Initialize classifier if needed
         if not self.lulc_classifier:
@@ -991,44 +1274,39 @@ class ImageTileSelector:
                 cloud_threshold=0.7
             )
         
-        current_image_path, current_image = self.images[self.current_image_index]
-        
-        # Convert PIL to numpy array (BGR)
-        img_array = cv2.cvtColor(np.array(current_image), cv2.COLOR_RGB2BGR)
+        # Band correction treats red and blue alike, so the RGB pixels are used as they are
+        img_array = np.asarray(open_image(image_path))
         
         # Apply preprocessing
         stats = self.lulc_classifier.analyze_image_bands(img_array)
         corrected_img = self.lulc_classifier.apply_band_correction(img_array, stats)
         
-        # Convert back to PIL RGB
-        corrected_rgb = cv2.cvtColor(corrected_img, cv2.COLOR_BGR2RGB)
-        from PIL import Image
-        self.preprocessed_image = Image.fromarray(corrected_rgb)
+        corrected = Image.fromarray(corrected_img)
+        
+        self._preprocess_cache[image_path] = corrected
+        if len(self._preprocess_cache) > IMAGE_CACHE_SIZE:
+            self._preprocess_cache.popitem(last=False)
+        return corrected
+    
+    def _apply_preprocessing(self):
+        """Apply preprocessing to current image"""
+        if not self.images or self.current_image_index >= len(self.images):
+            return
+        
+        self.preprocessed_image = self._preprocessed(self.images[self.current_image_index])
     
     def _save_preprocessed_image(self):
         """Save preprocessed image with CLAHE and color correction"""
-        import os
-        from tkinter import filedialog
+        cv2 = get_cv2()
         
         if not self.images or self.current_image_index >= len(self.images):
             return
         
-        current_image_path, current_image = self.images[self.current_image_index]
+        current_image_path = self.images[self.current_image_index]
         image_name = os.path.splitext(os.path.basename(current_image_path))[0]
         
-        # Convert PIL to numpy array (BGR)
-        img_array = cv2.cvtColor(np.array(current_image), cv2.COLOR_RGB2BGR)
-        
-        # Apply preprocessing
-        if not self.lulc_classifier:
-            self.lulc_classifier = LULCClassifier(
-                apply_color_correction=True,
-                filter_clouds=True,
-                cloud_threshold=0.7
-            )
-        
-        stats = self.lulc_classifier.analyze_image_bands(img_array)
-        corrected_img = self.lulc_classifier.apply_band_correction(img_array, stats)
+        # Shares results with the display toggle, so band analysis runs once per image
+        corrected = self._preprocessed(current_image_path)
         
         # Ask user where to save
         default_name = f"{image_name}_preprocessed.tif"
@@ -1040,7 +1318,7 @@ class ImageTileSelector:
         )
         
         if save_path:
-            cv2.imwrite(save_path, corrected_img)
+            cv2.imwrite(save_path, cv2.cvtColor(np.asarray(corrected), cv2.COLOR_RGB2BGR))
             self.update_status(f"Saved preprocessed image to: {save_path}")
 
 
@@ -2,7 +2,30 @@
 Canvas Handler Module for Tile Selector
 Manages canvas display, zoom, and tile rendering
 """
-from PIL import Image, ImageTk
+import math
+from PIL import Image, ImageDraw, ImageTk
+
+from ._kernels import line_tiles
+from .lulc_classifier import LULCClassifier
+
+# Extra area rendered around the visible canvas region, as a fraction of the viewport size,
+# so small scrolls do not need a re-render
+VIEWPORT_MARGIN = 0.5
+
+# Color of the tile grid lines drawn into the displayed image
+GRID_COLOR = "#555555"
+
+# Selection highlight colors (RGBA) painted into the selection layer
+SELECTION_OUTLINE = (0, 255, 0, 255)
+SELECTION_FILL = (0, 255, 0, 40)
+SELECTION_CHECK = (0, 0, 0, 255)
+CLEAR = (0, 0, 0, 0)
+
+# Pyramid levels are halved until their shorter side would drop below this many pixels
+PYRAMID_MIN_SIZE = 512
+
+# Idle time after a zoom change before the fast preview is replaced by a high-quality resample
+ZOOM_REFINE_DELAY_MS = 150
 
 
 class CanvasHandler:
@@ -11,11 +34,36 @@ class CanvasHandler:
     def __init__(self, app):
         self.app = app
         self.overlay_image_cache = {}
+        self._dirty_tiles = set()  # tiles whose selection highlight must be redrawn
+        self._dirty_flush_pending = False
+        self._zoom_refine_after = None
+        self._base_image_id = None
+        self._view_box = None  # (x0, y0, x1, y1) canvas region covered by the rendered images
+        self._view_refresh_pending = False
+        self._selection_layer = None  # RGBA image holding the selection highlights in the view box
+        self._selection_photo = None
+        self._selection_image_id = None
+        self._last_render_key = None  # View state of the last full redraw
+        self._last_drag_tile = None  # Tile reached by the previous drag-select event
+        self._overlay_items = {}  # Tile index -> canvas id of its tinted classification overlay
+        self._pyramid = []  # current_padded_image followed by successively halved copies
+        
+    def display_grid(self, force=False):
+        """Display tile grid on canvas; skipped when the view state is unchanged unless forced"""
+        # Selection edits and hover changes update the canvas incrementally, so only view state
+        # is compared here; callers that change the image, tiles or classifications pass force=True
+        render_key = (self.app.zoom_level, self.app.overlay_visible)
+        if not force and render_key == self._last_render_key:
+            return
+        self._last_render_key = render_key
         
-    def display_grid(self):
-        """Display tile grid on canvas"""
         self.app.canvas.delete("all")
+        self._overlay_items.clear()
+        self._base_image_id = None
+        self._selection_image_id = None
         if not hasattr(self.app, 'current_padded_image') or not self.app.current_padded_image:
+            self._last_render_key = None
+            self._view_box = None
             return
         
         # Calculate zoomed dimensions
@@ -24,15 +72,19 @@ class CanvasHandler:
         zoomed_width = int(padded_width * self.app.zoom_level)
         zoomed_height = int(padded_height * self.app.zoom_level)
         
-        # Resize padded image for display
-        display_image = self.app.current_padded_image.resize((zoomed_width, zoomed_height), resample=1)
-        self.app.display_image_tk = ImageTk.PhotoImage(display_image)
+        # Update scroll region first so the visible area reflects the final view
+        self.app.canvas.config(scrollregion=(0, 0, zoomed_width, zoomed_height))
         
-        # Display image
-        self.app.canvas.create_image(0, 0, anchor='nw', image=self.app.display_image_tk)
+        # Render only the visible part of the zoomed image (plus a margin)
+        self._view_box = self._visible_box(VIEWPORT_MARGIN)
+        self.app.display_image_tk = self._render_view(Image.Resampling.NEAREST)
+        self._base_image_id = self.app.canvas.create_image(self._view_box[0], self._view_box[1], anchor='nw',
+                                                           image=self.app.display_image_tk)
+        self._schedule_refine()
         
-        # Draw grid lines and tile overlays
+        # Draw tile overlays
         tile_size_zoomed = int(self.app.tile_size * self.app.zoom_level)
+        selected_set = self._selection_set()
         
         for i, tile in enumerate(self.app.tiles):
             x = int(tile['x'] * self.app.zoom_level)
@@ -40,84 +92,256 @@ class CanvasHandler:
             x2 = x + tile_size_zoomed
             y2 = y + tile_size_zoomed
             
-            # Draw grid lines
-            self.app.canvas.create_rectangle(x, y, x2, y2, outline="#555555", width=1, tags=f"tile_{i}")
-            
             # If classified, show category color overlay (only if overlay is visible)
-            if (hasattr(self.app, 'tile_classifications') and self.app.tile_classifications and 
+            if (hasattr(self.app, 'tile_classifications') and len(self.app.tile_classifications) and 
                 hasattr(self.app, 'overlay_visible') and self.app.overlay_visible):
                 if i < len(self.app.tile_classifications):
-                    category = self.app.tile_classifications[i]
-                    if category and category != 'Cloud':
-                        from .lulc_classifier import LULCClassifier
+                    class_id = self.app.tile_classifications[i]
+                    if class_id != LULCClassifier.CLOUD_ID:
+                        category = LULCClassifier.CLASS_NAMES[class_id]
                         color = LULCClassifier.CATEGORY_COLORS.get(category, '#FFFFFF')
                         
-                        if self.app.hand_tool_active and self.app.hover_tile_index == i:
-                            self.app.canvas.create_rectangle(x, y, x2, y2, outline=color, width=2, tags=f"tile_{i}")
-                        else:
-                            overlay_image = self._get_overlay_image(color, tile_size_zoomed, alpha=70)
-                            self.app.canvas.create_image(x, y, anchor='nw', image=overlay_image, 
-                                                         tags=(f"overlay_{i}", f"tile_{i}"))
-                            self.app.canvas.create_rectangle(x, y, x2, y2, outline=color, width=2, tags=f"tile_{i}")
-            
-            # Highlight selected tiles (for manual adjustment or batch category assignment)
-            selected_set = self.app.selected_tiles_for_category if (hasattr(self.app, 'tile_classifications') and self.app.tile_classifications) else self.app.selected_tiles
-            
-            if i in selected_set:
-                self.app.canvas.create_rectangle(x, y, x2, y2, outline="#00ff00", width=3, tags=f"tile_{i}")
-                # Add semi-transparent overlay
-                self.app.canvas.create_rectangle(x, y, x2, y2, stipple="gray50", tags=f"tile_{i}")
-                # Add checkmark
-                center_x = (x + x2) // 2
-                center_y = (y + y2) // 2
-                self.app.canvas.create_text(center_x, center_y, text="✓",  
-                                           font=('Arial', int(20 * self.app.zoom_level), 'bold'), tags=f"tile_{i}")
-        
-        # Update scroll region
-        self.app.canvas.config(scrollregion=(0, 0, zoomed_width, zoomed_height))
+                        # The hovered tile keeps its overlay item, hidden, so hover changes only flip states
+                        hovered = self.app.hand_tool_active and self.app.hover_tile_index == i
+                        overlay_image = self._get_overlay_image(color, tile_size_zoomed, alpha=70)
+                        self._overlay_items[i] = self.app.canvas.create_image(
+                            x, y, anchor='nw', image=overlay_image, state='hidden' if hovered else 'normal',
+                            tags=(f"overlay_{i}", f"tile_{i}"))
+                        self.app.canvas.create_rectangle(x, y, x2, y2, outline=color, width=2, tags=f"tile_{i}")
+        
+        # Highlight selected tiles (for manual adjustment or batch category assignment)
+        # as one composited image instead of several canvas items per tile
+        self._selection_layer = None
+        self._selection_photo = None
+        if selected_set:
+            self._create_selection_layer(selected_set)
+        
+        # Any pending per-tile updates are covered by this full redraw
+        self._dirty_tiles.clear()
         
         status_msg = f"Image {self.app.current_image_index + 1}/{len(self.app.images)} | {len(self.app.tiles)} tiles | Zoom: {int(self.app.zoom_level * 100)}%"
-        if hasattr(self.app, 'tile_classifications') and self.app.tile_classifications:
+        if hasattr(self.app, 'tile_classifications') and len(self.app.tile_classifications):
             status_msg += " | Classified"
         self.app.update_status(status_msg)
 
+    def _visible_box(self, margin):
+        """Return the visible canvas region grown by a fraction of the viewport, clamped to the image"""
+        canvas = self.app.canvas
+        zoomed_width = int(self.app.current_padded_image.width * self.app.zoom_level)
+        zoomed_height = int(self.app.current_padded_image.height * self.app.zoom_level)
+        left = int(canvas.canvasx(0))
+        top = int(canvas.canvasy(0))
+        width = canvas.winfo_width()
+        height = canvas.winfo_height()
+        margin_x = int(width * margin)
+        margin_y = int(height * margin)
+        x0 = min(max(left - margin_x, 0), zoomed_width - 1)
+        y0 = min(max(top - margin_y, 0), zoomed_height - 1)
+        x1 = max(min(left + width + margin_x, zoomed_width), x0 + 1)
+        y1 = max(min(top + height + margin_y, zoomed_height), y0 + 1)
+        return x0, y0, x1, y1
+    
+    def _pyramid_level(self, zoom):
+        """Return the coarsest pyramid level with at least the zoomed resolution"""
+        image = self.app.current_padded_image
+        if not self._pyramid or self._pyramid[0] is not image:
+            self._pyramid = [image]
+        level = max(0, int(-math.log2(zoom))) if zoom < 1.0 else 0
+        # Levels are built on first use, so zooming out pays for them only once per image
+        while len(self._pyramid) <= level:
+            previous = self._pyramid[-1]
+            if min(previous.size) // 2 < PYRAMID_MIN_SIZE:
+                break
+            self._pyramid.append(previous.reduce(2))
+        return self._pyramid[min(level, len(self._pyramid) - 1)]
+    
+    def _render_view(self, resample):
+        """Render the view box of the zoomed image with its tile grid as a PhotoImage"""
+        image = self.app.current_padded_image
+        zoom = self.app.zoom_level
+        x0, y0, x1, y1 = self._view_box
+        if zoom == 1.0:
+            region = image.crop(self._view_box)
+        else:
+            # Resample straight from the matching rectangle of the closest pyramid level;
+            # no full-size zoomed copy is made and zoomed-out views touch far fewer pixels
+            source = self._pyramid_level(zoom)
+            scale_x = zoom * image.width / source.width
+            scale_y = zoom * image.height / source.height
+            source_box = (x0 / scale_x, y0 / scale_y, x1 / scale_x, y1 / scale_y)
+            region = source.resize((x1 - x0, y1 - y0), resample=resample, box=source_box,
+                                  reducing_gap=None if resample == Image.Resampling.NEAREST else 2.0)
+        return ImageTk.PhotoImage(self._draw_grid(region, x0, y0))
+    
+    def _draw_grid(self, region, x0, y0):
+        """Draw the tile grid lines crossing a rendered region whose top-left is at (x0, y0)"""
+        draw = ImageDraw.Draw(region)
+        width, height = region.size
+        step = self.app.tile_size * self.app.zoom_level
+        tile_size_zoomed = int(step)
+        first_col = max(int(x0 // step) - 1, 0)
+        last_col = min(int((x0 + width) // step) + 1, self.app.tile_cols - 1)
+        for col in range(first_col, last_col + 1):
+            x = int(col * step) - x0
+            for line_x in (x, x + tile_size_zoomed):
+                if 0 <= line_x < width:
+                    draw.line([(line_x, 0), (line_x, height - 1)], fill=GRID_COLOR)
+        first_row = max(int(y0 // step) - 1, 0)
+        last_row = min(int((y0 + height) // step) + 1, self.app.tile_rows - 1)
+        for row in range(first_row, last_row + 1):
+            y = int(row * step) - y0
+            for line_y in (y, y + tile_size_zoomed):
+                if 0 <= line_y < height:
+                    draw.line([(0, line_y), (width - 1, line_y)], fill=GRID_COLOR)
+        return region
+    
+    def _schedule_refine(self):
+        """Replace the fast preview with a high-quality resample once zooming or scrolling pauses"""
+        if self._zoom_refine_after is not None:
+            self.app.canvas.after_cancel(self._zoom_refine_after)
+            self._zoom_refine_after = None
+        if self.app.zoom_level != 1.0:
+            self._zoom_refine_after = self.app.canvas.after(ZOOM_REFINE_DELAY_MS, self._refine_view)
+    
+    def _refine_view(self):
+        """Re-render the current view box with a high-quality resample"""
+        self._zoom_refine_after = None
+        if self._view_box is None or self._base_image_id is None:
+            return
+        photo = self._render_view(Image.Resampling.LANCZOS)
+        self.app.canvas.itemconfigure(self._base_image_id, image=photo)
+        self.app.display_image_tk = photo
+    
+    def on_view_changed(self, event=None):
+        """Schedule a viewport refresh after scrolling or resizing"""
+        if self._view_box is not None and not self._view_refresh_pending:
+            self._view_refresh_pending = True
+            self.app.canvas.after_idle(self._refresh_view)
+    
+    def _refresh_view(self):
+        """Re-render the base and selection images if the view left the rendered region"""
+        self._view_refresh_pending = False
+        if self._view_box is None or self._base_image_id is None or self.app.current_padded_image is None:
+            return
+        vx0, vy0, vx1, vy1 = self._visible_box(0)
+        x0, y0, x1, y1 = self._view_box
+        if x0 <= vx0 and y0 <= vy0 and vx1 <= x1 and vy1 <= y1:
+            return
+        
+        self._view_box = self._visible_box(VIEWPORT_MARGIN)
+        self.app.display_image_tk = self._render_view(Image.Resampling.NEAREST)
+        self.app.canvas.itemconfigure(self._base_image_id, image=self.app.display_image_tk)
+        self.app.canvas.coords(self._base_image_id, self._view_box[0], self._view_box[1])
+        self._schedule_refine()
+        
+        selected_set = self._selection_set()
+        if selected_set or self._selection_layer is not None:
+            self._create_selection_layer(selected_set)
+    
+    def _selection_set(self):
+        """Return the set of selected tiles shown on the canvas"""
+        if hasattr(self.app, 'tile_classifications') and len(self.app.tile_classifications):
+            return self.app.selected_tiles_for_category
+        return self.app.selected_tiles
+    
+    def _create_selection_layer(self, selected_set):
+        """Paint the given tiles into a new selection layer covering the view box"""
+        x0, y0, x1, y1 = self._view_box
+        self._selection_layer = Image.new('RGBA', (x1 - x0, y1 - y0), CLEAR)
+        draw = ImageDraw.Draw(self._selection_layer)
+        for i in selected_set:
+            if i < len(self.app.tiles):
+                self._paint_tile_selection(draw, i, True)
+        self._selection_photo = ImageTk.PhotoImage(self._selection_layer)
+        if self._selection_image_id is None:
+            self._selection_image_id = self.app.canvas.create_image(x0, y0, anchor='nw', image=self._selection_photo)
+        else:
+            self.app.canvas.itemconfigure(self._selection_image_id, image=self._selection_photo)
+            self.app.canvas.coords(self._selection_image_id, x0, y0)
+    
+    def _paint_tile_selection(self, draw, i, selected):
+        """Paint or clear the selection highlight of one tile in the selection layer"""
+        tile = self.app.tiles[i]
+        tile_size_zoomed = int(self.app.tile_size * self.app.zoom_level)
+        x = int(tile['x'] * self.app.zoom_level) - self._view_box[0]
+        y = int(tile['y'] * self.app.zoom_level) - self._view_box[1]
+        width, height = self._selection_layer.size
+        if x >= width or y >= height or x + tile_size_zoomed <= 0 or y + tile_size_zoomed <= 0:
+            return  # Outside the rendered region
+        # Stay inside the tile so clearing it never erases a neighbour's outline
+        box = [x, y, x + tile_size_zoomed - 1, y + tile_size_zoomed - 1]
+        if not selected:
+            draw.rectangle(box, fill=CLEAR)
+            return
+        draw.rectangle(box, fill=SELECTION_FILL, outline=SELECTION_OUTLINE, width=3)
+        # Checkmark
+        center_x = x + tile_size_zoomed // 2
+        center_y = y + tile_size_zoomed // 2
+        size = max(int(10 * self.app.zoom_level), 2)
+        draw.line([(center_x - size, center_y), (center_x - size // 3, center_y + size * 2 // 3),
+                   (center_x + size, center_y - size * 2 // 3)],
+                  fill=SELECTION_CHECK, width=max(int(3 * self.app.zoom_level), 1), joint="curve")
+    
+    def _mark_tile_dirty(self, i):
+        """Queue a selection highlight update for one tile, flushed once the event queue is idle"""
+        self._dirty_tiles.add(i)
+        if not self._dirty_flush_pending:
+            self._dirty_flush_pending = True
+            self.app.canvas.after_idle(self._flush_dirty_tiles)
+    
+    def _flush_dirty_tiles(self):
+        """Repaint the selection highlight of the tiles changed since the last flush"""
+        self._dirty_flush_pending = False
+        if not self._dirty_tiles or not self.app.tiles or self._view_box is None:
+            self._dirty_tiles.clear()
+            return
+        
+        selected_set = self._selection_set()
+        dirty = [i for i in self._dirty_tiles if i < len(self.app.tiles)]
+        self._dirty_tiles.clear()
+        if self._selection_layer is None:
+            # Nothing was selected at the last full redraw: start a layer for the new selection
+            self._create_selection_layer([i for i in dirty if i in selected_set])
+            return
+        
+        draw = ImageDraw.Draw(self._selection_layer)
+        for i in dirty:
+            self._paint_tile_selection(draw, i, i in selected_set)
+        # One upload of the layer covers every tile changed in this batch
+        self._selection_photo.paste(self._selection_layer)
+    
     def zoom_in(self):
         """Zoom in by 20%"""
-        if self.app.zoom_level < self.app.max_zoom:
-            # Get current center position
-            x_center = (self.app.canvas.canvasx(0) + self.app.canvas.canvasx(self.app.canvas.winfo_width())) / 2
-            y_center = (self.app.canvas.canvasy(0) + self.app.canvas.canvasy(self.app.canvas.winfo_height())) / 2
-            
-            old_zoom = self.app.zoom_level
-            self.app.zoom_level = min(self.app.zoom_level * 1.2, self.app.max_zoom)
-            self.app.zoom_label.config(text=f"{int(self.app.zoom_level * 100)}%")
-            self.display_grid()
-            
-            # Recenter on the same point
-            zoom_ratio = self.app.zoom_level / old_zoom
-            new_x_center = x_center * zoom_ratio
-            new_y_center = y_center * zoom_ratio
-            self.app.canvas.xview_moveto((new_x_center - self.app.canvas.winfo_width() / 2) / (self.app.current_padded_image.width * self.app.zoom_level))
-            self.app.canvas.yview_moveto((new_y_center - self.app.canvas.winfo_height() / 2) / (self.app.current_padded_image.height * self.app.zoom_level))
+        self.zoom_steps(1)
     
     def zoom_out(self):
         """Zoom out by 20%"""
-        if self.app.zoom_level > self.app.min_zoom:
-            # Get current center position
-            x_center = (self.app.canvas.canvasx(0) + self.app.canvas.canvasx(self.app.canvas.winfo_width())) / 2
-            y_center = (self.app.canvas.canvasy(0) + self.app.canvas.canvasy(self.app.canvas.winfo_height())) / 2
-            
-            old_zoom = self.app.zoom_level
-            self.app.zoom_level = max(self.app.zoom_level / 1.2, self.app.min_zoom)
-            self.app.zoom_label.config(text=f"{int(self.app.zoom_level * 100)}%")
-            self.display_grid()
-            
-            # Recenter on the same point
-            zoom_ratio = self.app.zoom_level / old_zoom
-            new_x_center = x_center * zoom_ratio
-            new_y_center = y_center * zoom_ratio
-            self.app.canvas.xview_moveto((new_x_center - self.app.canvas.winfo_width() / 2) / (self.app.current_padded_image.width * self.app.zoom_level))
-            self.app.canvas.yview_moveto((new_y_center - self.app.canvas.winfo_height() / 2) / (self.app.current_padded_image.height * self.app.zoom_level))
+        self.zoom_steps(-1)
+    
+    def zoom_steps(self, steps):
+        """Zoom by 20% per step (negative steps zoom out), redrawing once"""
+        old_zoom = self.app.zoom_level
+        new_zoom = min(max(old_zoom * 1.2 ** steps, self.app.min_zoom), self.app.max_zoom)
+        if new_zoom == old_zoom:
+            return
+        
+        # Get current center position
+        x_center = (self.app.canvas.canvasx(0) + self.app.canvas.canvasx(self.app.canvas.winfo_width())) / 2
+        y_center = (self.app.canvas.canvasy(0) + self.app.canvas.canvasy(self.app.canvas.winfo_height())) / 2
+        
+        self.app.zoom_level = new_zoom
+        self.app.zoom_label.config(text=f"{int(self.app.zoom_level * 100)}%")
+        
+        # Recenter on the same point before redrawing, so only the final viewport is rendered
+        zoomed_width = self.app.current_padded_image.width * self.app.zoom_level
+        zoomed_height = self.app.current_padded_image.height * self.app.zoom_level
+        self.app.canvas.config(scrollregion=(0, 0, int(zoomed_width), int(zoomed_height)))
+        zoom_ratio = self.app.zoom_level / old_zoom
+        new_x_center = x_center * zoom_ratio
+        new_y_center = y_center * zoom_ratio
+        self.app.canvas.xview_moveto((new_x_center - self.app.canvas.winfo_width() / 2) / zoomed_width)
+        self.app.canvas.yview_moveto((new_y_center - self.app.canvas.winfo_height() / 2) / zoomed_height)
+        self.display_grid()
     
     def zoom_reset(self):
         """Reset zoom to 100%"""
@@ -139,12 +363,13 @@ class CanvasHandler:
         else:
             self.app.canvas.xview_scroll(1, "units")
     
-    def on_mouse_wheel(self, event):
-        """Handle mouse wheel scrolling (touchpad two-finger scroll)"""
-        if event.delta > 0:
-            self.app.canvas.yview_scroll(-1, "units")
-        else:
-            self.app.canvas.yview_scroll(1, "units")
+    def on_mouse_wheel(self, delta):
+        """Handle mouse wheel scrolling (touchpad two-finger scroll), given the raw wheel delta"""
+        self.scroll_units(-1 if int(delta) > 0 else 1)
+    
+    def scroll_units(self, units):
+        """Scroll the canvas vertically by a number of units (negative scrolls up)"""
+        self.app.canvas.yview_scroll(units, "units")
     
     def on_drag_start(self, event):
         """Start drag scrolling with middle mouse button"""
@@ -174,10 +399,11 @@ class CanvasHandler:
         
         # Find the tile at click position
         tile_index = self._get_tile_at_position(x, y)
+        self._last_drag_tile = tile_index
         
         if tile_index is not None:
             # If classifications exist, use selected_tiles_for_category for batch assignment
-            if hasattr(self.app, 'tile_classifications') and self.app.tile_classifications:
+            if hasattr(self.app, 'tile_classifications') and len(self.app.tile_classifications):
                 if tile_index in self.app.selected_tiles_for_category:
                     self.app.selection_mode = 'remove'
                     self.app.selected_tiles_for_category.remove(tile_index)
@@ -195,74 +421,80 @@ class CanvasHandler:
                     self.app.selected_tiles.add(tile_index)
                     self.app.tiles[tile_index]['selected'] = True
             
-            self.display_grid()
+            self._mark_tile_dirty(tile_index)
             
-            if hasattr(self.app, 'tile_classifications') and self.app.tile_classifications:
+            if hasattr(self.app, 'tile_classifications') and len(self.app.tile_classifications):
                 self.app.update_status(f"Selected {len(self.app.selected_tiles_for_category)} tiles for batch category assignment | Right-click to assign category")
             else:
                 self.app.update_status(f"Displaying {len(self.app.tiles)} tiles | Zoom: {int(self.app.zoom_level * 100)}% | {len(self.app.selected_tiles)} selected")
     
-    def on_canvas_drag(self, event):
-        """Handle canvas drag to select multiple tiles"""
+    def on_canvas_drag(self, event_x, event_y):
+        """Handle canvas drag to select multiple tiles, given the pointer's window coordinates"""
         if not self.app.is_selecting or self.app.selection_mode is None:
             return
         
-        x, y = self.app.canvas.canvasx(event.x), self.app.canvas.canvasy(event.y)
+        x, y = self.app.canvas.canvasx(event_x), self.app.canvas.canvasy(event_y)
         
         # Find the tile at current position
         tile_index = self._get_tile_at_position(x, y)
+        if tile_index is None:
+            return
         
-        if tile_index is not None:
-            # If classifications exist, use selected_tiles_for_category
-            if hasattr(self.app, 'tile_classifications') and self.app.tile_classifications:
-                if self.app.selection_mode == 'add':
-                    if tile_index not in self.app.selected_tiles_for_category:
-                        self.app.selected_tiles_for_category.add(tile_index)
-                        self.display_grid()
-                        self.app.update_status(f"Selected {len(self.app.selected_tiles_for_category)} tiles for batch category assignment")
-                elif self.app.selection_mode == 'remove':
-                    if tile_index in self.app.selected_tiles_for_category:
-                        self.app.selected_tiles_for_category.remove(tile_index)
-                        self.display_grid()
-                        self.app.update_status(f"Selected {len(self.app.selected_tiles_for_category)} tiles for batch category assignment")
+        # Motion events are coalesced, so also cover the tiles crossed since the last one
+        if self._last_drag_tile is None:
+            path = (tile_index,)
+        else:
+            cols = self.app.tile_cols
+            r0, c0 = divmod(self._last_drag_tile, cols)
+            r1, c1 = divmod(tile_index, cols)
+            path = line_tiles(r0, c0, r1, c1, cols).tolist()
+        self._last_drag_tile = tile_index
+        
+        # If classifications exist, use selected_tiles_for_category
+        classified = hasattr(self.app, 'tile_classifications') and len(self.app.tile_classifications) > 0
+        selected = self.app.selected_tiles_for_category if classified else self.app.selected_tiles
+        adding = self.app.selection_mode == 'add'
+        changed = False
+        for i in path:
+            if (i in selected) == adding:
+                continue
+            if adding:
+                selected.add(i)
             else:
-                # Normal selection mode
-                if self.app.selection_mode == 'add':
-                    if tile_index not in self.app.selected_tiles:
-                        self.app.selected_tiles.add(tile_index)
-                        self.app.tiles[tile_index]['selected'] = True
-                        self.display_grid()
-                        self.app.update_status(f"Displaying {len(self.app.tiles)} tiles | Zoom: {int(self.app.zoom_level * 100)}% | {len(self.app.selected_tiles)} selected")
-                elif self.app.selection_mode == 'remove':
-                    if tile_index in self.app.selected_tiles:
-                        self.app.selected_tiles.remove(tile_index)
-                        self.app.tiles[tile_index]['selected'] = False
-                        self.display_grid()
-                        self.app.update_status(f"Displaying {len(self.app.tiles)} tiles | Zoom: {int(self.app.zoom_level * 100)}% | {len(self.app.selected_tiles)} selected")
+                selected.remove(i)
+            if not classified:
+                self.app.tiles[i]['selected'] = adding
+            self._mark_tile_dirty(i)
+            changed = True
+        
+        if changed:
+            if classified:
+                self.app.update_status(f"Selected {len(self.app.selected_tiles_for_category)} tiles for batch category assignment")
+            else:
+                self.app.update_status(f"Displaying {len(self.app.tiles)} tiles | Zoom: {int(self.app.zoom_level * 100)}% | {len(self.app.selected_tiles)} selected")
     
     def on_canvas_release(self, event):
         """Handle mouse button release to end selection"""
         self.app.is_selecting = False
         self.app.selection_mode = None
+        self._last_drag_tile = None
     
     def _get_tile_at_position(self, x, y):
         """Get tile index at given canvas position"""
-        tile_size_zoomed = int(self.app.tile_size * self.app.zoom_level)
-        
-        for i, tile in enumerate(self.app.tiles):
-            tile_x = int(tile['x'] * self.app.zoom_level)
-            tile_y = int(tile['y'] * self.app.zoom_level)
-            tile_x2 = tile_x + tile_size_zoomed
-            tile_y2 = tile_y + tile_size_zoomed
-            
-            if tile_x <= x <= tile_x2 and tile_y <= y <= tile_y2:
-                return i
-        
-        return None
+        if not self.app.tiles or x < 0 or y < 0:
+            return None
+        
+        # Tiles form a regular row-major grid, so the index follows from the position
+        tile_size_zoomed = self.app.tile_size * self.app.zoom_level
+        col = int(x // tile_size_zoomed)
+        row = int(y // tile_size_zoomed)
+        if col >= self.app.tile_cols or row >= self.app.tile_rows:
+            return None
+        return row * self.app.tile_cols + col
     
     def on_right_click(self, event):
         """Handle right-click to change tile category"""
-        if not hasattr(self.app, 'tile_classifications') or not self.app.tile_classifications:
+        if not hasattr(self.app, 'tile_classifications') or not len(self.app.tile_classifications):
             return
         
         # Check if there are selected tiles for batch assignment
@@ -278,12 +510,13 @@ class CanvasHandler:
     def _show_category_menu(self, event, tile_index):
         """Show category selection menu for a tile"""
         import tkinter as tk
-        from .lulc_classifier import LULCClassifier
         
         menu = tk.Menu(self.app.root, tearoff=0, bg="#2d2d2d", fg="white",
                       activebackground="#0e639c", activeforeground="white")
         
-        current_category = self.app.tile_classifications[tile_index] if tile_index < len(self.app.tile_classifications) else None
+        current_category = None
+        if tile_index < len(self.app.tile_classifications):
+            current_category = LULCClassifier.CLASS_NAMES[self.app.tile_classifications[tile_index]]
         
         for category in LULCClassifier.CATEGORIES:
             color = LULCClassifier.CATEGORY_COLORS[category]
@@ -311,27 +544,19 @@ class CanvasHandler:
     def _change_tile_category(self, tile_index, new_category):
         """Change the category of a specific tile"""
         if tile_index < len(self.app.tile_classifications):
-            old_category = self.app.tile_classifications[tile_index]
-            self.app.tile_classifications[tile_index] = new_category
+            old_category = LULCClassifier.CLASS_NAMES[self.app.tile_classifications[tile_index]]
+            self.app.tile_classifications[tile_index] = LULCClassifier.CLASS_IDS[new_category]
             
             # Update category counts
-            from collections import Counter
-            from .lulc_classifier import LULCClassifier
-            
-            counts = Counter(self.app.tile_classifications)
-            for category in LULCClassifier.CATEGORIES:
-                count = counts.get(category, 0)
-                if category in self.app.category_counts:
-                    self.app.category_counts[category].config(text=f"{category}: {count}")
+            self.app.update_category_counts()
             
             # Refresh display
-            self.app.display_grid()
+            self.app.display_grid(force=True)
             self.app.update_status(f"Changed tile category from {old_category} to {new_category}")
     
     def _show_batch_category_menu(self, event):
         """Show category selection menu for batch assignment"""
         import tkinter as tk
-        from .lulc_classifier import LULCClassifier
         
         menu = tk.Menu(self.app.root, tearoff=0, bg="#2d2d2d", fg="white",
                       activebackground="#0e639c", activeforeground="white")
@@ -365,27 +590,19 @@ class CanvasHandler:
     
     def _batch_assign_category(self, new_category):
         """Assign category to all selected tiles"""
-        from collections import Counter
-        from .lulc_classifier import LULCClassifier
-        
-        count = 0
-        for tile_index in self.app.selected_tiles_for_category:
-            if tile_index < len(self.app.tile_classifications):
-                self.app.tile_classifications[tile_index] = new_category
-                count += 1
+        # One fancy-indexed store assigns every selected tile
+        indices = [i for i in self.app.selected_tiles_for_category if i < len(self.app.tile_classifications)]
+        self.app.tile_classifications[indices] = LULCClassifier.CLASS_IDS[new_category]
+        count = len(indices)
         
         # Update category counts
-        counts = Counter(self.app.tile_classifications)
-        for category in LULCClassifier.CATEGORIES:
-            cat_count = counts.get(category, 0)
-            if category in self.app.category_counts:
-                self.app.category_counts[category].config(text=f"{category}: {cat_count}")
+        self.app.update_category_counts()
         
         # Clear selection
         self.app.selected_tiles_for_category.clear()
         
         # Refresh display
-        self.app.display_grid()
+        self.app.display_grid(force=True)
         self.app.update_status(f"Assigned {count} tiles to category: {new_category}")
 
     def _get_overlay_image(self, color, size, alpha=70):
@@ -408,18 +625,26 @@ class CanvasHandler:
         b = int(hex_color[4:6], 16)
         return (r, g, b, alpha)
     
-    def on_mouse_motion(self, event):
-        """Handle mouse motion for hand tool hover effect"""
+    def on_mouse_motion(self, event_x, event_y):
+        """Handle mouse motion for hand tool hover effect, given the pointer's window coordinates"""
         if not self.app.hand_tool_active:
             return
         
-        if not hasattr(self.app, 'tile_classifications') or not self.app.tile_classifications:
+        if not hasattr(self.app, 'tile_classifications') or not len(self.app.tile_classifications):
             return
         
-        x, y = self.app.canvas.canvasx(event.x), self.app.canvas.canvasy(event.y)
+        x, y = self.app.canvas.canvasx(event_x), self.app.canvas.canvasy(event_y)
         tile_index = self._get_tile_at_position(x, y)
         
-        # Only redraw if hover changed
-        if tile_index != self.app.hover_tile_index:
-            self.app.hover_tile_index = tile_index
-            self.display_grid()
+        self.set_hover(tile_index)
+    
+    def set_hover(self, tile_index):
+        """Make tile_index the see-through tile, touching only the two overlays whose state changes"""
+        previous = self.app.hover_tile_index
+        if tile_index == previous:
+            return
+        self.app.hover_tile_index = tile_index
+        if previous in self._overlay_items:
+            self.app.canvas.itemconfigure(self._overlay_items[previous], state='normal')
+        if tile_index in self._overlay_items:
+            self.app.canvas.itemconfigure(self._overlay_items[tile_index], state='hidden')
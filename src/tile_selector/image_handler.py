@@ -3,8 +3,11 @@ Image Handler Module for Tile Selector
 Manages image loading and navigation operations
 """
 import os
+import functools
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import filedialog, messagebox
+import numpy as np
 from PIL import Image
 
 try:
@@ -13,14 +16,52 @@ try:
 except ImportError:
     DND_AVAILABLE = False
 
+# Number of decoded images kept in memory (current image plus prefetched neighbours)
+IMAGE_CACHE_SIZE = 4
+
+
+@functools.lru_cache(maxsize=IMAGE_CACHE_SIZE)
+def _decode_image(path, mtime_ns):
+    """Decode an image file to RGB; mtime_ns only keys the cache so edited files are decoded again"""
+    with Image.open(path) as img:
+        return img.convert("RGB")
+
+
+def open_image(path):
+    """Return the decoded RGB image of a file, shared with other callers: copy() it before mutating"""
+    return _decode_image(path, os.stat(path).st_mtime_ns)
+
 
 class ImageHandler:
     """Handles image loading and navigation"""
     
     def __init__(self, app):
         self.app = app
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=1)
         self._setup_drag_drop()
         
+    def _add_image(self, path):
+        """Append an image path after checking its header; pixels are decoded on demand"""
+        try:
+            with Image.open(path):
+                pass
+            self.app.images.append(path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load {path}: {e}")
+    
+    def prefetch_neighbours(self):
+        """Decode the previous and next images in the background to hide load latency"""
+        count = len(self.app.images)
+        if count < 2:
+            return
+        for offset in (1, -1):
+            path = self.app.images[(self.app.current_image_index + offset) % count]
+            self._prefetch_pool.submit(open_image, path)
+    
+    def stop_prefetch(self):
+        """Drop pending prefetches and let the prefetch thread exit"""
+        self._prefetch_pool.shutdown(wait=False, cancel_futures=True)
+        
     def is_image_file(self, filepath):
         """Check if file is a supported image format"""
         ext = os.path.splitext(filepath)[1].lower()
@@ -38,16 +79,13 @@ class ImageHandler:
             self.app.image_tile_selections = {}  # Clear previous selections
             self._clear_classifications()  # Clear LULC classifications
             for filepath in filepaths:
-                try:
-                    img = Image.open(filepath)
-                    self.app.images.append((filepath, img))
-                except Exception as e:
-                    messagebox.showerror("Error", f"Failed to load {filepath}: {e}")
+                self._add_image(filepath)
             if self.app.images:
                 self.app.update_status(f"Loaded {len(self.app.images)} image(s)")
                 self.app.update_image_list()
                 self.app.current_image_index = 0
                 self.app.apply_tile_size()
+                self.prefetch_neighbours()
 
     def upload_folder(self):
         """Upload all images from a folder"""
@@ -59,11 +97,7 @@ class ImageHandler:
             for file in os.listdir(folder):
                 path = os.path.join(folder, file)
                 if os.path.isfile(path) and self.is_image_file(path):
-                    try:
-                        img = Image.open(path)
-                        self.app.images.append((path, img))
-                    except Exception as e:
-                        messagebox.showerror("Error", f"Failed to load {path}: {e}")
+                    self._add_image(path)
             if not self.app.images:
                 messagebox.showwarning("Warning", "No valid images found in folder.")
                 self.app.update_status("No images found")
@@ -72,13 +106,13 @@ class ImageHandler:
                 self.app.update_image_list()
                 self.app.current_image_index = 0
                 self.app.apply_tile_size()
+                self.prefetch_neighbours()
     
     def update_image_list(self):
         """Update the image list in side panel"""
-        self.app.image_listbox.delete(0, tk.END)
-        for i, (path, img) in enumerate(self.app.images):
-            filename = os.path.basename(path)
-            self.app.image_listbox.insert(tk.END, f"{i+1}. {filename}")
+        # Replace the rows in one list assignment rather than one Tcl round trip per image
+        self.app.image_list_var.set(tuple(f"{i+1}. {os.path.basename(path)}"
+                                          for i, path in enumerate(self.app.images)))
         
         if self.app.images:
             self.app.image_listbox.selection_set(self.app.current_image_index)
@@ -93,7 +127,7 @@ class ImageHandler:
         if selection:
             # Save current image's selections before switching
             if self.app.images and self.app.current_image_index < len(self.app.images):
-                current_image_path = self.app.images[self.app.current_image_index][0]
+                current_image_path = self.app.images[self.app.current_image_index]
                 self.app.image_tile_selections[current_image_path] = self.app.selected_tiles.copy()
             
             self.app.current_image_index = selection[0]
@@ -101,6 +135,7 @@ class ImageHandler:
                 text=f"{self.app.current_image_index + 1} / {len(self.app.images)}")
             self._clear_classifications()  # Clear classifications when switching images
             self.app.apply_tile_size()
+            self.prefetch_neighbours()
     
     def prev_image(self):
         """Show previous image"""
@@ -108,7 +143,7 @@ class ImageHandler:
             return
         
         # Save current image's selections before switching
-        current_image_path = self.app.images[self.app.current_image_index][0]
+        current_image_path = self.app.images[self.app.current_image_index]
         self.app.image_tile_selections[current_image_path] = self.app.selected_tiles.copy()
         
         self.app.current_image_index = (self.app.current_image_index - 1) % len(self.app.images)
@@ -119,6 +154,7 @@ class ImageHandler:
             text=f"{self.app.current_image_index + 1} / {len(self.app.images)}")
         self._clear_classifications()  # Clear classifications when switching images
         self.app.apply_tile_size()
+        self.prefetch_neighbours()
     
     def next_image(self):
         """Show next image"""
@@ -126,7 +162,7 @@ class ImageHandler:
             return
         
         # Save current image's selections before switching
-        current_image_path = self.app.images[self.app.current_image_index][0]
+        current_image_path = self.app.images[self.app.current_image_index]
         self.app.image_tile_selections[current_image_path] = self.app.selected_tiles.copy()
         
         self.app.current_image_index = (self.app.current_image_index + 1) % len(self.app.images)
@@ -137,6 +173,7 @@ class ImageHandler:
             text=f"{self.app.current_image_index + 1} / {len(self.app.images)}")
         self._clear_classifications()  # Clear classifications when switching images
         self.app.apply_tile_size()
+        self.prefetch_neighbours()
     
     def _setup_drag_drop(self):
         """Setup drag and drop functionality"""
@@ -188,21 +225,13 @@ class ImageHandler:
             if os.path.isfile(item):
                 # Single file dropped
                 if self.is_image_file(item):
-                    try:
-                        img = Image.open(item)
-                        self.app.images.append((item, img))
-                    except Exception as e:
-                        messagebox.showerror("Error", f"Failed to load {item}: {e}")
+                    self._add_image(item)
             elif os.path.isdir(item):
                 # Folder dropped
                 for file in os.listdir(item):
                     path = os.path.join(item, file)
                     if os.path.isfile(path) and self.is_image_file(path):
-                        try:
-                            img = Image.open(path)
-                            self.app.images.append((path, img))
-                        except Exception as e:
-                            messagebox.showerror("Error", f"Failed to load {path}: {e}")
+                        self._add_image(path)
         
         if not self.app.images:
             messagebox.showwarning("Warning", "No valid images found in dropped items.")
@@ -213,6 +242,7 @@ class ImageHandler:
             self.app.current_image_index = 0
             self._clear_classifications()  # Clear LULC classifications
             self.app.apply_tile_size()
+            self.prefetch_neighbours()
     
     def _parse_drop_data(self, data):
         """Parse dropped file/folder paths from event data"""
@@ -233,7 +263,7 @@ class ImageHandler:
     
     def _clear_classifications(self):
         """Clear LULC classifications and hide legend"""
-        self.app.tile_classifications = []
+        self.app.tile_classifications = np.empty(0, dtype=np.int8)
         if hasattr(self.app, 'legend_frame') and self.app.legend_frame:
             if self.app.legend_frame.winfo_ismapped():
                 self.app.legend_frame.pack_forget()
@@ -3,9 +3,20 @@ LULC Classifier Integration Module
 Handles automatic tile classification with visual preview
 """
 import numpy as np
-import cv2
 from PIL import Image
 
+# cv2 takes a noticeable share of start-up time, so it is only imported by the first get_cv2 call
+_cv2 = None
+
+
+def get_cv2():
+    """Return the cv2 module, importing it on first use"""
+    global _cv2
+    if _cv2 is None:
+        import cv2
+        _cv2 = cv2
+    return _cv2
+
 
 class LULCClassifier:
     """Integrated LULC classifier for tile selector"""
@@ -16,6 +27,11 @@ class LULCClassifier:
         'Pasture', 'PermanentCrop', 'Residential', 'River', 'SeaLake', 'Others'
     ]
     
+    # Per-tile classifications are int8 ids indexing CLASS_NAMES: the categories, then Cloud
+    CLASS_NAMES = CATEGORIES + ['Cloud']
+    CLASS_IDS = dict(zip(CLASS_NAMES, range(len(CLASS_NAMES))))
+    CLOUD_ID = len(CATEGORIES)
+    
     # Color mapping for each category (RGB format for display)
     CATEGORY_COLORS = {
         'AnnualCrop': '#FFD700',        # Gold
@@ -38,7 +54,8 @@ class LULCClassifier:
         self.cloud_threshold = cloud_threshold
     
     def analyze_image_bands(self, img_array):
-        """Analyze RGB bands and return statistics"""
+        """Analyze RGB bands and return statistics (BGR or RGB order; only green is singled out)"""
+        cv2 = get_cv2()
         b, g, r = cv2.split(img_array)
         
         stats = {
@@ -58,10 +75,9 @@ class LULCClassifier:
         return stats
     
     def apply_band_correction(self, img_array, stats):
-        """Apply color correction to balance bands"""
-        corrected = img_array.copy().astype(np.float32)
-        
-        b, g, r = cv2.split(corrected.astype(np.uint8))
+        """Apply color correction to balance bands (BGR or RGB order, returned in the same order)"""
+        cv2 = get_cv2()
+        b, g, r = cv2.split(img_array)
         
         # Apply CLAHE
         clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
@@ -82,6 +98,7 @@ class LULCClassifier:
     
     def detect_cloud(self, tile_array):
         """Detect if tile contains clouds"""
+        cv2 = get_cv2()
         hsv = cv2.cvtColor(tile_array, cv2.COLOR_BGR2HSV)
         h, s, v = cv2.split(hsv)
         
@@ -101,6 +118,7 @@ class LULCClassifier:
         Returns:
             category name string
         """
+        cv2 = get_cv2()
         # Convert to different color spaces
         hsv = cv2.cvtColor(tile_array, cv2.COLOR_BGR2HSV)
         gray = cv2.cvtColor(tile_array, cv2.COLOR_BGR2GRAY)
@@ -226,15 +244,23 @@ class LULCClassifier:
             progress_callback: Optional callback function(current, total)
             
         Returns:
-            List of classifications (category names)
+            int8 array of class ids (indices into CLASS_NAMES), one per tile
         """
-        classifications = []
+        cv2 = get_cv2()
         total = len(tiles)
-        
-        for i, tile_info in enumerate(tiles):
-            # Convert PIL to numpy array (BGR)
-            pil_img = tile_info['tile_img']
-            img_array = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
+        classifications = np.empty(total, dtype=np.int8)
+        if not tiles:
+            return classifications
+        
+        # Convert every tile to BGR in one cvtColor call over the stacked (N*H, W, 3) pixels;
+        # band correction stays per tile since its statistics and CLAHE are tile-local
+        batch = np.stack([np.asarray(tile_info['tile_img']) for tile_info in tiles])
+        count, height, width = batch.shape[:3]
+        batch = cv2.cvtColor(batch.reshape(count * height, width, 3), cv2.COLOR_RGB2BGR)
+        batch = batch.reshape(count, height, width, 3)
+        
+        for i in range(total):
+            img_array = batch[i]
             
             # Apply color correction if enabled
             if self.apply_color_correction:
@@ -245,14 +271,14 @@ class LULCClassifier:
             if self.filter_clouds:
                 is_cloud, _ = self.detect_cloud(img_array)
                 if is_cloud:
-                    classifications.append('Cloud')
+                    classifications[i] = self.CLOUD_ID
                     if progress_callback:
                         progress_callback(i + 1, total)
                     continue
             
             # Classify tile
             category = self.classify_tile(img_array)
-            classifications.append(category)
+            classifications[i] = self.CLASS_IDS[category]
             
             if progress_callback:
                 progress_callback(i + 1, total)
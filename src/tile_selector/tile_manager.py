@@ -4,9 +4,35 @@ Handles tile generation and export operations
 """
 import os
 import math
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import filedialog, messagebox
+import numpy as np
 from PIL import Image
 
+from .image_handler import open_image
+
+try:
+    import pyvips
+    PYVIPS_AVAILABLE = True
+except ImportError:
+    PYVIPS_AVAILABLE = False
+
+# zlib level for libvips PNG writes; matches Pillow's default so both paths give the same files
+VIPS_PNG_COMPRESSION = 6
+
+# Failed files listed in the export error dialog; the rest are only counted
+MAX_REPORTED_ERRORS = 50
+
+
+def report_export_errors(errors):
+    """Show one dialog listing (filename, error) pairs collected during an export"""
+    if not errors:
+        return
+    message = "\n".join(f"{name}: {error}" for name, error in errors[:MAX_REPORTED_ERRORS])
+    if len(errors) > MAX_REPORTED_ERRORS:
+        message += f"\n(+ {len(errors) - MAX_REPORTED_ERRORS} more)"
+    messagebox.showerror("Export Errors", f"Failed to save {len(errors)} tiles:\n\n{message}")
+
 
 class TileManager:
     """Manages tile operations"""
@@ -32,13 +58,14 @@ class TileManager:
         self.validate_tile_size()
         
         # Clear LULC classifications when tile size changes
-        self.app.tile_classifications = []
+        self.app.tile_classifications = np.empty(0, dtype=np.int8)
         if hasattr(self.app, 'legend_frame') and self.app.legend_frame:
             if self.app.legend_frame.winfo_ismapped():
                 self.app.legend_frame.pack_forget()
         
         # Get current image (use preprocessed if enabled, otherwise original)
-        current_image_path, original_image = self.app.images[self.app.current_image_index]
+        current_image_path = self.app.images[self.app.current_image_index]
+        original_image = open_image(current_image_path)
         
         # Use preprocessed image if preprocessing is enabled
         if hasattr(self.app, 'preprocess_enabled') and self.app.preprocess_enabled and self.app.preprocess_enabled.get():
@@ -72,6 +99,8 @@ class TileManager:
         saved_selections = self.app.image_tile_selections.get(current_image_path, set())
         
         self.app.tiles = []
+        self.app.tile_cols = tiles_x
+        self.app.tile_rows = tiles_y
         self.app.selected_tiles = set()
         
         # Generate tiles
@@ -99,7 +128,53 @@ class TileManager:
                 })
                 tile_index += 1
         
-        self.app.display_grid()
+        self.app.display_grid(force=True)
+    
+    def _padded_tile_array(self, img_path):
+        """Return the image as an RGB array zero-padded to whole tiles, with its grid size"""
+        tile_size = self.app.tile_size
+        # Exports read every image once, so bypass the display cache
+        with Image.open(img_path) as img:
+            rgb = np.asarray(img.convert('RGB'))
+        height, width = rgb.shape[:2]
+        tiles_x = math.ceil(width / tile_size)
+        tiles_y = math.ceil(height / tile_size)
+        padded = np.zeros((tiles_y * tile_size, tiles_x * tile_size, 3), dtype=np.uint8)
+        padded[:height, :width] = rgb
+        return padded, tiles_x, tiles_y
+    
+    def _tile_source(self, padded):
+        """Return what tiles are cropped from: a libvips image over the array when available, else the array"""
+        if PYVIPS_AVAILABLE:
+            return pyvips.Image.new_from_array(padded)
+        return padded
+    
+    def _crop_tile(self, source, x, y):
+        """Cut one tile out of a _tile_source result"""
+        tile_size = self.app.tile_size
+        if PYVIPS_AVAILABLE:
+            return source.crop(x, y, tile_size, tile_size)
+        return source[y:y + tile_size, x:x + tile_size]
+    
+    def _save_tiles(self, pool, jobs, errors):
+        """Encode and write (pixels, path) jobs on the pool, adding failures to errors; return how many were saved"""
+        futures = [(path, pool.submit(self._save_tile, pixels, path)) for pixels, path in jobs]
+        saved = 0
+        for path, future in futures:
+            try:
+                future.result()
+                saved += 1
+            except Exception as e:
+                errors.append((os.path.basename(path), str(e)))
+        return saved
+    
+    def _save_tile(self, pixels, path):
+        """Write one tile as PNG (runs on a pool thread)"""
+        if PYVIPS_AVAILABLE:
+            # libvips encodes with libspng and drops the GIL for the whole write
+            pixels.write_to_file(path, compression=VIPS_PNG_COMPRESSION)
+        else:
+            Image.fromarray(pixels).save(path, optimize=False)
     
     def export_tiles(self):
         """Export all selected tiles from all images"""
@@ -109,7 +184,7 @@ class TileManager:
         
         # Save current image's selections
         if self.app.current_image_index < len(self.app.images):
-            current_image_path = self.app.images[self.app.current_image_index][0]
+            current_image_path = self.app.images[self.app.current_image_index]
             self.app.image_tile_selections[current_image_path] = self.app.selected_tiles.copy()
         
         folder = filedialog.askdirectory(title="Select Export Folder")
@@ -118,45 +193,38 @@ class TileManager:
         
         exported = 0
         total_selected = 0
+        tile_size = self.app.tile_size
+        errors = []
         
-        # Process each image
-        for img_path, img in self.app.images:
-            # Get selected tiles for this image
-            selected_tiles = self.app.image_tile_selections.get(img_path, set())
-            if not selected_tiles:
-                continue
-            
-            total_selected += len(selected_tiles)
-            
-            # Generate tiles for this image
-            img_width, img_height = img.size
-            tiles_x = math.ceil(img_width / self.app.tile_size)
-            tiles_y = math.ceil(img_height / self.app.tile_size)
-            padded_width = tiles_x * self.app.tile_size
-            padded_height = tiles_y * self.app.tile_size
-            
-            padded_image = Image.new('RGB', (padded_width, padded_height), (0, 0, 0))
-            padded_image.paste(img, (0, 0))
-            
-            image_name = os.path.splitext(os.path.basename(img_path))[0]
-            tile_index = 0
-            
-            for row in range(tiles_y):
-                for col in range(tiles_x):
-                    if tile_index in selected_tiles:
-                        x = col * self.app.tile_size
-                        y = row * self.app.tile_size
-                        tile_img = padded_image.crop((x, y, x + self.app.tile_size, y + self.app.tile_size))
-                        
-                        filename = f"{image_name}_tile_{row}_{col}.png"
-                        path = os.path.join(folder, filename)
-                        try:
-                            tile_img.save(path)
-                            exported += 1
-                        except Exception as e:
-                            messagebox.showerror("Error", f"Failed to save {filename}: {e}")
-                    tile_index += 1
+        # PNG encoding and file writes release the GIL, so tiles are saved concurrently
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            # Process each image
+            for img_path in self.app.images:
+                # Get selected tiles for this image
+                selected_tiles = self.app.image_tile_selections.get(img_path, set())
+                if not selected_tiles:
+                    continue
+                
+                total_selected += len(selected_tiles)
+                
+                # Decode and pad the image once; tiles are cut from this array
+                padded, tiles_x, tiles_y = self._padded_tile_array(img_path)
+                source = self._tile_source(padded)
+                image_name = os.path.splitext(os.path.basename(img_path))[0]
+                
+                # Visit only the selected tiles; indices are row-major over the grid
+                jobs = []
+                for tile_index in sorted(selected_tiles):
+                    row, col = divmod(tile_index, tiles_x)
+                    if row >= tiles_y:
+                        continue
+                    x = col * tile_size
+                    y = row * tile_size
+                    filename = f"{image_name}_tile_{row}_{col}.png"
+                    jobs.append((self._crop_tile(source, x, y), os.path.join(folder, filename)))
+                exported += self._save_tiles(pool, jobs, errors)
         
+        report_export_errors(errors)
         if exported == 0:
             messagebox.showwarning("Warning", "No tiles selected for export.")
         else:
@@ -171,7 +239,7 @@ class TileManager:
         
         # Save current image's selections
         if self.app.current_image_index < len(self.app.images):
-            current_image_path = self.app.images[self.app.current_image_index][0]
+            current_image_path = self.app.images[self.app.current_image_index]
             self.app.image_tile_selections[current_image_path] = self.app.selected_tiles.copy()
         
         folder = filedialog.askdirectory(title="Select Export Folder for Selected Tiles")
@@ -189,52 +257,45 @@ class TileManager:
         
         exported_selected = 0
         exported_unselected = 0
+        tile_size = self.app.tile_size
+        errors = []
         
-        # Process each image
-        for img_path, img in self.app.images:
-            # Get selected tiles for this image
-            selected_tiles = self.app.image_tile_selections.get(img_path, set())
-            
-            # Generate tiles for this image
-            img_width, img_height = img.size
-            tiles_x = math.ceil(img_width / self.app.tile_size)
-            tiles_y = math.ceil(img_height / self.app.tile_size)
-            padded_width = tiles_x * self.app.tile_size
-            padded_height = tiles_y * self.app.tile_size
-            
-            padded_image = Image.new('RGB', (padded_width, padded_height), (0, 0, 0))
-            padded_image.paste(img, (0, 0))
-            
-            image_name = os.path.splitext(os.path.basename(img_path))[0]
-            tile_index = 0
-            
-            for row in range(tiles_y):
-                for col in range(tiles_x):
-                    x = col * self.app.tile_size
-                    y = row * self.app.tile_size
-                    tile_img = padded_image.crop((x, y, x + self.app.tile_size, y + self.app.tile_size))
-                    
-                    filename = f"{image_name}_tile_{row}_{col}.png"
-                    
-                    if tile_index in selected_tiles:
-                        # Export to selected folder
-                        path = os.path.join(folder, filename)
-                        try:
-                            tile_img.save(path)
-                            exported_selected += 1
-                        except Exception as e:
-                            messagebox.showerror("Error", f"Failed to save {filename}: {e}")
-                    else:
-                        # Export to unselected folder
-                        path = os.path.join(no_folder, filename)
-                        try:
-                            tile_img.save(path)
-                            exported_unselected += 1
-                        except Exception as e:
-                            messagebox.showerror("Error", f"Failed to save {filename}: {e}")
-                    
-                    tile_index += 1
+        # PNG encoding and file writes release the GIL, so tiles are saved concurrently
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            # Process each image
+            for img_path in self.app.images:
+                # Get selected tiles for this image
+                selected_tiles = self.app.image_tile_selections.get(img_path, set())
+                
+                # Decode and pad the image once; tiles are cut from this array
+                padded, tiles_x, tiles_y = self._padded_tile_array(img_path)
+                source = self._tile_source(padded)
+                image_name = os.path.splitext(os.path.basename(img_path))[0]
+                selected_jobs = []
+                unselected_jobs = []
+                tile_index = 0
+                
+                for row in range(tiles_y):
+                    for col in range(tiles_x):
+                        x = col * tile_size
+                        y = row * tile_size
+                        tile_pixels = self._crop_tile(source, x, y)
+                        
+                        filename = f"{image_name}_tile_{row}_{col}.png"
+                        
+                        if tile_index in selected_tiles:
+                            # Export to selected folder
+                            selected_jobs.append((tile_pixels, os.path.join(folder, filename)))
+                        else:
+                            # Export to unselected folder
+                            unselected_jobs.append((tile_pixels, os.path.join(no_folder, filename)))
+                        
+                        tile_index += 1
+                
+                exported_selected += self._save_tiles(pool, selected_jobs, errors)
+                exported_unselected += self._save_tiles(pool, unselected_jobs, errors)
         
+        report_export_errors(errors)
         messagebox.showinfo("Classification Export Complete", 
                           f"Exported {exported_selected} selected tiles to:\n{folder}\n\n"
                           f"Exported {exported_unselected} unselected tiles to:\n{no_folder}")
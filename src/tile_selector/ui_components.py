@@ -4,15 +4,29 @@ Handles all GUI setup and styling
 """
 import tkinter as tk
 from tkinter import ttk
+from tkinter import font as tkfont
 
 
 class UIComponents:
     """Manages UI components and styling for Tile Selector"""
     
+    # ttk styles are process-wide, so they are configured only once
+    _styles_initialized = False
+    
     def __init__(self, root, app):
         self.root = root
         self.app = app
         self.style = ttk.Style()
+        self._fonts = {}  # (family, size, weight) -> tkfont.Font
+        
+    def _font(self, size, weight='normal', family='Segoe UI'):
+        """Return a shared Font object so each font is resolved by Tk only once"""
+        key = (family, size, weight)
+        font = self._fonts.get(key)
+        if font is None:
+            font = tkfont.Font(root=self.root, family=family, size=size, weight=weight)
+            self._fonts[key] = font
+        return font
         
     def setup_gui(self):
         """Setup the main GUI layout"""
@@ -23,10 +37,12 @@ class UIComponents:
 
     def _setup_styles(self):
         """Configure ttk styles for consistent buttons and scrollbars"""
+        if UIComponents._styles_initialized:
+            return
         self.style.theme_use('clam')
 
-        font_bold = ('Segoe UI Semibold', self.app.button_font_size, 'bold')
-        font_icon = ('Segoe UI', self.app.button_font_size, 'bold')
+        font_bold = self._font(self.app.button_font_size, 'bold', family='Segoe UI Semibold')
+        font_icon = self._font(self.app.button_font_size, 'bold')
 
         self.style.configure("Sky.Primary.TButton",
                              background="#0e639c",
@@ -90,12 +106,28 @@ class UIComponents:
         self.style.configure("Sky.Nav.TButton",
                              background="#0e639c",
                              foreground="#ffffff",
-                             font=('Segoe UI', 9, 'bold'),
+                             font=self._font(9, 'bold'),
                              borderwidth=0,
                              padding=(6, 5))
         self.style.map("Sky.Nav.TButton",
                        background=[("active", "#1177bb"), ("disabled", "#1a1a1a")],
                        foreground=[("disabled", "#888888")])
+
+        self.style.configure("Vertical.TScrollbar", 
+                             background="#2d2d2d",
+                             troughcolor="#1e1e1e",
+                             bordercolor="#1e1e1e",
+                             arrowcolor="#aaaaaa",
+                             darkcolor="#2d2d2d",
+                             lightcolor="#2d2d2d")
+        self.style.configure("Horizontal.TScrollbar",
+                             background="#2d2d2d",
+                             troughcolor="#1e1e1e",
+                             bordercolor="#1e1e1e",
+                             arrowcolor="#aaaaaa",
+                             darkcolor="#2d2d2d",
+                             lightcolor="#2d2d2d")
+        UIComponents._styles_initialized = True
         
     def _setup_control_panel(self):
         """Setup the top control panel with buttons - Two rows for better space management"""
@@ -135,11 +167,11 @@ class UIComponents:
         middle_section.pack(side=tk.LEFT, padx=15, pady=12)
         
         tk.Label(middle_section, text="Tile Size:", bg="#2d2d2d", fg="white", 
-                font=('Segoe UI', self.app.base_font_size)).pack(side=tk.LEFT, padx=3)
+                font=self._font(self.app.base_font_size)).pack(side=tk.LEFT, padx=3)
         
         self.app.tile_size_var = tk.StringVar(value=str(self.app.tile_size))
         tile_size_entry = tk.Entry(middle_section, textvariable=self.app.tile_size_var, width=8, 
-                                   font=('Segoe UI', self.app.base_font_size), relief=tk.FLAT, 
+                                   font=self._font(self.app.base_font_size), relief=tk.FLAT, 
                                    bg="#3c3c3c", fg="white", insertbackground="white")
         tile_size_entry.pack(side=tk.LEFT, padx=3)
         tile_size_entry.bind("<FocusOut>", self.app.validate_tile_size)
@@ -158,7 +190,7 @@ class UIComponents:
                                          selectcolor="#3c3c3c",
                                          activebackground="#2d2d2d", 
                                          activeforeground="white",
-                                         font=('Segoe UI', self.app.base_font_size))
+                                         font=self._font(self.app.base_font_size))
         preprocess_check.pack(side=tk.LEFT, padx=8)
         self._create_tooltip(preprocess_check, "Apply CLAHE and color correction to image")
         
@@ -174,7 +206,7 @@ class UIComponents:
         zoom_section.pack(side=tk.LEFT, padx=15, pady=12)
         
         tk.Label(zoom_section, text="Zoom:", bg="#2d2d2d", fg="white", 
-                font=('Segoe UI', self.app.base_font_size)).pack(side=tk.LEFT, padx=3)
+                font=self._font(self.app.base_font_size)).pack(side=tk.LEFT, padx=3)
         
         zoom_btn_style = self._get_button_style('icon')
         
@@ -183,7 +215,7 @@ class UIComponents:
         zoom_out_btn.pack(side=tk.LEFT, padx=2)
         
         self.app.zoom_label = tk.Label(zoom_section, text="100%", bg="#2d2d2d", fg="white", 
-                                       font=('Segoe UI', self.app.base_font_size, 'bold'), width=5)
+                                       font=self._font(self.app.base_font_size, 'bold'), width=5)
         self.app.zoom_label.pack(side=tk.LEFT, padx=3)
         
         zoom_in_btn = ttk.Button(zoom_section, text="➕", 
@@ -221,7 +253,7 @@ class UIComponents:
                                              selectcolor="#3c3c3c",
                                              activebackground="#2d2d2d",
                                              activeforeground="white",
-                                             font=('Segoe UI', self.app.base_font_size),
+                                             font=self._font(self.app.base_font_size),
                                              cursor='hand2')
         classification_check.pack(side=tk.LEFT, padx=8)
         
@@ -238,7 +270,7 @@ class UIComponents:
         
         self.app.status_label = tk.Label(status_frame, text="Ready | Upload images to start", 
                                          bg="#252525", fg="#aaaaaa", 
-                                         font=('Segoe UI', self.app.status_font_size),
+                                         font=self._font(self.app.status_font_size),
                                          anchor='w', padx=10, pady=5)
         self.app.status_label.pack(fill=tk.X)
         
@@ -246,6 +278,10 @@ class UIComponents:
         """Setup main content area with side panel and canvas"""
         content_frame = tk.Frame(self.root, bg="#1e1e1e")
         content_frame.pack(side=tk.BOTTOM, fill=tk.BOTH, expand=True)
+        # Side panel column keeps its minimum width; the canvas column takes the rest
+        content_frame.grid_columnconfigure(0, minsize=200)
+        content_frame.grid_columnconfigure(1, weight=1)
+        content_frame.grid_rowconfigure(0, weight=1)
         
         self._setup_side_panel(content_frame)
         self._setup_canvas(content_frame)
@@ -253,12 +289,11 @@ class UIComponents:
     def _setup_side_panel(self, parent):
         """Setup side panel for image navigation"""
         self.app.side_panel = tk.Frame(parent, bg="#2d2d2d", width=200)
-        self.app.side_panel.pack(side=tk.LEFT, fill=tk.Y)
-        self.app.side_panel.pack_propagate(False)
+        self.app.side_panel.grid(row=0, column=0, sticky='nsew')
         
         # Header
         nav_header = tk.Label(self.app.side_panel, text="Images", bg="#2d2d2d", fg="white", 
-                             font=('Segoe UI', 11, 'bold'), pady=10)
+                             font=self._font(11, 'bold'), pady=10)
         nav_header.pack(side=tk.TOP, fill=tk.X)
         
         # Navigation buttons
@@ -277,7 +312,7 @@ class UIComponents:
         
         # Image counter
         self.app.image_counter_label = tk.Label(self.app.side_panel, text="0 / 0", 
-                                                bg="#2d2d2d", fg="#aaaaaa", font=('Segoe UI', 9))
+                                                bg="#2d2d2d", fg="#aaaaaa", font=self._font(9))
         self.app.image_counter_label.pack(side=tk.TOP, pady=5)
         
         # Image list
@@ -287,8 +322,11 @@ class UIComponents:
         list_scroll = tk.Scrollbar(list_frame, orient=tk.VERTICAL)
         list_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         
-        self.app.image_listbox = tk.Listbox(list_frame, bg="#3c3c3c", fg="white", 
-                                            font=('Segoe UI', 9), relief=tk.FLAT,
+        # Rows live in a Tcl list variable; the listbox only draws the visible ones
+        self.app.image_list_var = tk.Variable(value=())
+        self.app.image_listbox = tk.Listbox(list_frame, listvariable=self.app.image_list_var,
+                                            bg="#3c3c3c", fg="white", 
+                                            font=self._font(9), relief=tk.FLAT,
                                             selectbackground="#0e639c", selectforeground="white",
                                             yscrollcommand=list_scroll.set, activestyle='none')
         self.app.image_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -301,7 +339,7 @@ class UIComponents:
     def _setup_canvas(self, parent):
         """Setup canvas for tile display"""
         canvas_frame = tk.Frame(parent, bg="#1e1e1e")
-        canvas_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+        canvas_frame.grid(row=0, column=1, sticky='nsew')
         
         self.app.canvas = tk.Canvas(canvas_frame, bg="#0a0a0a", highlightthickness=0)
         self.app.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -311,21 +349,6 @@ class UIComponents:
         
     def _setup_scrollbars(self, parent):
         """Setup canvas scrollbars"""
-        self.style.configure("Vertical.TScrollbar", 
-                             background="#2d2d2d",
-                             troughcolor="#1e1e1e",
-                             bordercolor="#1e1e1e",
-                             arrowcolor="#aaaaaa",
-                             darkcolor="#2d2d2d",
-                             lightcolor="#2d2d2d")
-        self.style.configure("Horizontal.TScrollbar",
-                             background="#2d2d2d",
-                             troughcolor="#1e1e1e",
-                             bordercolor="#1e1e1e",
-                             arrowcolor="#aaaaaa",
-                             darkcolor="#2d2d2d",
-                             lightcolor="#2d2d2d")
-        
         v_scroll = ttk.Scrollbar(parent, orient=tk.VERTICAL, 
                                 command=self.app.canvas.yview, style="Vertical.TScrollbar")
         v_scroll.pack(side=tk.RIGHT, fill=tk.Y)
@@ -334,7 +357,13 @@ class UIComponents:
                                 command=self.app.canvas.xview, style="Horizontal.TScrollbar")
         h_scroll.pack(side=tk.BOTTOM, fill=tk.X)
         
-        self.app.canvas.configure(xscrollcommand=h_scroll.set, yscrollcommand=v_scroll.set)
+        self.app.canvas.configure(xscrollcommand=lambda *args: self._on_canvas_scroll(h_scroll, args),
+                                  yscrollcommand=lambda *args: self._on_canvas_scroll(v_scroll, args))
+    
+    def _on_canvas_scroll(self, scrollbar, args):
+        """Update scrollbar and let the canvas handler render the newly visible region"""
+        scrollbar.set(*args)
+        self.app.canvas_handler.on_view_changed()
         
     def _setup_category_legend(self):
         """Setup LULC category legend panel"""
@@ -345,7 +374,7 @@ class UIComponents:
         
         # Header
         legend_header = tk.Label(legend_frame, text="LULC Categories", bg="#2d2d2d", fg="white", 
-                                font=('Segoe UI', 10, 'bold'), pady=8)
+                                font=self._font(10, 'bold'), pady=8)
         legend_header.pack(side=tk.TOP, fill=tk.X)
         
         # Scrollable legend - fills all remaining vertical space
@@ -397,7 +426,7 @@ class UIComponents:
             
             label_text = f"{category}: 0"
             count_label = tk.Label(row1, text=label_text, bg="#2d2d2d", fg="white",
-                                  font=('Segoe UI', 8), anchor='w')
+                                  font=self._font(8), anchor='w')
             count_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=3)
             
             # Row 2: Mask value editor
@@ -405,12 +434,12 @@ class UIComponents:
             row2.pack(side=tk.TOP, fill=tk.X, padx=(22, 0))
             
             val_label = tk.Label(row2, text="Mask Val:", bg="#2d2d2d", fg="#aaaaaa",
-                                font=('Segoe UI', 7))
+                                font=self._font(7))
             val_label.pack(side=tk.LEFT, padx=(0, 2))
             
             value_var = tk.StringVar(value=str(idx))
             value_entry = tk.Entry(row2, textvariable=value_var, width=4,
-                                   font=('Segoe UI', 8, 'bold'), relief=tk.FLAT,
+                                   font=self._font(8, 'bold'), relief=tk.FLAT,
                                    bg="#3c3c3c", fg="#00ff00", insertbackground="#00ff00",
                                    justify='center')
             value_entry.pack(side=tk.LEFT, padx=2)
@@ -446,7 +475,7 @@ class UIComponents:
             tooltip.wm_overrideredirect(True)
             tooltip.wm_geometry(f"+{event.x_root+10}+{event.y_root+10}")
             label = tk.Label(tooltip, text=text, background="#ffffe0", 
-                           relief=tk.SOLID, borderwidth=1, font=('Segoe UI', 8))
+                           relief=tk.SOLID, borderwidth=1, font=self._font(8))
             label.pack()
             widget.tooltip = tooltip
         